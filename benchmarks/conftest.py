@@ -0,0 +1,43 @@
+import pytest
+
+from pycodif.synthetic import write_synthetic
+
+THREADS = (0, 1, 2, 3)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--data-frames",
+        type=int,
+        default=4096,
+        help="Data frames in the synthetic benchmark file, four frames each.",
+    )
+
+
+@pytest.fixture(scope="session")
+def synthetic_file(request, tmp_path_factory):
+    """A synthetic CODIF file of four threads in the format of the test files."""
+    filename = tmp_path_factory.mktemp("benchmarks") / "synthetic.codif"
+    write_synthetic(
+        filename, request.config.getoption("--data-frames"), threads=THREADS, seed=0
+    )
+    return filename
+
+
+@pytest.fixture
+def throughput(benchmark):
+    """Records the frames and megabytes per second of a benchmark in its
+    extra_info, once it has run.
+
+    Nothing is recorded with --benchmark-disable, when the benchmarks run once as
+    plain tests and keep no timings.
+    """
+
+    def record(n_frames: int, n_bytes: int):
+        if benchmark.stats is None:
+            return
+        mean = benchmark.stats.stats.mean
+        benchmark.extra_info["frames_per_second"] = n_frames / mean
+        benchmark.extra_info["megabytes_per_second"] = n_bytes / mean / 1e6
+
+    return record
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from pycodif.channelize import channelize
+from pycodif.correlate import Correlator
+from pycodif.dedisperse import Dedisperser
+from pycodif.fold import Ephemeris, Folder
+from pycodif.parsing import CODIF
+from pycodif.rfi import RFIFlagger
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(scope="module")
+def codif(synthetic_file):
+    return CODIF(str(synthetic_file))
+
+
+def frames_of(codif, data) -> int:
+    return (
+        data.shape[-1] // codif.clock.samples_per_frame * int(np.prod(data.shape[:3]))
+    )
+
+
+def test_channelize(benchmark, throughput, codif):
+    data = codif.data[..., 0, :]
+    benchmark(channelize, data, 64, detect="power")
+    throughput(frames_of(codif, codif.data), data.nbytes)
+
+
+def test_fold(benchmark, throughput, codif):
+    # (time, thread, channel) detected power.
+    power = np.abs(codif.data[0, 0]) ** 2
+    power = np.moveaxis(power, -1, 0)
+    times = np.asarray(codif.timestamps)
+    ephemeris = Ephemeris(period=0.089, period_derivative=0.0, epoch=times[0])
+
+    def fold():
+        folder = Folder(256, ephemeris)
+        folder.add(power, times)
+        return folder.profile
+
+    benchmark(fold)
+    throughput(frames_of(codif, codif.data), power.nbytes)
+
+
+def test_dedisperse(benchmark, throughput, codif):
+    # (time, channel) detected power, treating the 8 channels as a 400 MHz band.
+    power = np.abs(codif.data[0, 0, 0].T) ** 2
+    frequencies = np.linspace(1400, 1000, power.shape[-1])
+    sample_time = codif.clock.sample_period
+    dedisperser = Dedisperser(np.arange(0, 10, 0.1), frequencies, sample_time)
+
+    benchmark(dedisperser.process, power)
+    throughput(power.shape[0] // codif.clock.samples_per_frame, power.nbytes)
+
+
+def test_correlate(benchmark, throughput, codif):
+    # Voltage spectra of every thread, (station, group, thread, channel, segment, 16).
+    spectra = channelize(codif.data, 16, detect="voltage")
+    benchmark(Correlator(spectra.shape[-2]).process, spectra)
+    throughput(frames_of(codif, codif.data), spectra.nbytes)
+
+
+def test_rfi(benchmark, throughput, codif):
+    benchmark(RFIFlagger(1024).process, codif.data)
+    throughput(frames_of(codif, codif.data), codif.data.nbytes)
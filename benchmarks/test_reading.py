@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pytest
+
+from pycodif.assembly import assemble_frames
+from pycodif.bulk import MappedCODIF, decode_headers
+from pycodif.decoding import PayloadFormat, decode_payloads
+from pycodif.index import FrameIndex
+from pycodif.parsing import CODIF, CODIFFrame
+
+pytest.importorskip("pytest_benchmark")
+
+
+def test_header_scan(benchmark, throughput, synthetic_file):
+    with MappedCODIF(synthetic_file) as mapped:
+        benchmark(decode_headers, mapped.raw_headers)
+        throughput(mapped.n_frames, mapped.n_frames * 64)
+
+
+def test_index(benchmark, throughput, synthetic_file):
+    with MappedCODIF(synthetic_file) as mapped:
+        benchmark(FrameIndex.open, mapped, cache=False)
+        throughput(mapped.n_frames, mapped.n_frames * 64)
+
+
+def test_payload_decode(benchmark, throughput, synthetic_file):
+    with MappedCODIF(synthetic_file) as mapped:
+        payload_format = PayloadFormat.from_header(mapped.first_header)
+        payloads = mapped.payloads[:4096]
+        out = np.empty(
+            (len(payloads), payload_format.channels, payload_format.samples_per_frame),
+            dtype=payload_format.dtype,
+        )
+        benchmark(decode_payloads, payloads, payload_format, out=out)
+        throughput(len(payloads), payloads.nbytes)
+
+
+def test_frame_read(benchmark, throughput, synthetic_file):
+    with open(synthetic_file, "rb") as f:
+
+        def read():
+            f.seek(0)
+            return CODIFFrame(f)
+
+        frame = benchmark(read)
+    throughput(1, 64 + 8 * frame.header.data_array_length)
+
+
+def test_assembly(benchmark, throughput, synthetic_file):
+    codif = CODIF(str(synthetic_file), lazy=True)
+    index = codif.index
+    filled = np.nonzero(index.positions >= 0)
+    positions = index.positions[filled]
+    out = np.empty(codif.data.shape, dtype=codif.data.dtype)
+    payload_format = PayloadFormat.from_header(index.header)
+
+    with MappedCODIF(synthetic_file) as mapped:
+        benchmark(
+            assemble_frames, mapped.payloads, payload_format, positions, filled, out
+        )
+        throughput(len(positions), mapped.n_frames * mapped.frame_size)
+
+
+def test_codif(benchmark, throughput, synthetic_file):
+    codif = benchmark(CODIF, str(synthetic_file), cache_index=False)
+    throughput(len(codif.index), os.path.getsize(synthetic_file))
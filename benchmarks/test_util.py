@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from pycodif.parsing import CODIF
+
+pytest.importorskip("pytest_benchmark")
+pd = pytest.importorskip("pandas")
+
+# The notebook helpers, which the pycodif DSP stages are measured against.
+sys.path.insert(0, str(Path(__file__).parents[1] / "notebooks"))
+import util  # noqa: E402
+
+SEGMENT_SIZE = 64
+
+
+@pytest.fixture(scope="module")
+def codif(synthetic_file):
+    return CODIF(str(synthetic_file))
+
+
+@pytest.fixture(scope="module")
+def spectra(codif):
+    """(segment, frequency) power spectra of one thread and channel."""
+    return util.get_fourier_power_spectrum(codif.data[0, 0, 0, 0], SEGMENT_SIZE)
+
+
+def test_fourier_power_spectrum(benchmark, throughput, codif):
+    data = codif.data[0, 0, 0, 0]
+    benchmark(util.get_fourier_power_spectrum, data, SEGMENT_SIZE)
+    throughput(len(data) // codif.clock.samples_per_frame, data.nbytes)
+
+
+def test_folded_data(benchmark, throughput, codif, spectra):
+    benchmark(
+        util.get_folded_data,
+        spectra,
+        256,
+        89.0,
+        codif.clock.sample_period,
+        SEGMENT_SIZE,
+    )
+    throughput(
+        len(spectra) * SEGMENT_SIZE // codif.clock.samples_per_frame, spectra.nbytes
+    )
+
+
+def test_dedisperse_dataset(benchmark, throughput, codif, spectra):
+    # dedisperse_dataset delays each frequency relative to the last, the highest.
+    frequencies = np.linspace(1000, 1400, SEGMENT_SIZE)
+    benchmark(
+        util.dedisperse_dataset,
+        spectra,
+        0.1,
+        codif.clock.sample_period,
+        frequencies,
+        SEGMENT_SIZE,
+    )
+    throughput(
+        len(spectra) * SEGMENT_SIZE // codif.clock.samples_per_frame, spectra.nbytes
+    )
+
+
+def test_phase_shift_for_antennae(benchmark):
+    # A 16 by 16 grid of antennas half a metre apart.
+    x, y = np.meshgrid(np.arange(16) * 0.5, np.arange(16) * 0.5)
+    antennae_map = pd.DataFrame({"x_loc": x.ravel(), "y_loc": y.ravel()})
+    benchmark(util.calc_phase_shift_for_antennae, 0.1, 0.2, antennae_map, 0.21)
@@ -0,0 +1,3 @@
+from pycodif.cli import main
+
+main()
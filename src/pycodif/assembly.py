@@ -0,0 +1,64 @@
+import numpy as np
+
+from pycodif.decoding import PayloadFormat, decode_payloads
+from pycodif.instrumentation import NULL_STATS, Stats
+
+# Frames decoded at a time before being scattered into place, which bounds the size
+# of the temporary array of decoded frames.
+DEFAULT_BATCH_FRAMES = 4096
+
+
+def assemble_frames(
+    payloads: np.ndarray,
+    payload_format: PayloadFormat,
+    positions: np.ndarray,
+    destinations: tuple,
+    out: np.ndarray,
+    batch_size: int = DEFAULT_BATCH_FRAMES,
+    stats: Stats = NULL_STATS,
+) -> np.ndarray:
+    """Decodes frames and writes each into its place in a data cube.
+
+    `positions` are the frames to take from `payloads`, a (frame, bytes) array such
+    as MappedCODIF.payloads. `destinations` is a (station, group, thread, frame)
+    tuple of index arrays giving where each of those frames goes in `out`, a
+    (station, group, thread, channel, sample) array whose sample axis is a whole
+    number of frames long. The destination of every frame is worked out up front, so
+    the work is linear in the number of frames, and decoded frames are scattered
+    into `out` a batch at a time. Samples keep their native width if `out` has
+    payload_format.native_dtype.
+
+    Each batch is recorded in three stages of `stats`: "gather" copies its frames
+    out of `payloads`, which for a memory-mapped file is when they are read from
+    disk, "decode" converts their samples and "scatter" writes them into `out`.
+    """
+    samples_per_frame = payload_format.samples_per_frame
+    native = out.dtype != payload_format.dtype
+    if not out.flags.c_contiguous:
+        raise ValueError("out must be C-contiguous.")
+    if out.shape[-1] % samples_per_frame:
+        raise ValueError(
+            f"The sample axis of out ({out.shape[-1]}) must be a whole number of "
+            f"{samples_per_frame} sample frames long."
+        )
+
+    # Split the sample axis into (frame, sample within frame) so each decoded frame
+    # lands with a single scatter.
+    cube = out.reshape(out.shape[:-1] + (-1, samples_per_frame))
+    stations, groups, threads, frames = destinations
+
+    # Read frames in file order.
+    order = np.argsort(positions, kind="stable")
+    for start in range(0, len(order), batch_size):
+        batch = order[start : start + batch_size]
+        with stats.stage("gather", len(batch)) as call:
+            batch_payloads = payloads[positions[batch]]
+            call.add(nbytes=batch_payloads.nbytes)
+        with stats.stage("decode", len(batch), batch_payloads.nbytes):
+            decoded = decode_payloads(batch_payloads, payload_format, native=native)
+        with stats.stage("scatter", len(batch), decoded.nbytes):
+            cube[stations[batch], groups[batch], threads[batch], :, frames[batch]] = (
+                decoded
+            )
+
+    return out
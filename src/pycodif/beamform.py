@@ -0,0 +1,115 @@
+import numpy as np
+
+from pycodif.decoding import upcast
+from pycodif.instrumentation import NULL_STATS, Stats
+
+SPEED_OF_LIGHT = 299_792_458.0
+
+
+def pointing_vectors(theta_radians, phi_radians) -> np.ndarray:
+    """Unit vectors towards each (theta, phi) pointing, with shape (..., 3).
+
+    Theta is measured around from the x axis and phi up from the plane of the array.
+    """
+    theta_radians, phi_radians = np.broadcast_arrays(theta_radians, phi_radians)
+    return np.stack(
+        [
+            np.cos(theta_radians) * np.cos(phi_radians),
+            np.sin(theta_radians) * np.cos(phi_radians),
+            np.sin(phi_radians),
+        ],
+        axis=-1,
+    )
+
+
+def steering_weights(
+    positions_m: np.ndarray,
+    theta_radians,
+    phi_radians,
+    frequencies_hz,
+    amplitudes=None,
+) -> np.ndarray:
+    """Weights pointing a beam at each (theta, phi) from antennas at `positions_m`.
+
+    `positions_m` is (antenna, 2 or 3) in metres, and `theta_radians` and
+    `phi_radians` give the pointing of each beam. Every phase is worked out in one
+    pass, giving (channel, beam, antenna) complex64 weights for the channels at
+    `frequencies_hz`. `amplitudes` optionally tapers the antennas, otherwise each
+    beam is the mean of the antennas.
+    """
+    positions_m = np.asarray(positions_m, dtype=np.float64)
+    if positions_m.shape[-1] == 2:
+        positions_m = np.pad(positions_m, ((0, 0), (0, 1)))
+
+    directions = pointing_vectors(theta_radians, phi_radians).reshape(-1, 3)
+    path_lengths = directions @ positions_m.T
+    wavenumbers = 2 * np.pi * np.atleast_1d(frequencies_hz) / SPEED_OF_LIGHT
+
+    if amplitudes is None:
+        amplitudes = np.full(len(positions_m), 1 / len(positions_m))
+    phases = wavenumbers[:, np.newaxis, np.newaxis] * path_lengths
+    return (np.asarray(amplitudes) * np.exp(-1j * phases)).astype(np.complex64)
+
+
+def beamform(data: np.ndarray, weights: np.ndarray, out=None) -> np.ndarray:
+    """Forms beams from (antenna, channel, sample) or (antenna, sample) data.
+
+    `weights` is (beam, antenna), the same for every channel, or (channel, beam,
+    antenna) from steering_weights. The beams are formed with a single matrix
+    product, or one per channel, which NumPy hands to BLAS for complex64 data. The
+    result is (beam, channel, sample) or (beam, sample), written into `out` if it is
+    given.
+    """
+    data = upcast(data)
+    weights = np.asarray(weights, dtype=np.result_type(weights, data))
+    if weights.ndim == 2:
+        n_beams = weights.shape[0]
+        if out is None:
+            out = np.empty((n_beams,) + data.shape[1:], dtype=weights.dtype)
+        elif not out.flags.c_contiguous:
+            raise ValueError("out must be C-contiguous.")
+        np.matmul(weights, data.reshape(len(data), -1), out=out.reshape(n_beams, -1))
+        return out
+
+    if data.ndim != 3:
+        raise ValueError("Per channel weights need (antenna, channel, sample) data.")
+    n_channels, n_beams, _ = weights.shape
+    if out is None:
+        out = np.empty((n_beams, n_channels, data.shape[-1]), dtype=weights.dtype)
+    # (channel, beam, antenna) @ (channel, antenna, sample) -> (channel, beam, sample)
+    np.matmul(weights, data.transpose(1, 0, 2), out=out.transpose(1, 0, 2))
+    return out
+
+
+class Beamformer:
+    """Forms beams from a stream of CODIF data cubes, such as the blocks from
+    CODIF.iter_blocks.
+
+    Every (station, group, thread) stream of the cube is an antenna, in that order.
+    The output of each block is written into the same buffer while the block size
+    stays the same, so copy it if it needs to outlive the next block. Each block is
+    recorded as the "beamform" stage of `stats`.
+    """
+
+    def __init__(self, weights: np.ndarray, stats: Stats = NULL_STATS):
+        self.weights = np.asarray(weights)
+        self.stats = stats
+        self.out = None
+
+    def process(self, cube: np.ndarray) -> np.ndarray:
+        """Gives the (beam, channel, sample) beams of a (station, group, thread,
+        channel, sample) cube."""
+        with self.stats.stage("beamform", nbytes=cube.nbytes):
+            return self._process(cube)
+
+    def _process(self, cube: np.ndarray) -> np.ndarray:
+        cube = upcast(cube)
+        data = cube.reshape((-1,) + cube.shape[-2:])
+        if self.weights.ndim == 2:
+            shape = (len(self.weights),) + data.shape[1:]
+        else:
+            shape = (self.weights.shape[1],) + data.shape[1:]
+        dtype = np.result_type(self.weights, data)
+        if self.out is None or self.out.shape != shape or self.out.dtype != dtype:
+            self.out = np.empty(shape, dtype=dtype)
+        return beamform(data, self.weights, out=self.out)
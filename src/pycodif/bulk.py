@@ -0,0 +1,234 @@
+import os
+
+import numpy as np
+from loguru import logger
+
+from pycodif.constants import CODIF_HEADER_SIZE
+
+# Name, format and byte offset of each field in a 64 byte CODIF header, as read by
+# CODIFHeader.parse_header.
+RAW_HEADER_FIELDS = [
+    ("data_frame_number", "<u4", 0),
+    ("epoch_offset", "<u4", 4),
+    ("reference_epoch", "u1", 8),
+    ("sample_size", "u1", 9),
+    ("packed_bits_1", "u1", 10),
+    ("packed_bits_2", "u1", 11),
+    ("reserved", "<u2", 12),
+    ("alignment_period", "<u2", 14),
+    ("thread_id", "<u2", 16),
+    ("group_id", "<u2", 18),
+    ("secondary_id", "<u2", 20),
+    ("station_id_1", "u1", 22),
+    ("station_id_2", "u1", 23),
+    ("channels", "<u2", 24),
+    ("sample_block_length", "<u2", 26),
+    ("data_array_length", "<u4", 28),
+    ("sample_periods_per_alignment_period", "<u8", 32),
+    ("synchronisation_sequence", "<u4", 40),
+    ("metadata_id", "<u2", 44),
+    ("metadata_bytes", ("u1", 18), 46),
+]
+
+RAW_HEADER_DTYPE = np.dtype(
+    {
+        "names": [name for name, _, _ in RAW_HEADER_FIELDS],
+        "formats": [fmt for _, fmt, _ in RAW_HEADER_FIELDS],
+        "offsets": [offset for _, _, offset in RAW_HEADER_FIELDS],
+        "itemsize": CODIF_HEADER_SIZE,
+    }
+)
+
+# One field per attribute set by CODIFHeader.parse_header. Fields used in frame size
+# and timing arithmetic are widened to int64 so they behave like the python ints
+# stored on CODIFHeader.
+HEADER_DTYPE = np.dtype(
+    [
+        ("data_frame_number", np.int64),
+        ("epoch_offset", np.int64),
+        ("reference_epoch", np.uint8),
+        ("sample_size", np.int64),
+        ("sample_representation", np.uint8),
+        ("cal_enabled", np.uint8),
+        ("complex", np.uint8),
+        ("invalid", np.uint8),
+        ("atypical", np.uint8),
+        ("protocol", np.uint8),
+        ("version", np.uint8),
+        ("reserved", np.uint16),
+        ("alignment_period", np.int64),
+        ("thread_id", np.uint16),
+        ("group_id", np.uint16),
+        ("secondary_id", np.uint16),
+        ("station_id_1", np.uint8),
+        ("station_id_2", np.uint8),
+        ("station_id", "U2"),
+        ("channels", np.int64),
+        ("sample_block_length", np.int64),
+        ("data_array_length", np.int64),
+        ("sample_periods_per_alignment_period", np.int64),
+        ("synchronisation_sequence", np.uint32),
+        ("metadata_id", np.uint16),
+        ("metadata_bytes", np.uint8, (18,)),
+    ]
+)
+
+
+def decode_headers(raw) -> np.ndarray:
+    """Decodes any number of 64 byte CODIF headers in one pass.
+
+    `raw` is either an array of RAW_HEADER_DTYPE (which may be a strided view over a
+    file) or a bytes-like object holding whole headers back to back. The result has
+    one HEADER_DTYPE record per header, with the same fields as CODIFHeader.
+    """
+    if not (isinstance(raw, np.ndarray) and raw.dtype == RAW_HEADER_DTYPE):
+        raw = np.frombuffer(raw, dtype=RAW_HEADER_DTYPE)
+
+    headers = np.empty(raw.shape, dtype=HEADER_DTYPE)
+    for name, _, _ in RAW_HEADER_FIELDS:
+        if name in HEADER_DTYPE.names:
+            headers[name] = raw[name]
+
+    packed_bits_1 = raw["packed_bits_1"]
+    headers["sample_representation"] = packed_bits_1 >> 4 & 0xF
+    headers["cal_enabled"] = (packed_bits_1 >> 3) & 0x1
+    headers["complex"] = (packed_bits_1 >> 2) & 0x1
+    headers["invalid"] = (packed_bits_1 >> 1) & 0x1
+    headers["atypical"] = packed_bits_1 & 0x1
+
+    packed_bits_2 = raw["packed_bits_2"]
+    headers["protocol"] = packed_bits_2 >> 5 & 0xF
+    headers["version"] = packed_bits_2 & 0x1F
+
+    # Each station byte is a character code, the same as chr() in parse_header.
+    station_codes = np.stack(
+        [raw["station_id_1"], raw["station_id_2"]], axis=-1
+    ).astype(np.uint32)
+    headers["station_id"] = station_codes.view("U2")[..., 0]
+
+    return headers
+
+
+def encode_headers(headers: np.ndarray) -> np.ndarray:
+    """Packs HEADER_DTYPE records back into 64 byte CODIF headers, the reverse of
+    decode_headers.
+
+    The result is an array of RAW_HEADER_DTYPE, so `.tobytes()` gives the headers as
+    they are written to a file. The station bytes are taken from `station_id_1` and
+    `station_id_2`.
+    """
+    headers = np.asarray(headers, dtype=HEADER_DTYPE)
+    raw = np.zeros(headers.shape, dtype=RAW_HEADER_DTYPE)
+    for name, _, _ in RAW_HEADER_FIELDS:
+        if name in HEADER_DTYPE.names:
+            raw[name] = headers[name]
+
+    raw["packed_bits_1"] = (
+        (headers["sample_representation"] & 0xF) << 4
+        | (headers["cal_enabled"] & 0x1) << 3
+        | (headers["complex"] & 0x1) << 2
+        | (headers["invalid"] & 0x1) << 1
+        | headers["atypical"] & 0x1
+    )
+    raw["packed_bits_2"] = (headers["protocol"] & 0x7) << 5 | headers["version"] & 0x1F
+    return raw
+
+
+class MappedCODIF:
+    """A CODIF file memory-mapped as a sequence of fixed size frames.
+
+    The frame size is taken from the first header. `raw_headers` and `payloads` are
+    views over the mapped file, so nothing is read until it is used. All headers are
+    decoded at once into `headers` the first time it is accessed. Once closed, reading
+    any of them raises a ValueError.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._headers = None
+        self.closed = False
+
+        self.file_size = os.path.getsize(filename)
+        if self.file_size < CODIF_HEADER_SIZE:
+            raise ValueError(
+                f"{filename} is {self.file_size} bytes, too small to hold a CODIF "
+                "header."
+            )
+
+        self._buffer = np.memmap(filename, dtype=np.uint8, mode="r")
+        self.first_header = decode_headers(self._buffer[:CODIF_HEADER_SIZE])[0]
+        self.frame_size = CODIF_HEADER_SIZE + 8 * int(
+            self.first_header["data_array_length"]
+        )
+
+        self.n_frames, trailing_bytes = divmod(self.file_size, self.frame_size)
+        if trailing_bytes:
+            logger.warning(
+                f"Ignoring {trailing_bytes} trailing bytes in {filename} which do not "
+                "make up a complete frame."
+            )
+
+        frames = self._buffer[: self.n_frames * self.frame_size].reshape(
+            self.n_frames, self.frame_size
+        )
+        self._raw_headers = frames[:, :CODIF_HEADER_SIZE].view(RAW_HEADER_DTYPE)[:, 0]
+        self._payloads = frames[:, CODIF_HEADER_SIZE:]
+
+    def _check_open(self):
+        if self.closed:
+            raise ValueError("MappedCODIF is closed.")
+
+    @property
+    def buffer(self) -> np.ndarray:
+        self._check_open()
+        return self._buffer
+
+    @property
+    def raw_headers(self) -> np.ndarray:
+        self._check_open()
+        return self._raw_headers
+
+    @property
+    def payloads(self) -> np.ndarray:
+        self._check_open()
+        return self._payloads
+
+    @property
+    def headers(self) -> np.ndarray:
+        self._check_open()
+        if self._headers is None:
+            self._headers = self.read_headers()
+        return self._headers
+
+    def read_headers(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        """Decodes the headers of frames `start` to `stop`.
+
+        Raises a ValueError if any of them has a different frame size to the first.
+        """
+        headers = decode_headers(self.raw_headers[start:stop])
+
+        mismatched = np.flatnonzero(
+            headers["data_array_length"] != self.first_header["data_array_length"]
+        )
+        if len(mismatched):
+            raise ValueError(
+                f"Frame size is not fixed in {self.filename}: frame "
+                f"{start + mismatched[0]} has a different data array length to the "
+                "first frame."
+            )
+
+        return headers
+
+    def __len__(self) -> int:
+        return self.n_frames
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # The map is released once the last view over it is garbage collected.
+        self._buffer = self._raw_headers = self._payloads = self._headers = None
+        self.closed = True
@@ -0,0 +1,145 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import fft
+
+from pycodif.decoding import upcast
+from pycodif.instrumentation import NULL_STATS, Stats
+
+DETECTIONS = ("amplitude", "power", "voltage")
+
+
+def segment(data: np.ndarray, length: int, step: int) -> np.ndarray:
+    """Splits the last axis of `data` into segments of `length` samples, starting
+    every `step` samples, as a (..., segment, sample) view without copying.
+
+    Samples left over after the last whole segment are dropped.
+    """
+    if length < 1 or step < 1:
+        raise ValueError("Segment length and step must be at least 1.")
+    if data.shape[-1] < length:
+        return np.empty(data.shape[:-1] + (0, length), dtype=data.dtype)
+    return sliding_window_view(data, length, axis=-1)[..., ::step, :]
+
+
+def prototype_filter(n_channels: int, taps: int) -> np.ndarray:
+    """Coefficients of a polyphase filterbank with `n_channels` channels and `taps`
+    taps per channel: a sinc one channel wide, with a Hamming window."""
+    length = n_channels * taps
+    x = np.arange(length) / n_channels - taps / 2
+    return np.sinc(x) * np.hamming(length)
+
+
+def channel_frequencies(
+    n_channels: int, sample_rate: float, centre_frequency: float = 0.0
+) -> np.ndarray:
+    """Frequency of each channel given by channelize, in the units of `sample_rate`."""
+    return fft.fftshift(fft.fftfreq(n_channels, 1 / sample_rate)) + centre_frequency
+
+
+def channelize(
+    data: np.ndarray,
+    n_channels: int,
+    overlap: int = 0,
+    taps: int = 1,
+    window: np.ndarray | None = None,
+    detect: str = "amplitude",
+    dtype=np.float32,
+    workers: int | None = None,
+) -> np.ndarray:
+    """Splits time series into frequency channels with batched FFTs.
+
+    `data` has time along its last axis, such as the (thread, sample) or full
+    (station, group, thread, channel, sample) data of a CODIF file, and every
+    segment of every series is transformed in a single FFT call. The result has
+    shape (..., segment, channel), with channels in ascending frequency order (see
+    channel_frequencies).
+
+    Segments of `n_channels` samples start every `n_channels - overlap` samples. With
+    `taps` = 1 each segment is multiplied by `window` (a Hann window by default)
+    before its FFT. With more `taps`, a polyphase filterbank is used instead: each
+    spectrum is made from `taps * n_channels` samples weighted by `window` (by
+    default prototype_filter), which gives flatter, better isolated channels.
+
+    `detect` gives the "amplitude" or "power" of each channel, or the complex
+    "voltage". The work is done in the precision of `dtype`, float32 by default.
+    `workers` is passed to scipy.fft to spread the FFTs over several threads.
+    """
+    if detect not in DETECTIONS:
+        raise ValueError(f"detect must be one of {DETECTIONS}, not {detect!r}.")
+    if not 0 <= overlap < n_channels:
+        raise ValueError("overlap must be at least 0 and less than n_channels.")
+    if taps < 1:
+        raise ValueError("taps must be at least 1.")
+
+    real_dtype = np.dtype(dtype)
+    complex_dtype = np.result_type(real_dtype, np.complex64)
+
+    length = n_channels * taps
+    if window is None:
+        window = (
+            np.hanning(n_channels) if taps == 1 else prototype_filter(n_channels, taps)
+        )
+    window = np.asarray(window, dtype=real_dtype)
+    if window.shape != (length,):
+        raise ValueError(f"window must have {length} coefficients.")
+
+    segments = segment(upcast(data), length, n_channels - overlap)
+    weighted = segments * window
+    if taps > 1:
+        weighted = weighted.reshape(weighted.shape[:-1] + (taps, n_channels)).sum(
+            axis=-2
+        )
+
+    spectra = fft.fft(
+        weighted.astype(complex_dtype, copy=False), axis=-1, workers=workers
+    )
+    spectra = fft.fftshift(spectra, axes=-1)
+
+    if detect == "voltage":
+        return spectra
+    if detect == "power":
+        return (spectra.real**2 + spectra.imag**2).astype(real_dtype, copy=False)
+    return np.abs(spectra).astype(real_dtype, copy=False)
+
+
+class Channelizer:
+    """Channelizes a stream of data block by block, as from CODIF.iter_blocks.
+
+    Takes the same arguments as channelize. Samples at the end of each block which
+    do not yet make up a whole segment are kept and joined onto the start of the
+    next, so the spectra are the same as from channelizing all of the data at once.
+    Each block is recorded as the "channelize" stage of `stats`.
+    """
+
+    def __init__(
+        self,
+        n_channels: int,
+        overlap: int = 0,
+        taps: int = 1,
+        stats: Stats = NULL_STATS,
+        **kwargs,
+    ):
+        self.n_channels = n_channels
+        self.stats = stats
+        self.overlap = overlap
+        self.taps = taps
+        self.kwargs = kwargs
+        self.remainder = None
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Gives the spectra of every segment completed by `block`."""
+        with self.stats.stage("channelize", nbytes=block.nbytes):
+            return self._process(block)
+
+    def _process(self, block: np.ndarray) -> np.ndarray:
+        if self.remainder is not None:
+            block = np.concatenate([self.remainder, block], axis=-1)
+
+        length = self.n_channels * self.taps
+        step = self.n_channels - self.overlap
+        n_segments = max((block.shape[-1] - length) // step + 1, 0)
+        self.remainder = block[..., n_segments * step :].copy()
+
+        return channelize(
+            block, self.n_channels, self.overlap, self.taps, **self.kwargs
+        )
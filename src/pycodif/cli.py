@@ -0,0 +1,325 @@
+import argparse
+
+import numpy as np
+
+from pycodif.bulk import HEADER_DTYPE, MappedCODIF
+from pycodif.constants import CODIF_SYNC_SEQUENCE
+from pycodif.export import (
+    DEFAULT_BLOCK_FRAMES,
+    DEFAULT_CHUNK_FRAMES,
+    DEFAULT_WRITE_WORKERS,
+    STORE_FORMATS,
+    export,
+)
+from pycodif.index import FrameIndex, index_path
+from pycodif.instrumentation import Stats
+from pycodif.network import replay
+from pycodif.parsing import CODIF, expand_filenames
+from pycodif.writer import subset
+
+HEADER_COLUMNS = (
+    "data_frame_number",
+    "epoch_offset",
+    "station_id",
+    "group_id",
+    "thread_id",
+    "invalid",
+)
+
+REPRESENTATIONS = {0: "offset binary", 1: "signed", 2: "float"}
+
+
+def _inputs(args):
+    return args.inputs[0] if len(args.inputs) == 1 else args.inputs
+
+
+def _open(args, stats=None, cache_index: bool = True) -> CODIF:
+    return CODIF(
+        _inputs(args),
+        lazy=True,
+        workers=args.workers,
+        cache_index=cache_index,
+        stats=stats,
+        native=args.native,
+    )
+
+
+def stream_summary(index: FrameIndex) -> list:
+    """Gives (station, group, thread, valid, missing, gaps, invalid) for each stream
+    of the index, counted in data frames."""
+    rows = []
+    for i, station in enumerate(index.stations):
+        for j, group in enumerate(index.groups):
+            for k, thread in enumerate(index.threads):
+                valid = index.valid[i, j, k]
+                invalid = index.invalid[i, j, k]
+                missing = ~valid & ~invalid
+                gaps = np.count_nonzero(
+                    np.diff(missing.astype(np.int8), prepend=0) == 1
+                )
+                rows.append(
+                    (
+                        str(station),
+                        int(group),
+                        int(thread),
+                        int(valid.sum()),
+                        int(missing.sum()),
+                        gaps,
+                        int(invalid.sum()),
+                    )
+                )
+    return rows
+
+
+def info(args):
+    # Only reads the files, so leaves no sidecar index behind.
+    codif = _open(args, cache_index=False)
+    frame_index = codif.index
+    header = frame_index.header
+    clock = codif.clock
+
+    print(f"Files: {', '.join(str(f) for f in codif.filenames)}")
+    print(f"Frames: {len(frame_index)} of {frame_index.frame_size} bytes")
+    print(
+        f"Format: {header['channels']} channels of {header['sample_size']}-bit "
+        f"{'complex' if header['complex'] else 'real'} "
+        f"{REPRESENTATIONS.get(int(header['sample_representation']), 'unknown')} "
+        f"samples, {clock.samples_per_frame} samples per frame"
+    )
+    if len(clock):
+        start, end = clock.datetimes([0, len(clock) - 1])
+        end = end + np.timedelta64(round(clock.sample_period * 1e9), "ns")
+        print(f"Time: {start} to {end} ({len(clock) * clock.sample_period:.6f} s)")
+        frame_numbers = frame_index.frame_numbers
+        print(
+            f"Data frames: {frame_numbers[0]} to {frame_numbers[-1]} "
+            f"({len(frame_numbers)})"
+        )
+    print(
+        f"Sync errors: {int(frame_index.entries['sync_error'].sum())}, "
+        f"duplicates: {frame_index.duplicates}, "
+        f"out of sequence: {frame_index.out_of_sequence}"
+    )
+
+    columns = ("station", "group", "thread", "frames", "missing", "gaps", "invalid")
+    print(" ".join(f"{column:>8}" for column in columns))
+    for row in stream_summary(frame_index):
+        print(" ".join(f"{value:>8}" for value in row))
+
+
+def headers(args):
+    columns = args.fields or HEADER_COLUMNS
+    filenames = expand_filenames(_inputs(args))
+    for number, filename in enumerate(filenames):
+        # Frames are numbered within each file, so each file gets its own table.
+        if len(filenames) > 1:
+            if number:
+                print()
+            print(f"==> {filename} <==")
+        print(
+            " ".join(
+                f"{column:>18}" for column in ("frame",) + tuple(columns) + ("sync",)
+            )
+        )
+        with MappedCODIF(filename) as mapped:
+            decoded = mapped.read_headers(args.start, args.start + args.count)
+            for offset, header in enumerate(decoded):
+                values = [args.start + offset] + [header[c] for c in columns]
+                values.append(
+                    "ok"
+                    if header["synchronisation_sequence"] == CODIF_SYNC_SEQUENCE
+                    else "bad"
+                )
+                print(" ".join(f"{str(value):>18}" for value in values))
+
+
+def index(args):
+    for filename in expand_filenames(_inputs(args)):
+        with MappedCODIF(filename) as mapped:
+            frame_index = FrameIndex.open(mapped)
+        print(f"{index_path(filename)}: {len(frame_index)} frames")
+
+
+def convert(args):
+    stats = Stats() if args.stats else None
+    export(
+        _open(args, stats),
+        args.output,
+        store_format=args.format,
+        chunk_frames=args.chunk_frames,
+        compression=args.compression,
+        block_frames=args.block_frames,
+        write_workers=args.write_workers,
+    )
+    if stats is not None:
+        stats.write(args.stats)
+
+
+def subset_files(args):
+    n_frames = subset(
+        _inputs(args),
+        args.output,
+        stations=args.stations,
+        groups=args.groups,
+        threads=args.threads,
+        start=args.start,
+        stop=args.stop,
+        sample_size=args.sample_size,
+    )
+    print(f"Wrote {n_frames} frames to {args.output}")
+
+
+def replay_file(args):
+    n_packets = replay(args.input, args.host, args.port, args.rate)
+    print(f"Sent {n_packets} packets to {args.host}:{args.port}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pycodif", description="Tools for CODIF radio astronomy data."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    info_parser = commands.add_parser(
+        "info", help="Summarise streams, time span and dropped frames from headers."
+    )
+    info_parser.add_argument(
+        "inputs", nargs="+", help="CODIF files, or a glob pattern, to read."
+    )
+    info_parser.set_defaults(func=info, workers=1, native=False)
+
+    headers_parser = commands.add_parser(
+        "headers", help="Print the headers of a range of frames."
+    )
+    headers_parser.add_argument(
+        "inputs", nargs="+", help="CODIF files, or a glob pattern, to read."
+    )
+    headers_parser.add_argument(
+        "--start", type=int, default=0, help="First frame to print."
+    )
+    headers_parser.add_argument(
+        "--count", type=int, default=10, help="Number of frames to print."
+    )
+    headers_parser.add_argument(
+        "--fields",
+        nargs="+",
+        choices=HEADER_DTYPE.names,
+        metavar="FIELD",
+        help="Header fields to print, by name, such as group_id or sample_size.",
+    )
+    headers_parser.set_defaults(func=headers)
+
+    index_parser = commands.add_parser(
+        "index", help="Build or refresh the sidecar frame index of each file."
+    )
+    index_parser.add_argument(
+        "inputs", nargs="+", help="CODIF files, or a glob pattern, to index."
+    )
+    index_parser.set_defaults(func=index)
+
+    convert_parser = commands.add_parser(
+        "convert", help="Convert CODIF files to a chunked HDF5 or Zarr store."
+    )
+    convert_parser.add_argument(
+        "inputs", nargs="+", help="CODIF files, or a glob pattern, to read."
+    )
+    convert_parser.add_argument(
+        "-o", "--output", required=True, help="Path of the store to write."
+    )
+    convert_parser.add_argument(
+        "--format",
+        choices=STORE_FORMATS,
+        help="Store format, otherwise worked out from the output suffix.",
+    )
+    convert_parser.add_argument(
+        "--compression", help="Compression, such as gzip or lzf for HDF5."
+    )
+    convert_parser.add_argument(
+        "--chunk-frames",
+        type=int,
+        default=DEFAULT_CHUNK_FRAMES,
+        help="Data frames in each chunk of the store.",
+    )
+    convert_parser.add_argument(
+        "--block-frames",
+        type=int,
+        default=DEFAULT_BLOCK_FRAMES,
+        help="Data frames decoded at a time.",
+    )
+    convert_parser.add_argument(
+        "--workers", type=int, default=1, help="Processes to decode frames with."
+    )
+    convert_parser.add_argument(
+        "--write-workers",
+        type=int,
+        default=DEFAULT_WRITE_WORKERS,
+        help="Threads to write Zarr chunks with. HDF5 is written by one thread.",
+    )
+    convert_parser.add_argument(
+        "--native",
+        action="store_true",
+        help="Store samples at their native width, such as (re, im) int16 pairs.",
+    )
+    convert_parser.add_argument(
+        "--stats",
+        help="Write timings and throughput of each stage to this file, as "
+        "Prometheus text if it ends in .prom and as JSON otherwise.",
+    )
+    convert_parser.set_defaults(func=convert)
+
+    subset_parser = commands.add_parser(
+        "subset", help="Copy chosen streams and data frames into a new CODIF file."
+    )
+    subset_parser.add_argument(
+        "inputs", nargs="+", help="CODIF files, or a glob pattern, to read."
+    )
+    subset_parser.add_argument(
+        "-o", "--output", required=True, help="Path of the CODIF file to write."
+    )
+    subset_parser.add_argument("--stations", nargs="+", help="Station ids to keep.")
+    subset_parser.add_argument(
+        "--groups", nargs="+", type=int, help="Group ids to keep."
+    )
+    subset_parser.add_argument(
+        "--threads", nargs="+", type=int, help="Thread ids to keep."
+    )
+    subset_parser.add_argument(
+        "--start", type=int, default=0, help="First data frame to keep."
+    )
+    subset_parser.add_argument(
+        "--stop", type=int, help="Data frame to stop before, otherwise the last."
+    )
+    subset_parser.add_argument(
+        "--sample-size",
+        type=int,
+        help="Bits per sample to repack into, otherwise frames are copied unchanged.",
+    )
+    subset_parser.set_defaults(func=subset_files)
+
+    replay_parser = commands.add_parser(
+        "replay", help="Send the frames of a CODIF file as UDP packets."
+    )
+    replay_parser.add_argument("input", help="CODIF file to send.")
+    replay_parser.add_argument(
+        "--host", default="127.0.0.1", help="Address to send to."
+    )
+    replay_parser.add_argument(
+        "--port", type=int, required=True, help="Port to send to."
+    )
+    replay_parser.add_argument(
+        "--rate", type=float, help="Packets per second, otherwise as fast as possible."
+    )
+    replay_parser.set_defaults(func=replay_file)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    # Files which are missing, unreadable or not valid CODIF are the user's to fix,
+    # so get a message rather than a traceback.
+    try:
+        args.func(args)
+    except (ValueError, OSError) as e:
+        parser.exit(2, f"{parser.prog}: error: {e}\n")
@@ -1 +1,8 @@
 CODIF_BASE_YEAR = 2000
+CODIF_HEADER_SIZE = 64  # bytes
+CODIF_SYNC_SEQUENCE = 0xFEEDCAFE
+
+# Values of the sample representation field in the CODIF header
+SAMPLE_REPRESENTATION_OFFSET_BINARY = 0
+SAMPLE_REPRESENTATION_SIGNED = 1  # two's complement
+SAMPLE_REPRESENTATION_FLOAT = 2  # IEEE floating point
@@ -0,0 +1,132 @@
+import numpy as np
+
+from pycodif.decoding import upcast
+from pycodif.instrumentation import NULL_STATS, Stats
+
+
+def baseline_pairs(n_antennas: int, autos: bool = True) -> np.ndarray:
+    """The (antenna, antenna) pairs of every baseline, as a (baseline, 2) array, with
+    the auto-correlations unless `autos` is False."""
+    first, second = np.triu_indices(n_antennas, k=0 if autos else 1)
+    return np.stack([first, second], axis=-1)
+
+
+def cross_power(spectra: np.ndarray, baselines=None) -> np.ndarray:
+    """Sums the cross-power of (antenna, frequency, time) spectra over time.
+
+    Gives the (frequency, antenna, antenna) matrix of every baseline, worked out
+    with one batched complex matrix product, or the (frequency, baseline) cross-power
+    of just the (baseline, 2) antenna pairs in `baselines`. Element (i, j) is the sum
+    of antenna i times the conjugate of antenna j.
+    """
+    # (antenna, frequency, time) -> (frequency, antenna, time)
+    spectra = np.ascontiguousarray(np.swapaxes(spectra, 0, 1))
+    if baselines is None:
+        return np.matmul(spectra, np.swapaxes(spectra, -1, -2).conj())
+
+    baselines = np.asarray(baselines)
+    return np.einsum(
+        "fbt,fbt->fb",
+        spectra[:, baselines[:, 0]],
+        spectra[:, baselines[:, 1]].conj(),
+    )
+
+
+class Correlator:
+    """Correlates channelized blocks of every antenna against each other, as an FX
+    correlator does.
+
+    Blocks are voltage spectra from channelize or Channelizer with detect="voltage",
+    shaped (station, group, thread, ..., segment, channel). Each (station, group,
+    thread) stream is an antenna, in that order, or the first `antenna_axes` axes
+    are if the streams are laid out differently. Every other axis but the segment
+    axis is a frequency.
+
+    The cross-power of `integration` segments at a time is summed into one
+    integration. process gives the integrations completed by each block, and the
+    segments of a partly summed integration are kept until the next, so memory use
+    does not grow with the length of the stream. Integrations are (..., channel,
+    antenna, antenna) cross-power matrices, or (..., channel, baseline) with
+    `baselines`. Each is the mean over its segments. Each block is recorded as the
+    "correlate" stage of `stats`.
+    """
+
+    def __init__(
+        self,
+        integration: int,
+        baselines=None,
+        antenna_axes: int = 3,
+        stats: Stats = NULL_STATS,
+    ):
+        if integration < 1:
+            raise ValueError("integration must be at least 1 segment.")
+        self.integration = integration
+        self.baselines = None if baselines is None else np.asarray(baselines)
+        self.antenna_axes = antenna_axes
+        self.stats = stats
+        self.sums = None
+        self.segments = 0
+
+    def process(self, spectra: np.ndarray) -> np.ndarray:
+        """Gives the (integration, ...) cross-power of every integration completed
+        by `spectra`, which may be none."""
+        with self.stats.stage("correlate", nbytes=np.asarray(spectra).nbytes):
+            return self._process(spectra)
+
+    def _process(self, spectra: np.ndarray) -> np.ndarray:
+        spectra = upcast(spectra)
+        n_antennas = int(np.prod(spectra.shape[: self.antenna_axes]))
+        frequency_shape = spectra.shape[self.antenna_axes : -2] + spectra.shape[-1:]
+        # (antenna, frequency, segment), with the channel axis moved next to the rest
+        # of the frequency axes.
+        spectra = np.moveaxis(
+            spectra.reshape((n_antennas,) + spectra.shape[self.antenna_axes :]), -2, -1
+        ).reshape(n_antennas, -1, spectra.shape[-2])
+
+        integrations = []
+        start = 0
+        while start < spectra.shape[-1]:
+            stop = min(start + self.integration - self.segments, spectra.shape[-1])
+            power = cross_power(spectra[..., start:stop], self.baselines)
+            # Sums are kept in double precision, as integrations can be long.
+            if self.sums is None:
+                self.sums = power.astype(np.complex128)
+            else:
+                self.sums += power
+            self.segments += stop - start
+            start = stop
+
+            if self.segments == self.integration:
+                integrations.append((self.sums / self.integration).astype(power.dtype))
+                self.sums = None
+                self.segments = 0
+
+        power_shape = self._power_shape(n_antennas, frequency_shape)
+        if not integrations:
+            return np.empty((0,) + power_shape, dtype=spectra.dtype)
+        return np.stack(integrations).reshape((-1,) + power_shape)
+
+    def _power_shape(self, n_antennas: int, frequency_shape: tuple) -> tuple:
+        if self.baselines is None:
+            return frequency_shape + (n_antennas, n_antennas)
+        return frequency_shape + (len(self.baselines),)
+
+
+def calibration_weights(visibilities: np.ndarray, reference: int = 0) -> np.ndarray:
+    """Beamforming weights which line up the phases of each antenna, from
+    (..., antenna, antenna) cross-power matrices of a bright source.
+
+    The antenna gains in each channel are taken from the largest eigenvector of its
+    matrix, with phases relative to antenna `reference`. The weights undo those
+    phases, and each beam is the mean of the antennas. They are
+    (channel, 1, antenna) complex64, the layout of steering_weights, ready for
+    beamform or Beamformer.
+    """
+    visibilities = np.asarray(visibilities)
+    n_antennas = visibilities.shape[-1]
+    _, vectors = np.linalg.eigh(visibilities.reshape(-1, n_antennas, n_antennas))
+    gains = vectors[..., -1]
+    gains = gains * np.exp(-1j * np.angle(gains[:, reference : reference + 1]))
+
+    phases = np.exp(-1j * np.angle(gains)) / n_antennas
+    return phases[:, np.newaxis, :].astype(np.complex64)
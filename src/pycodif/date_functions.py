@@ -1,11 +1,14 @@
+import functools
 import math
 from datetime import date, datetime, timedelta
 
 import numpy as np
 
 from pycodif.constants import CODIF_BASE_YEAR
+from pycodif.decoding import PayloadFormat
 
 
+@functools.lru_cache(maxsize=None)
 def calc_epoch_base(reference_epoch: int) -> date:
     """Calculates the CODIF epoch based on the reference epoch number.
 
@@ -59,9 +62,11 @@ def calc_frame_time_offset(header) -> float:
         header.sample_block_length,
     )
     alignment_period_seconds = header.alignment_period
+    samples_per_block = PayloadFormat.from_header(header).samples_per_block
 
     offset = (
         complete_sample_blocks
+        * samples_per_block
         * alignment_period_seconds
         / header.sample_periods_per_alignment_period
     )
@@ -69,26 +74,145 @@ def calc_frame_time_offset(header) -> float:
     return offset
 
 
+def calc_sample_indices(data_frame_numbers, samples_per_frame: int) -> np.ndarray:
+    """Gives the index of every sample in the given data frames, as int64.
+
+    Samples are counted from the start of the alignment period, so with the epoch
+    and sample period they place each sample in time exactly, however long the
+    observation. `samples_per_frame` is that of PayloadFormat, as a sample block
+    may hold more than one sample.
+    """
+    data_frame_numbers = np.asarray(data_frame_numbers, dtype=np.int64)
+    return (
+        data_frame_numbers[..., np.newaxis] * samples_per_frame
+        + np.arange(samples_per_frame, dtype=np.int64)
+    ).reshape(data_frame_numbers.shape[:-1] + (-1,))
+
+
+def calc_sample_times(
+    data_frame_numbers,
+    samples_per_frame: int,
+    alignment_period: int,
+    sample_periods_per_alignment_period: int,
+) -> np.ndarray:
+    """Gives the time in seconds since the start of the alignment period of every
+    sample in the given data frames.
+
+    Matches calc_time_of_all_samples_in_frame for each frame in turn, but in one
+    NumPy expression.
+    """
+    sample_indices = calc_sample_indices(data_frame_numbers, samples_per_frame)
+    return sample_indices * (alignment_period / sample_periods_per_alignment_period)
+
+
 def calc_time_of_all_samples_in_frame(header) -> np.ndarray:
     """Gives a list of timestamps for all samples in the frame.
 
     This will be given by the sample number of each sample in the frame.
 
     """
-    # Need to be slightly careful here with packing of samples and if there is any blank space left over at the end.
-    number_of_samples_in_frame = math.floor(
-        header.data_array_length / header.sample_block_length
+    return calc_sample_times(
+        header.data_frame_number,
+        PayloadFormat.from_header(header).samples_per_frame,
+        header.alignment_period,
+        header.sample_periods_per_alignment_period,
     )
 
-    start_of_frame_offset = calc_frame_time_offset(header)
 
-    time_per_sample = (
-        header.alignment_period / header.sample_periods_per_alignment_period
-    )
+class SampleClock:
+    """Timestamps of the samples in a run of data frames, worked out on request.
 
-    sample_offsets = [
-        i * time_per_sample + start_of_frame_offset
-        for i in range(number_of_samples_in_frame)
-    ]
+    Holds only the data frame numbers, so the timestamps of a long observation take
+    no memory until they are used. Indexing it, or converting it with np.asarray,
+    gives seconds since `epoch` as float64, like calc_sample_times. For exact times,
+    `sample_indices` counts sample periods since `epoch` as int64, and `datetimes`
+    gives them as datetime64[ns].
+    """
 
-    return np.array(sample_offsets)
+    def __init__(
+        self,
+        epoch: datetime,
+        data_frame_numbers,
+        samples_per_frame: int,
+        alignment_period: int,
+        sample_periods_per_alignment_period: int,
+    ):
+        self.epoch = epoch
+        self.data_frame_numbers = np.asarray(data_frame_numbers, dtype=np.int64)
+        self.samples_per_frame = samples_per_frame
+        self.alignment_period = alignment_period
+        self.sample_periods_per_alignment_period = sample_periods_per_alignment_period
+
+    @classmethod
+    def from_header(cls, header, data_frame_numbers) -> "SampleClock":
+        """Makes a clock for the given frames of the stream `header` is from.
+
+        `header` is a CODIFHeader or a decoded header record, and the epoch is the
+        start of its alignment period.
+        """
+        if isinstance(header, np.void):
+
+            def get(name):
+                return int(header[name])
+        else:
+
+            def get(name):
+                return int(getattr(header, name))
+
+        return cls(
+            calc_start_alignment_period_timestamp(
+                calc_epoch_base(get("reference_epoch")), get("epoch_offset")
+            ),
+            data_frame_numbers,
+            PayloadFormat.from_header(header).samples_per_frame,
+            get("alignment_period"),
+            get("sample_periods_per_alignment_period"),
+        )
+
+    @property
+    def sample_period(self) -> float:
+        """Seconds between samples."""
+        return self.alignment_period / self.sample_periods_per_alignment_period
+
+    def __len__(self) -> int:
+        return len(self.data_frame_numbers) * self.samples_per_frame
+
+    def __repr__(self) -> str:
+        return f"SampleClock(epoch={self.epoch}, samples={len(self)})"
+
+    def sample_indices(self, key=slice(None)) -> np.ndarray:
+        """Sample periods since `epoch` of the samples selected by `key`."""
+        if isinstance(key, slice):
+            samples = np.arange(*key.indices(len(self)), dtype=np.int64)
+        else:
+            samples = np.asarray(key, dtype=np.int64)
+            samples = np.where(samples < 0, samples + len(self), samples)
+        frames, offsets = np.divmod(samples, self.samples_per_frame)
+        return self.data_frame_numbers[frames] * self.samples_per_frame + offsets
+
+    def seconds(self, key=slice(None)) -> np.ndarray:
+        """Seconds since `epoch` of the samples selected by `key`."""
+        return self.sample_indices(key) * self.sample_period
+
+    def datetimes(self, key=slice(None)) -> np.ndarray:
+        """Times of the samples selected by `key` as datetime64[ns].
+
+        Whole alignment periods are counted in integers, so only the time within an
+        alignment period is rounded, to the nearest nanosecond.
+        """
+        periods, remainder = np.divmod(
+            self.sample_indices(key), self.sample_periods_per_alignment_period
+        )
+        nanoseconds = periods * (self.alignment_period * 1_000_000_000) + np.round(
+            remainder
+            * (self.alignment_period * 1e9)
+            / self.sample_periods_per_alignment_period
+        ).astype(np.int64)
+        return np.datetime64(self.epoch, "ns") + nanoseconds.astype("m8[ns]")
+
+    def __getitem__(self, key) -> np.ndarray:
+        return self.seconds(key)
+
+    def __array__(self, dtype=None, copy=None):
+        seconds = self.seconds()
+        return seconds if dtype is None else seconds.astype(dtype)
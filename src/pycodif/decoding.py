@@ -0,0 +1,277 @@
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from pycodif.constants import (
+    SAMPLE_REPRESENTATION_FLOAT,
+    SAMPLE_REPRESENTATION_OFFSET_BINARY,
+    SAMPLE_REPRESENTATION_SIGNED,
+)
+
+
+def _nibble_table(representation: int) -> np.ndarray:
+    """Values of the two 4-bit samples in every possible byte, low nibble first."""
+    nibbles = np.stack([np.arange(256) & 0xF, np.arange(256) >> 4], axis=-1)
+    if representation == SAMPLE_REPRESENTATION_SIGNED:
+        return ((nibbles ^ 0x8) - 0x8).astype(np.float32)
+    return (nibbles - 0x8).astype(np.float32)
+
+
+NIBBLE_TABLES = {
+    SAMPLE_REPRESENTATION_OFFSET_BINARY: _nibble_table(
+        SAMPLE_REPRESENTATION_OFFSET_BINARY
+    ),
+    SAMPLE_REPRESENTATION_SIGNED: _nibble_table(SAMPLE_REPRESENTATION_SIGNED),
+}
+
+
+class PayloadFormat(NamedTuple):
+    """How the samples in a CODIF data array are laid out.
+
+    Sizes are in the same units as the header: sample_size in bits,
+    sample_block_length and data_array_length in 64-bit words.
+    """
+
+    channels: int
+    sample_size: int
+    is_complex: int
+    sample_representation: int
+    sample_block_length: int
+    data_array_length: int
+
+    @classmethod
+    def from_header(cls, header) -> "PayloadFormat":
+        """Reads the format from a CODIFHeader or a decoded header record."""
+        if isinstance(header, np.void):
+
+            def get(name):
+                return int(header[name])
+        else:
+
+            def get(name):
+                return int(getattr(header, name))
+
+        return cls(
+            get("channels"),
+            get("sample_size"),
+            get("complex"),
+            get("sample_representation"),
+            get("sample_block_length"),
+            get("data_array_length"),
+        )
+
+    @property
+    def dtype(self) -> np.dtype:
+        """The dtype samples decode to: complex64 for complex data, else float32."""
+        return np.dtype(np.complex64 if self.is_complex else np.float32)
+
+    @property
+    def native_dtype(self) -> np.dtype:
+        """The dtype samples decode to keeping their stored width: signed integers
+        (int8 for 4-bit samples), or the stored floats. Complex integer samples are
+        (re, im) pairs, such as two int16s for 16-bit complex data.
+        """
+        if self.sample_representation == SAMPLE_REPRESENTATION_FLOAT:
+            values = _sample_dtype(self)
+            if self.is_complex:
+                return np.dtype(np.complex64 if values.itemsize == 4 else np.complex128)
+            return values.newbyteorder("=")
+
+        values = np.dtype(f"i{max(self.sample_size, 8) // 8}")
+        if self.is_complex:
+            return np.dtype([("re", values), ("im", values)])
+        return values
+
+    @property
+    def samples_per_block(self) -> int:
+        """Time samples (across all channels) held in one sample block."""
+        effective_sample_size = self.sample_size * 2**self.is_complex
+        channel_blocks = math.floor(
+            self.sample_block_length * 64 / effective_sample_size
+        )
+        return channel_blocks // self.channels
+
+    @property
+    def samples_per_frame(self) -> int:
+        return (
+            self.data_array_length // self.sample_block_length
+        ) * self.samples_per_block
+
+    @property
+    def block_bytes_used(self) -> int:
+        """Bytes of each sample block holding samples, the rest being padding."""
+        return (
+            self.samples_per_block
+            * self.channels
+            * self.sample_size
+            * 2**self.is_complex
+            // 8
+        )
+
+
+def _sample_dtype(fmt: PayloadFormat) -> np.dtype:
+    if fmt.sample_representation == SAMPLE_REPRESENTATION_FLOAT:
+        if fmt.sample_size not in (32, 64):
+            raise ValueError(
+                f"Floating point samples must be 32 or 64 bits, not {fmt.sample_size}."
+            )
+        return np.dtype(f"<f{fmt.sample_size // 8}")
+
+    if fmt.sample_size not in (8, 16, 32):
+        raise ValueError(f"Unsupported sample size of {fmt.sample_size} bits.")
+    if fmt.sample_representation == SAMPLE_REPRESENTATION_SIGNED:
+        return np.dtype(f"<i{fmt.sample_size // 8}")
+    if fmt.sample_representation == SAMPLE_REPRESENTATION_OFFSET_BINARY:
+        return np.dtype(f"<u{fmt.sample_size // 8}")
+    raise ValueError(f"Unsupported sample representation {fmt.sample_representation}.")
+
+
+def decode_payloads(
+    payloads, fmt: PayloadFormat, out=None, native: bool = False
+) -> np.ndarray:
+    """Decodes CODIF data arrays into (..., channel, sample) arrays.
+
+    `payloads` is a bytes-like object holding one data array, or a uint8 array of
+    shape (..., bytes) holding any number of them (such as a view over a mapped file).
+    Samples of 4, 8, 16 or 32 bits, real or complex, signed or offset binary, or 32
+    or 64 bit floats, are converted to complex64 (or float32 for real data) in a
+    single pass, without any intermediate full-size arrays except for 4-bit data.
+    With `native`, samples keep their stored width instead, as fmt.native_dtype.
+
+    The result is written into `out` if it is given, which must have the right
+    shape and dtype. It only needs to be contiguous along the sample axis, so it can
+    be a slice of a larger array.
+    """
+    if not isinstance(payloads, np.ndarray):
+        payloads = np.frombuffer(payloads, dtype=np.uint8)
+
+    leading_shape = payloads.shape[:-1]
+    n_blocks = fmt.data_array_length // fmt.sample_block_length
+    values_per_sample = 2**fmt.is_complex
+    shape = leading_shape + (fmt.channels, fmt.samples_per_frame)
+    dtype = fmt.native_dtype if native else fmt.dtype
+
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape or out.dtype != dtype:
+        raise ValueError(
+            f"out must have shape {shape} and dtype {dtype}, not {out.shape} and "
+            f"{out.dtype}."
+        )
+
+    # Complex output is filled through a view of its components with a trailing
+    # (real, imag) axis, matching the interleaved samples in the data array.
+    if fmt.is_complex:
+        component = dtype.fields["re"][0] if dtype.names else np.finfo(dtype).dtype
+        target = out.view(component).reshape(shape + (2,))
+    else:
+        target = out
+
+    blocks = payloads.reshape(leading_shape + (n_blocks, fmt.sample_block_length * 8))
+    blocks = blocks[..., : fmt.block_bytes_used]
+
+    if fmt.sample_size == 4:
+        if fmt.sample_representation not in NIBBLE_TABLES:
+            raise ValueError(
+                f"Unsupported 4-bit sample representation {fmt.sample_representation}."
+            )
+        values = NIBBLE_TABLES[fmt.sample_representation][blocks]
+    else:
+        values = blocks.view(_sample_dtype(fmt))
+
+    # (..., block, value) -> (..., sample, channel[, real/imag]) -> channel first
+    values = values.reshape(
+        leading_shape + (fmt.samples_per_frame, fmt.channels, values_per_sample)
+    )
+    values = np.moveaxis(values, -3, -2)
+    if not fmt.is_complex:
+        values = values[..., 0]
+
+    if (
+        fmt.sample_representation == SAMPLE_REPRESENTATION_OFFSET_BINARY
+        and fmt.sample_size != 4
+    ):
+        if native:
+            # Flipping the top bit turns offset binary into two's complement.
+            top_bit = values.dtype.type(2 ** (fmt.sample_size - 1))
+            np.bitwise_xor(values, top_bit, out=target.view(values.dtype))
+            return out
+        np.subtract(
+            values,
+            np.float32(2 ** (fmt.sample_size - 1)),
+            out=target,
+            casting="unsafe",
+        )
+    else:
+        np.copyto(target, values, casting="unsafe")
+
+    return out
+
+
+def upcast(data: np.ndarray) -> np.ndarray:
+    """Gives data decoded with native samples as complex64, or float32 for real
+    integer samples, ready to compute with. Other data is returned unchanged."""
+    data = np.asarray(data)
+    if data.dtype.names == ("re", "im"):
+        out = np.empty(data.shape, dtype=np.complex64)
+        out.real = data["re"]
+        out.imag = data["im"]
+        return out
+    if data.dtype.kind in "iu":
+        return data.astype(np.float32)
+    return data
+
+
+def _quantize(values: np.ndarray, fmt: PayloadFormat) -> np.ndarray:
+    """Rounds and clips sample values to integers of the given format, as stored."""
+    bits = fmt.sample_size
+    values = np.rint(values)
+    if fmt.sample_representation == SAMPLE_REPRESENTATION_OFFSET_BINARY:
+        values = values + 2 ** (bits - 1)
+        return np.clip(values, 0, 2**bits - 1)
+    return np.clip(values, -(2 ** (bits - 1)), 2 ** (bits - 1) - 1)
+
+
+def encode_payloads(data: np.ndarray, fmt: PayloadFormat) -> np.ndarray:
+    """Encodes (..., channel, sample) data into CODIF data arrays, the reverse of
+    decode_payloads.
+
+    The sample axis must be one frame long. Integer samples are rounded and clipped
+    to the range of the format. The result is a (..., bytes) uint8 array of one data
+    array per frame, with any padding at the end of each sample block set to zero.
+    """
+    data = np.asarray(data)
+    leading_shape = data.shape[:-2]
+    if data.shape[-2:] != (fmt.channels, fmt.samples_per_frame):
+        raise ValueError(
+            f"data must have {fmt.channels} channels of {fmt.samples_per_frame} "
+            f"samples, not shape {data.shape[-2:]}."
+        )
+    n_blocks = fmt.data_array_length // fmt.sample_block_length
+
+    # (..., channel, sample) -> (..., sample, channel, real/imag) as stored.
+    values = np.moveaxis(data, -1, -2)
+    if fmt.is_complex:
+        values = np.stack([values.real, values.imag], axis=-1)
+    else:
+        values = values.real[..., np.newaxis]
+    values = np.ascontiguousarray(values).reshape(leading_shape + (n_blocks, -1))
+
+    if fmt.sample_representation == SAMPLE_REPRESENTATION_FLOAT:
+        encoded = values.astype(_sample_dtype(fmt)).view(np.uint8)
+    elif fmt.sample_size == 4:
+        if fmt.sample_representation not in NIBBLE_TABLES:
+            raise ValueError(
+                f"Unsupported 4-bit sample representation {fmt.sample_representation}."
+            )
+        nibbles = _quantize(values, fmt).astype(np.int8).view(np.uint8) & 0xF
+        encoded = nibbles[..., 0::2] | nibbles[..., 1::2] << 4
+    else:
+        encoded = _quantize(values, fmt).astype(_sample_dtype(fmt)).view(np.uint8)
+
+    payloads = np.zeros(
+        leading_shape + (n_blocks, fmt.sample_block_length * 8), dtype=np.uint8
+    )
+    payloads[..., : fmt.block_bytes_used] = encoded
+    return payloads.reshape(leading_shape + (-1,))
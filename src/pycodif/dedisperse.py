@@ -0,0 +1,161 @@
+import numpy as np
+
+from pycodif.decoding import upcast
+from pycodif.instrumentation import NULL_STATS, Stats
+
+# Dispersion delay in seconds for a DM of 1 pc cm^-3 at 1 MHz.
+DISPERSION_CONSTANT = 4.15e3
+
+
+def delay_table(dms, frequencies_mhz, sample_time: float) -> np.ndarray:
+    """Gives the dispersion delay of each channel, in whole samples, for each DM.
+
+    Delays are relative to the highest frequency, so are never negative. The table
+    has shape (dm, channel), or (channel,) for a single DM.
+    """
+    frequencies_mhz = np.asarray(frequencies_mhz, dtype=np.float64)
+    dms = np.asarray(dms, dtype=np.float64)
+    seconds = (
+        DISPERSION_CONSTANT
+        * dms[..., np.newaxis]
+        * (frequencies_mhz**-2 - frequencies_mhz.max() ** -2)
+    )
+    return np.round(seconds / sample_time).astype(np.int64)
+
+
+def dedisperse(
+    data: np.ndarray, dm: float, frequencies_mhz, sample_time: float
+) -> np.ndarray:
+    """Shifts each channel of (..., time, channel) data back by its dispersion delay
+    at `dm`.
+
+    The result is shorter than `data` by the largest delay, so that every sample of
+    it has data in every channel.
+    """
+    delays = delay_table(dm, frequencies_mhz, sample_time)
+    n_samples = data.shape[-2] - delays.max()
+    if n_samples < 0:
+        raise ValueError("Data is shorter than the largest dispersion delay.")
+    times = np.arange(n_samples)[:, np.newaxis] + delays
+    return data[..., times, np.arange(data.shape[-1])]
+
+
+def _shift_sum(data: np.ndarray, delays: np.ndarray, n_samples: int) -> np.ndarray:
+    """Sums (channel, time) `data` over channels with each channel shifted back by
+    its delay, for each row of (trial, channel) `delays`.
+
+    The shifted copies of each channel are rows of a sliding window view of it, so
+    each is gathered at the delays of every trial at once and the only loop is over
+    channels.
+    """
+    out = np.zeros((len(delays), n_samples), dtype=data.dtype)
+    windows = np.lib.stride_tricks.sliding_window_view(data, n_samples, axis=1)
+    for channel, channel_delays in enumerate(delays.T):
+        out += windows[channel, channel_delays]
+    return out
+
+
+class Dedisperser:
+    """Dedisperses a stream of (time, channel) data at many DMs at once, as from
+    channelize.
+
+    Each call to process gives a time series for each DM, summed over channels. The
+    last `max_delay` samples of each chunk are kept and joined onto the next, so the
+    output lines up across chunks just as if all of the data was processed at once.
+
+    With `n_subbands`, the channels are first dedispersed in subbands at a few
+    nominal DMs, each shared by `dms_per_subband` neighbouring trial DMs, and the
+    subbands are then combined at each trial DM. This needs far fewer operations
+    than shifting every channel for every DM, at the cost of a little smearing from
+    the nominal DMs within each subband. Each chunk is recorded as the "dedisperse"
+    stage of `stats`.
+    """
+
+    def __init__(
+        self,
+        dms,
+        frequencies_mhz,
+        sample_time: float,
+        n_subbands: int | None = None,
+        dms_per_subband: int = 8,
+        stats: Stats = NULL_STATS,
+    ):
+        self.dms = np.atleast_1d(np.asarray(dms, dtype=np.float64))
+        self.frequencies_mhz = np.asarray(frequencies_mhz, dtype=np.float64)
+        self.sample_time = sample_time
+        self.n_subbands = n_subbands
+        self.stats = stats
+
+        self.delays = delay_table(self.dms, self.frequencies_mhz, sample_time)
+        self.max_delay = int(self.delays.max())
+        self.history = None
+
+        if n_subbands is not None:
+            n_channels = len(self.frequencies_mhz)
+            if not 1 <= n_subbands <= n_channels:
+                raise ValueError("n_subbands must be between 1 and the channel count.")
+            self.subbands = [
+                slice(channels[0], channels[-1] + 1)
+                for channels in np.array_split(np.arange(n_channels), n_subbands)
+            ]
+            self.dm_groups = np.array_split(
+                np.arange(len(self.dms)), -(-len(self.dms) // dms_per_subband)
+            )
+            subband_frequencies = np.array(
+                [self.frequencies_mhz[channels].max() for channels in self.subbands]
+            )
+
+            # Stage 1 delays each channel relative to the top of its subband at the
+            # nominal DM of each group, and stage 2 delays each subband at every DM.
+            self.nominal_dms = np.array(
+                [self.dms[group].mean() for group in self.dm_groups]
+            )
+            self.channel_delays = delay_table(
+                self.nominal_dms, self.frequencies_mhz, sample_time
+            )
+            for channels in self.subbands:
+                self.channel_delays[:, channels] -= self.channel_delays[
+                    :, channels
+                ].min(axis=1, keepdims=True)
+            self.subband_delays = delay_table(
+                self.dms, subband_frequencies, sample_time
+            )
+            self.max_delay = int(self.channel_delays.max() + self.subband_delays.max())
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """Gives the (dm, time) series for every sample completed by `chunk`."""
+        with self.stats.stage("dedisperse", nbytes=np.asarray(chunk).nbytes):
+            return self._process(chunk)
+
+    def _process(self, chunk: np.ndarray) -> np.ndarray:
+        data = upcast(chunk).T
+        if self.history is not None:
+            data = np.concatenate([self.history, data], axis=1)
+        else:
+            data = np.ascontiguousarray(data)
+
+        n_samples = max(data.shape[1] - self.max_delay, 0)
+        self.history = data[:, n_samples:].copy()
+
+        if not n_samples:
+            return np.empty((len(self.dms), 0), dtype=data.dtype)
+        if self.n_subbands is None:
+            return _shift_sum(data, self.delays, n_samples)
+
+        # (group, subband, time), with every nominal DM of a subband done at once.
+        n_subband_samples = n_samples + int(self.subband_delays.max())
+        subbands = np.stack(
+            [
+                _shift_sum(
+                    data[channels], self.channel_delays[:, channels], n_subband_samples
+                )
+                for channels in self.subbands
+            ],
+            axis=1,
+        )
+        out = np.empty((len(self.dms), n_samples), dtype=data.dtype)
+        for group, group_subbands in zip(self.dm_groups, subbands):
+            out[group] = _shift_sum(
+                group_subbands, self.subband_delays[group], n_samples
+            )
+        return out
@@ -0,0 +1,170 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from loguru import logger
+
+STORE_FORMATS = ("hdf5", "zarr")
+SUFFIXES = {".h5": "hdf5", ".hdf5": "hdf5", ".hdf": "hdf5", ".zarr": "zarr"}
+
+DEFAULT_CHUNK_FRAMES = 64
+DEFAULT_BLOCK_FRAMES = 1024
+DEFAULT_WRITE_WORKERS = 4
+
+
+def store_format_for(path: str) -> str:
+    """Works out the store format from the suffix of `path`."""
+    suffix = os.path.splitext(os.fspath(path).rstrip("/"))[1].lower()
+    if suffix not in SUFFIXES:
+        raise ValueError(
+            f"Cannot tell the format of {path} from its suffix, give one of "
+            f"{STORE_FORMATS}."
+        )
+    return SUFFIXES[suffix]
+
+
+def _open_store(path: str, store_format: str):
+    if store_format == "hdf5":
+        try:
+            import h5py
+        except ImportError as e:
+            raise ImportError("Exporting to HDF5 needs h5py installed.") from e
+        return h5py.File(path, "w")
+
+    if store_format == "zarr":
+        try:
+            import zarr
+        except ImportError as e:
+            raise ImportError("Exporting to Zarr needs zarr installed.") from e
+        return zarr.open_group(path, mode="w")
+
+    raise ValueError(f"store_format must be one of {STORE_FORMATS}.")
+
+
+def _create_array(store, store_format: str, name: str, compression, **kwargs):
+    if store_format == "hdf5":
+        return store.create_dataset(name, compression=compression, **kwargs)
+    compressors = "auto" if compression else None
+    return store.create_array(name, compressors=compressors, **kwargs)
+
+
+def _write(array, key, values):
+    array[key] = values
+
+
+def header_attributes(codif) -> dict:
+    """Metadata of a CODIF file, as plain values to store as attributes."""
+    header = codif.index.header
+    attributes = {
+        name: header[name].tolist()
+        for name in header.dtype.names
+        if name not in ("data_frame_number", "thread_id", "group_id", "station_id")
+    }
+    attributes.update(
+        {
+            "filenames": [os.fspath(f) for f in codif.filenames],
+            "epoch": codif.clock.epoch.isoformat(),
+            "sample_period": codif.clock.sample_period,
+            "first_data_frame_number": int(codif.index.frame_numbers[0]),
+            "stations": codif.index.stations.tolist(),
+            "groups": codif.index.groups.tolist(),
+            "threads": codif.index.threads.tolist(),
+        }
+    )
+    return attributes
+
+
+def export(
+    codif,
+    path: str,
+    store_format: str | None = None,
+    chunk_frames: int = DEFAULT_CHUNK_FRAMES,
+    compression: str | None = None,
+    block_frames: int = DEFAULT_BLOCK_FRAMES,
+    write_workers: int = DEFAULT_WRITE_WORKERS,
+):
+    """Writes the data of a CODIF file into a chunked HDF5 or Zarr store.
+
+    `codif` is best opened with lazy=True, as its data is read with iter_blocks
+    `block_frames` data frames at a time, with the next block decoded while the last
+    is written. Each stream of a block is its own run of chunks, so for Zarr the
+    streams are written by `write_workers` threads at once, compressing and writing
+    their chunks in parallel. h5py allows only one thread into HDF5 at a time, so
+    HDF5 stores are written by a single thread. The store holds:
+
+    - `data`, the (station, group, thread, channel, sample) cube, in chunks of one
+      stream and `chunk_frames` data frames;
+    - `timestamps`, the time of each sample in seconds since the `epoch` attribute;
+    - `valid`, which (station, group, thread, data frame) slots hold good data;
+
+    with the header fields and stream ids as attributes. `compression` is passed to
+    h5py (such as "gzip" or "lzf"), and for Zarr turns on its default compressor.
+    """
+    if store_format is None:
+        store_format = store_format_for(path)
+
+    index = codif.index
+    cube_shape = index.positions.shape[:3] + (
+        int(index.header["channels"]),
+        len(codif.clock),
+    )
+    samples_per_frame = codif.clock.samples_per_frame
+    dtype = codif.data.dtype
+    chunk_samples = min(chunk_frames * samples_per_frame, max(cube_shape[-1], 1))
+
+    store = _open_store(path, store_format)
+    try:
+        data = _create_array(
+            store,
+            store_format,
+            "data",
+            compression,
+            shape=cube_shape,
+            dtype=dtype,
+            chunks=(1, 1, 1, cube_shape[3], chunk_samples),
+        )
+        timestamps = _create_array(
+            store,
+            store_format,
+            "timestamps",
+            compression,
+            shape=(cube_shape[-1],),
+            dtype=np.float64,
+            chunks=(chunk_samples,),
+        )
+        _create_array(
+            store, store_format, "valid", compression, data=np.asarray(index.valid)
+        )
+        store.attrs.update(header_attributes(codif))
+
+        logger.info(f"Exporting {cube_shape} cube to {path}...")
+        blocks = codif.iter_blocks(block_frames)
+        streams = list(np.ndindex(cube_shape[:3]))
+        writers = 1 if store_format == "hdf5" else write_workers
+        with (
+            ThreadPoolExecutor(max_workers=1) as reader,
+            ThreadPoolExecutor(max_workers=writers) as writer,
+        ):
+            pending = reader.submit(next, blocks, None)
+            while (block := pending.result()) is not None:
+                pending = reader.submit(next, blocks, None)
+                samples = slice(
+                    block.start_sample, block.start_sample + len(block.timestamps)
+                )
+                cube = block.data.reshape(cube_shape[:4] + (-1,))
+                # Blocks can share a chunk at their edges, so each block is written
+                # in full before the next.
+                writes = [
+                    writer.submit(
+                        _write, data, stream + (slice(None), samples), cube[stream]
+                    )
+                    for stream in streams
+                ]
+                for write in writes:
+                    write.result()
+                timestamps[samples] = block.timestamps
+    finally:
+        if store_format == "hdf5":
+            store.close()
+
+    logger.info(f"Finished exporting to {path}.")
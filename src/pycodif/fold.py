@@ -0,0 +1,126 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from pycodif.decoding import upcast
+from pycodif.instrumentation import NULL_STATS, Stats
+
+
+class Ephemeris(NamedTuple):
+    """The spin of a pulsar: its period and period derivative at `epoch`.
+
+    Times are in seconds, on the same timescale as the timestamps being folded, such
+    as CODIF.timestamps.
+    """
+
+    period: float
+    period_derivative: float = 0.0
+    epoch: float = 0.0
+
+    def phase(self, times) -> np.ndarray:
+        """Gives the number of turns since `epoch` at each time, from the Taylor
+        series of the spin frequency."""
+        frequency = 1 / self.period
+        frequency_derivative = -self.period_derivative / self.period**2
+        dt = np.asarray(times, dtype=np.float64) - self.epoch
+        return dt * (frequency + 0.5 * frequency_derivative * dt)
+
+
+class Folder:
+    """Folds data into phase bins as it arrives, such as each block or spectrum from
+    CODIF.iter_blocks or channelize.
+
+    Data is (time, ...) shaped, so each sample is a single value or a spectrum of
+    channels. Each is added to the bin its phase falls in, and `profile` gives the
+    mean of each (bin, ...) so far. Each call to add is recorded as the "fold"
+    stage of `stats`.
+    """
+
+    def __init__(self, n_bins: int, ephemeris: Ephemeris, stats: Stats = NULL_STATS):
+        self.n_bins = n_bins
+        self.ephemeris = ephemeris
+        self.stats = stats
+        self.sums = None
+        self.counts = np.zeros(n_bins, dtype=np.float64)
+        # Weight of each (bin, ...) value, only kept once weights are given per value.
+        self.value_counts = None
+
+    def bins(self, times) -> np.ndarray:
+        """Gives the phase bin of each time."""
+        phase = self.ephemeris.phase(times)
+        bins = ((phase - np.floor(phase)) * self.n_bins).astype(np.int64)
+        # Rounding can put a phase just below a whole turn into bin n_bins.
+        return np.minimum(bins, self.n_bins - 1)
+
+    def add(self, data: np.ndarray, times, weights=None):
+        """Adds (time, ...) `data` taken at `times`.
+
+        `weights` scales each time sample, for instance to leave out samples from
+        missing frames with a weight of zero. It can also be (time, ...) like `data`
+        to weight each value, such as to leave out channels flagged by RFIFlagger.
+        `counts` then gets the mean weight of each time sample.
+        """
+        with self.stats.stage("fold", nbytes=np.asarray(data).nbytes):
+            self._add(data, times, weights)
+
+    def _add(self, data: np.ndarray, times, weights=None):
+        data = upcast(data)
+        bins = self.bins(times)
+        if len(bins) != len(data):
+            raise ValueError("There must be a time for every sample of data.")
+        if weights is None:
+            weights = np.ones(len(data))
+        weights = np.asarray(weights, dtype=np.float64)
+
+        values = data.reshape(len(data), -1)
+        n_values = values.shape[1]
+        if weights.ndim == 1:
+            value_weights = None
+            time_weights = weights
+            values = values * weights[:, np.newaxis]
+        else:
+            value_weights = np.broadcast_to(weights, data.shape).reshape(len(data), -1)
+            time_weights = value_weights.mean(axis=1)
+            values = values * value_weights
+
+        if self.sums is None:
+            self.sums = np.zeros((self.n_bins,) + data.shape[1:], dtype=np.float64)
+        if value_weights is not None and self.value_counts is None:
+            self.value_counts = np.broadcast_to(
+                self.counts.reshape((-1,) + (1,) * (self.sums.ndim - 1)),
+                self.sums.shape,
+            ).copy()
+
+        cells = (bins[:, np.newaxis] * n_values + np.arange(n_values)).ravel()
+        self.sums += np.bincount(
+            cells, weights=values.ravel(), minlength=self.n_bins * n_values
+        ).reshape(self.sums.shape)
+        self.counts += np.bincount(bins, weights=time_weights, minlength=self.n_bins)
+        if self.value_counts is not None:
+            if value_weights is None:
+                value_weights = np.broadcast_to(
+                    time_weights[:, np.newaxis], values.shape
+                )
+            self.value_counts += np.bincount(
+                cells, weights=value_weights.ravel(), minlength=self.n_bins * n_values
+            ).reshape(self.sums.shape)
+
+    @property
+    def profile(self) -> np.ndarray:
+        """Mean of the data in each phase bin, or zero for bins with no data."""
+        if self.sums is None:
+            return np.zeros(self.n_bins)
+        if self.value_counts is not None:
+            counts = self.value_counts
+        else:
+            counts = self.counts.reshape((-1,) + (1,) * (self.sums.ndim - 1))
+        return np.divide(
+            self.sums, counts, out=np.zeros_like(self.sums), where=counts > 0
+        )
+
+
+def fold(data: np.ndarray, times, n_bins: int, ephemeris: Ephemeris) -> np.ndarray:
+    """Folds (time, ...) data taken at `times` into an (n_bins, ...) profile."""
+    folder = Folder(n_bins, ephemeris)
+    folder.add(data, times)
+    return folder.profile
@@ -0,0 +1,402 @@
+import hashlib
+import os
+
+import numpy as np
+from loguru import logger
+
+from pycodif.bulk import MappedCODIF, decode_headers
+from pycodif.constants import CODIF_SYNC_SEQUENCE
+from pycodif.decoding import PayloadFormat
+
+INDEX_VERSION = 2
+
+# What is kept about each frame to find it again without reading the file.
+INDEX_DTYPE = np.dtype(
+    [
+        ("offset", np.int64),
+        ("data_frame_number", np.int64),
+        ("epoch_offset", np.int64),
+        ("thread_id", np.uint16),
+        ("group_id", np.uint16),
+        ("secondary_id", np.uint16),
+        ("station_id", "U2"),
+        ("invalid", np.uint8),
+        ("sync_error", np.uint8),
+        ("frame_time_offset", np.float64),
+    ]
+)
+
+
+# Header fields which must match for frames to be combined into one data cube.
+FORMAT_FIELDS = (
+    "reference_epoch",
+    "sample_size",
+    "sample_representation",
+    "complex",
+    "channels",
+    "sample_block_length",
+    "data_array_length",
+    "alignment_period",
+    "sample_periods_per_alignment_period",
+)
+
+
+# Frames further than this many data frames from the rest of the file are taken to
+# have corrupt data frame numbers.
+MAX_FRAME_GAP = 1 << 16
+
+
+def index_path(filename: str) -> str:
+    """Gives the path of the sidecar index for a CODIF file."""
+    return f"{os.fspath(filename)}.idx"
+
+
+def header_fingerprint(mapped: MappedCODIF, n_frames: int) -> str:
+    """Hashes the first and last of the first `n_frames` headers of a file.
+
+    If these still match, the file has at most been appended to since they were
+    indexed.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(mapped.raw_headers[0].tobytes())
+    digest.update(mapped.raw_headers[n_frames - 1].tobytes())
+    return digest.hexdigest()
+
+
+def frame_sequence(entries: np.ndarray, header: np.void) -> np.ndarray:
+    """Numbers frames consecutively across alignment periods.
+
+    Data frame numbers restart at the start of every alignment period, so they are
+    counted on from the alignment period of `header` instead. For frames in the same
+    period as `header`, this is just the data frame number.
+    """
+    sequence = entries["data_frame_number"].astype(np.int64)
+    periods = entries["epoch_offset"].astype(np.int64) - int(header["epoch_offset"])
+    if periods.any():
+        samples_per_frame = PayloadFormat.from_header(header).samples_per_frame
+        frames_per_period = (
+            int(header["sample_periods_per_alignment_period"]) // samples_per_frame
+        )
+        sequence += periods // int(header["alignment_period"]) * frames_per_period
+    return sequence
+
+
+def longest_run(sequence: np.ndarray, max_gap: int) -> np.ndarray:
+    """Marks the values of `sequence` in its largest run, where no two neighbouring
+    values in sorted order are more than `max_gap` apart."""
+    if not len(sequence):
+        return np.zeros(0, dtype=bool)
+    ordered = np.sort(sequence)
+    bounds = np.concatenate(
+        [[0], np.flatnonzero(np.diff(ordered) > max_gap) + 1, [len(ordered)]]
+    )
+    largest = np.argmax(np.diff(bounds))
+    low, high = ordered[bounds[largest]], ordered[bounds[largest + 1] - 1]
+    return (sequence >= low) & (sequence <= high)
+
+
+class FrameIndex:
+    """Where every frame of a CODIF file is and which stream it belongs to.
+
+    Frames are keyed by the same (data_frame_number, thread_id, group_id,
+    secondary_id, station_id) tuple used for CODIF.frames. `positions` holds the
+    frame number for each (station, group, thread, data frame) cell, or -1 where the
+    file has no usable frame, with each axis ordered like `stations`, `groups`,
+    `threads` and `frame_numbers`.
+
+    `frame_numbers` covers every data frame from the first to the last in the file,
+    counted on from the alignment period of the first header, so that each frame is
+    placed by its data frame number rather than by its order in the file. `valid` is
+    True for each cell holding a good frame, and `invalid` for cells whose only
+    frames were flagged invalid. Cells which are neither were never received.
+    Frames more than MAX_FRAME_GAP data frames from the rest of the file are left
+    out as corrupt, and counted in `out_of_sequence`.
+
+    The raw bytes of the first header are kept in `template`, and `header` is its
+    decoded form, giving the format of every frame in the file.
+
+    An index can also cover several files, with the frames of each following on from
+    the last. `file_starts` gives the position of the first frame of each file.
+    """
+
+    def __init__(
+        self,
+        entries: np.ndarray,
+        template: np.ndarray,
+        frame_size: int,
+        file_size: int | None = None,
+        mtime_ns: int | None = None,
+        fingerprint: str = "",
+        file_starts: np.ndarray | None = None,
+    ):
+        self.entries = entries
+        self.template = template
+        self.header = decode_headers(template)[0]
+        self.frame_size = frame_size
+        self.file_size = file_size
+        self.mtime_ns = mtime_ns
+        self.fingerprint = fingerprint
+        self.file_starts = (
+            np.zeros(1, dtype=np.int64) if file_starts is None else file_starts
+        )
+        self._key_positions = None
+
+        self.stations, station_index = np.unique(
+            entries["station_id"], return_inverse=True
+        )
+        self.groups, group_index = np.unique(entries["group_id"], return_inverse=True)
+        self.threads, thread_index = np.unique(
+            entries["thread_id"], return_inverse=True
+        )
+
+        # Every data frame between the first and last gets a slot, so streams stay
+        # aligned in time even where frames were dropped. Frames with a bad sync
+        # sequence have untrustworthy headers and are left out altogether.
+        sequence = frame_sequence(entries, self.header)
+        readable = entries["sync_error"] == 0
+        # One corrupt data frame number would otherwise stretch frame_numbers over
+        # the whole gap to it.
+        in_sequence = longest_run(sequence[readable], MAX_FRAME_GAP)
+        self.out_of_sequence = int((~in_sequence).sum())
+        if self.out_of_sequence:
+            logger.warning(
+                f"Ignoring {self.out_of_sequence} frames far out of sequence."
+            )
+        readable[np.flatnonzero(readable)[~in_sequence]] = False
+        if readable.any():
+            first, last = sequence[readable].min(), sequence[readable].max()
+        else:
+            first, last = 0, -1
+        self.frame_numbers = np.arange(first, last + 1, dtype=np.int64)
+
+        shape = (
+            len(self.stations),
+            len(self.groups),
+            len(self.threads),
+            len(self.frame_numbers),
+        )
+        cells = np.ravel_multi_index(
+            (
+                station_index[readable],
+                group_index[readable],
+                thread_index[readable],
+                sequence[readable] - first,
+            ),
+            shape,
+        )
+        cell_positions = np.flatnonzero(readable)
+
+        # Frames flagged invalid are kept out of the data but still fill their slot,
+        # and only the first copy of a duplicated frame is used.
+        usable = entries["invalid"][readable] == 0
+        unique_cells, first_copies = np.unique(cells[usable], return_index=True)
+        self.duplicates = int(usable.sum()) - len(unique_cells)
+        if self.duplicates:
+            logger.warning(f"Ignoring {self.duplicates} duplicated frames.")
+
+        self.positions = np.full(shape, -1, dtype=np.int64)
+        self.positions.flat[unique_cells] = cell_positions[usable][first_copies]
+
+        self.valid = self.positions >= 0
+        self.invalid = np.zeros(shape, dtype=bool)
+        self.invalid.flat[cells[~usable]] = True
+        self.invalid &= ~self.valid
+        if self.invalid.any():
+            logger.warning(f"{int(self.invalid.sum())} frames are flagged invalid.")
+
+    @staticmethod
+    def entries_from_mapped(mapped: MappedCODIF, start: int = 0) -> np.ndarray:
+        """Builds index entries for every frame from `start` onwards."""
+        headers = mapped.read_headers(start)
+        entries = np.empty(len(headers), dtype=INDEX_DTYPE)
+        entries["offset"] = (
+            np.arange(start, start + len(headers), dtype=np.int64) * mapped.frame_size
+        )
+        for name in (
+            "data_frame_number",
+            "epoch_offset",
+            "thread_id",
+            "group_id",
+            "secondary_id",
+            "station_id",
+            "invalid",
+        ):
+            entries[name] = headers[name]
+        entries["sync_error"] = headers["synchronisation_sequence"] != (
+            CODIF_SYNC_SEQUENCE
+        )
+        samples_per_frame = PayloadFormat.from_header(
+            mapped.first_header
+        ).samples_per_frame
+        entries["frame_time_offset"] = (
+            headers["data_frame_number"]
+            * samples_per_frame
+            * headers["alignment_period"]
+            / headers["sample_periods_per_alignment_period"]
+        )
+        return entries
+
+    @classmethod
+    def from_mapped(cls, mapped: MappedCODIF) -> "FrameIndex":
+        """Indexes a mapped file by decoding all of its headers."""
+        return cls(
+            cls.entries_from_mapped(mapped),
+            np.frombuffer(mapped.raw_headers[0].tobytes(), dtype=np.uint8),
+            mapped.frame_size,
+            mapped.file_size,
+            os.stat(mapped.filename).st_mtime_ns,
+            header_fingerprint(mapped, mapped.n_frames),
+        )
+
+    @classmethod
+    def concatenate(cls, indexes: list) -> "FrameIndex":
+        """Combines the indexes of several files into one.
+
+        Frames from all of the files share one set of stations, groups, threads and
+        data frame numbers, so streams recorded to different files line up in time.
+        Every file must have the same frame format.
+        """
+        first = indexes[0]
+        for index in indexes[1:]:
+            for name in FORMAT_FIELDS:
+                if index.header[name] != first.header[name]:
+                    raise ValueError(
+                        f"Cannot combine files with different {name}: "
+                        f"{first.header[name]} and {index.header[name]}."
+                    )
+
+        lengths = [len(index) for index in indexes]
+        return cls(
+            np.concatenate([index.entries for index in indexes]),
+            first.template,
+            first.frame_size,
+            file_starts=np.cumsum([0] + lengths[:-1]).astype(np.int64),
+        )
+
+    def locate(self, positions):
+        """Splits positions in the index into (file number, position in file)."""
+        file_numbers = np.searchsorted(self.file_starts, positions, side="right") - 1
+        return file_numbers, positions - self.file_starts[file_numbers]
+
+    def extend(self, mapped: MappedCODIF) -> "FrameIndex":
+        """Indexes the frames appended to a file since this index was built."""
+        entries = np.concatenate(
+            [self.entries, self.entries_from_mapped(mapped, len(self.entries))]
+        )
+        return FrameIndex(
+            entries,
+            self.template,
+            self.frame_size,
+            mapped.file_size,
+            os.stat(mapped.filename).st_mtime_ns,
+            header_fingerprint(mapped, mapped.n_frames),
+        )
+
+    def save(self, path: str):
+        """Writes the index to `path`, replacing any existing file atomically."""
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.savez(
+                f,
+                version=INDEX_VERSION,
+                entries=self.entries,
+                template=self.template,
+                frame_size=self.frame_size,
+                file_size=self.file_size,
+                mtime_ns=self.mtime_ns,
+                fingerprint=self.fingerprint,
+            )
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FrameIndex":
+        with np.load(path, allow_pickle=False) as saved:
+            if int(saved["version"]) != INDEX_VERSION:
+                raise ValueError(f"{path} is from a different version of pycodif.")
+            return cls(
+                saved["entries"],
+                saved["template"],
+                int(saved["frame_size"]),
+                int(saved["file_size"]),
+                int(saved["mtime_ns"]),
+                str(saved["fingerprint"]),
+            )
+
+    @classmethod
+    def open(cls, mapped: MappedCODIF, cache: bool = True) -> "FrameIndex":
+        """Gives the index of a mapped file, using its sidecar index where possible.
+
+        The sidecar is reused if the file size, modification time and header
+        fingerprint all still match. If the file has grown and its first frames are
+        unchanged, only the new frames are indexed and added to it. Otherwise, such
+        as when the file is modified without growing, the index is rebuilt.
+        """
+        if not cache:
+            return cls.from_mapped(mapped)
+
+        path = index_path(mapped.filename)
+        index = None
+        if os.path.exists(path):
+            try:
+                index = cls.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable index {path}: {e}")
+
+        if index is not None:
+            n_indexed = len(index.entries)
+            if (
+                index.frame_size != mapped.frame_size
+                or not 0 < n_indexed <= mapped.n_frames
+                or header_fingerprint(mapped, n_indexed) != index.fingerprint
+            ):
+                logger.info(f"{mapped.filename} has changed, rebuilding its index.")
+                index = None
+            elif index.file_size >= mapped.file_size:
+                if index.mtime_ns == os.stat(mapped.filename).st_mtime_ns:
+                    return index
+                # Rewritten in place, which the fingerprint of the first and last
+                # headers may not show.
+                logger.info(f"{mapped.filename} was modified, rebuilding its index.")
+                index = None
+            else:
+                logger.info(
+                    f"Indexing {mapped.n_frames - n_indexed} frames appended to "
+                    f"{mapped.filename}."
+                )
+                index = index.extend(mapped)
+
+        if index is None:
+            index = cls.from_mapped(mapped)
+
+        try:
+            index.save(path)
+        except OSError as e:
+            logger.warning(f"Could not save index to {path}: {e}")
+
+        return index
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def keys(self):
+        return zip(
+            self.entries["data_frame_number"].tolist(),
+            self.entries["thread_id"].tolist(),
+            self.entries["group_id"].tolist(),
+            self.entries["secondary_id"].tolist(),
+            self.entries["station_id"].tolist(),
+        )
+
+    @property
+    def key_positions(self) -> dict:
+        """Position of each frame in the file by key, built on first use."""
+        if self._key_positions is None:
+            # The first copy of a duplicated key wins, as it does in `positions`.
+            self._key_positions = {}
+            for i, key in enumerate(self.keys()):
+                self._key_positions.setdefault(key, i)
+        return self._key_positions
+
+    def lookup(self, key: tuple) -> int:
+        """Gives the position of the frame with the given key in the file."""
+        return self.key_positions[key]
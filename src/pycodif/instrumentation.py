@@ -0,0 +1,186 @@
+import contextlib
+import json
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_memory_bytes() -> int | None:
+    """The peak resident memory of this process so far, where it can be found."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StageStats:
+    """Totals for one stage of the work, such as reading or decoding frames."""
+
+    __slots__ = ("calls", "wall_seconds", "cpu_seconds", "frames", "bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.frames = 0
+        self.bytes = 0
+
+    def as_dict(self) -> dict:
+        stage = {name: getattr(self, name) for name in self.__slots__}
+        if self.wall_seconds > 0:
+            stage["frames_per_second"] = self.frames / self.wall_seconds
+            stage["megabytes_per_second"] = self.bytes / self.wall_seconds / 1e6
+        return stage
+
+
+class StageCall:
+    """The frames and bytes handled by one call of a stage, which can be added to
+    while it runs."""
+
+    __slots__ = ("frames", "bytes")
+
+    def __init__(self, frames: int = 0, nbytes: int = 0):
+        self.frames = frames
+        self.bytes = nbytes
+
+    def add(self, frames: int = 0, nbytes: int = 0):
+        self.frames += frames
+        self.bytes += nbytes
+
+
+class Stats:
+    """Timers and counters for each stage of reading and processing CODIF data.
+
+    Pass one to CODIF, or to a DSP stage such as Channelizer, to have it record how
+    long each stage takes, in wall and CPU time, and how many frames and bytes it
+    handles. The depths of queues, such as the read-ahead queue, are kept as their
+    latest and largest values.
+
+    Stages can nest, such as "decode" within "assembly", so the times of different
+    stages are not meant to be added up. Stages can be recorded from any thread.
+    Read the results with as_dict, to_json or to_prometheus.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}
+        self.queues = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, frames: int = 0, nbytes: int = 0):
+        """Times the body of a `with` block as one call of stage `name`, which
+        handles `frames` frames and `nbytes` bytes.
+
+        The block is given a StageCall, to add frames and bytes found as it runs. CPU
+        time is that of the calling thread, so work handed off to other processes is
+        not counted.
+        """
+        call = StageCall(frames, nbytes)
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield call
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.thread_time() - cpu
+            with self._lock:
+                stage = self.stages.get(name)
+                if stage is None:
+                    stage = self.stages[name] = StageStats()
+                stage.calls += 1
+                stage.wall_seconds += wall
+                stage.cpu_seconds += cpu
+                stage.frames += call.frames
+                stage.bytes += call.bytes
+
+    def queue_depth(self, name: str, depth: int):
+        """Records the current depth of queue `name`."""
+        with self._lock:
+            _, peak = self.queues.get(name, (depth, depth))
+            self.queues[name] = (depth, max(peak, depth))
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "stages": {
+                    name: stage.as_dict() for name, stage in self.stages.items()
+                },
+                "queues": {
+                    name: {"depth": depth, "max_depth": peak}
+                    for name, (depth, peak) in self.queues.items()
+                },
+                "peak_memory_bytes": peak_memory_bytes(),
+            }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def to_prometheus(self, prefix: str = "pycodif") -> str:
+        """The stats in the Prometheus text exposition format."""
+        stats = self.as_dict()
+        lines = []
+
+        def metric(name, kind, samples):
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        for field in StageStats.__slots__:
+            metric(
+                f"stage_{field}_total",
+                "counter",
+                [
+                    (f'{{stage="{name}"}}', stage[field])
+                    for name, stage in stats["stages"].items()
+                ],
+            )
+        for field in ("depth", "max_depth"):
+            metric(
+                f"queue_{field}",
+                "gauge",
+                [
+                    (f'{{queue="{name}"}}', queue[field])
+                    for name, queue in stats["queues"].items()
+                ],
+            )
+        if stats["peak_memory_bytes"] is not None:
+            metric("peak_memory_bytes", "gauge", [("", stats["peak_memory_bytes"])])
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Writes the stats to `path`, as Prometheus text if it ends in .prom and as
+        JSON otherwise."""
+        text = self.to_prometheus() if str(path).endswith(".prom") else self.to_json()
+        with open(path, "w") as f:
+            f.write(text)
+
+
+class _NullCall(StageCall):
+    def add(self, frames: int = 0, nbytes: int = 0):
+        pass
+
+
+_NULL_CONTEXT = contextlib.nullcontext(_NullCall())
+
+
+class NullStats(Stats):
+    """Stats which record nothing, used when instrumentation is turned off."""
+
+    enabled = False
+
+    def stage(self, name: str, frames: int = 0, nbytes: int = 0):
+        return _NULL_CONTEXT
+
+    def queue_depth(self, name: str, depth: int):
+        pass
+
+
+NULL_STATS = NullStats()
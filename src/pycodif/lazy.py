@@ -0,0 +1,294 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from pycodif.assembly import assemble_frames
+from pycodif.decoding import PayloadFormat
+from pycodif.index import FrameIndex
+from pycodif.instrumentation import NULL_STATS, Stats
+from pycodif.parallel import assemble_parallel
+from pycodif.readahead import ReadAheadOptions, assemble_frames_readahead
+
+
+def _expand_key(key, shape: tuple) -> list:
+    """Turns an index into one (indices, is_scalar) pair per axis of `shape`."""
+    if not isinstance(key, tuple):
+        key = (key,)
+
+    if any(k is None for k in key):
+        raise IndexError("CODIFArray does not support adding axes with None.")
+
+    ellipses = [i for i, k in enumerate(key) if k is Ellipsis]
+    if len(ellipses) > 1:
+        raise IndexError("An index can only have a single ellipsis ('...').")
+    if ellipses:
+        i = ellipses[0]
+        key = key[:i] + (slice(None),) * (len(shape) - len(key) + 1) + key[i + 1 :]
+
+    if len(key) > len(shape):
+        raise IndexError(
+            f"Too many indices: array is {len(shape)}-dimensional, "
+            f"but {len(key)} were indexed."
+        )
+    key = key + (slice(None),) * (len(shape) - len(key))
+
+    selections = []
+    for axis, (k, n) in enumerate(zip(key, shape)):
+        if isinstance(k, (int, np.integer)):
+            if not -n <= k < n:
+                raise IndexError(
+                    f"Index {k} is out of bounds for axis {axis} with size {n}."
+                )
+            selections.append((np.array([k % n]), True))
+        elif isinstance(k, slice):
+            selections.append((np.arange(*k.indices(n)), False))
+        else:
+            k = np.asarray(k)
+            if k.ndim != 1:
+                raise IndexError("Index arrays must be one-dimensional.")
+            if k.dtype == bool:
+                if len(k) != n:
+                    raise IndexError(
+                        f"Boolean index of length {len(k)} does not match axis "
+                        f"{axis} with size {n}."
+                    )
+                k = np.flatnonzero(k)
+            elif len(k) and ((k < -n).any() or (k >= n).any()):
+                raise IndexError(f"Index out of bounds for axis {axis} with size {n}.")
+            selections.append((np.where(k < 0, k + n, k).astype(np.int64), False))
+
+    return selections
+
+
+class CODIFArray:
+    """A lazily decoded stand-in for the CODIF data cube.
+
+    Has the same (station, group, thread, channel, sample) shape as CODIF.data, or
+    (row, sample) with flatten_groups. Indexing it only reads and converts the frames
+    which cover the selection, found through the frame index. Each axis takes an int,
+    slice or one-dimensional array of ints or bools, and arrays select along their
+    own axis independently of each other (like h5py), rather than being broadcast
+    together as NumPy does.
+
+    Frames which are missing or flagged invalid are filled with `fill_value`, such as
+    0 or NaN, and `valid` marks which (station, group, thread, data frame) slots hold
+    good data.
+
+    `files` are the MappedCODIF files covered by `index`. Frames from different
+    files are decoded concurrently, and with more than one `workers`, frames are
+    decoded by a pool of processes. The pool is `pool` if given, such as one shared
+    by several arrays, or else one started for this array and shut down by close.
+    Otherwise, with `readahead`, frames are read by a background thread ahead of
+    being decoded, rather than through the memory map. With `native`, samples keep
+    their stored width (see PayloadFormat.native_dtype), so `fill_value` must then
+    be an integer for integer samples.
+
+    Reads are recorded as the "assembly" stage of `stats`. Within it, frames are
+    timed in the "gather", "decode" and "scatter" stages of assemble_frames, or with
+    `readahead` also in the "read" stage of the background thread. Frames decoded by
+    `workers` in other processes are only timed as a whole.
+    """
+
+    def __init__(
+        self,
+        files: list,
+        index: FrameIndex,
+        flatten_groups: bool = False,
+        workers: int = 1,
+        fill_value: float = 0.0,
+        readahead: ReadAheadOptions | None = None,
+        stats: Stats = NULL_STATS,
+        native: bool = False,
+        pool: ProcessPoolExecutor | None = None,
+    ):
+        self.files = files
+        self.index = index
+        self.flatten_groups = flatten_groups
+        self.workers = workers
+        self.fill_value = fill_value
+        self.readahead = readahead
+        self.stats = stats
+        self.owns_pool = pool is None and workers > 1
+        self.pool = ProcessPoolExecutor(max_workers=workers) if self.owns_pool else pool
+
+        self.payload_format = PayloadFormat.from_header(index.header)
+        if native:
+            self.dtype = self.payload_format.native_dtype
+            component = self.dtype.fields["re"][0] if self.dtype.names else self.dtype
+            if component.kind == "i" and not float(fill_value).is_integer():
+                raise ValueError(
+                    f"fill_value must be an integer for {self.dtype} samples, not "
+                    f"{fill_value}."
+                )
+        else:
+            self.dtype = self.payload_format.dtype
+        self.channels = self.payload_format.channels
+        self.samples_per_frame = self.payload_format.samples_per_frame
+
+        n_stations, n_groups, n_threads, n_frames = index.positions.shape
+        self.cube_shape = (
+            n_stations,
+            n_groups,
+            n_threads,
+            self.channels,
+            n_frames * self.samples_per_frame,
+        )
+
+    @property
+    def shape(self) -> tuple:
+        if self.flatten_groups:
+            return (int(np.prod(self.cube_shape[:4])), self.cube_shape[4])
+        return self.cube_shape
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.index.valid
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __repr__(self) -> str:
+        return f"CODIFArray(shape={self.shape}, dtype={self.dtype})"
+
+    def close(self):
+        """Shuts down the pool of processes started for this array, if any."""
+        if self.owns_pool:
+            self.pool.shutdown()
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[...]
+        return data if dtype is None else data.astype(dtype)
+
+    def __getitem__(self, key) -> np.ndarray:
+        selections = _expand_key(key, self.shape)
+        samples, samples_scalar = selections[-1]
+
+        if self.flatten_groups:
+            rows, rows_scalar = selections[0]
+            stations, groups, threads, channels = np.unravel_index(
+                rows, self.cube_shape[:4]
+            )
+        else:
+            stations, groups, threads, channels = (s for s, _ in selections[:4])
+
+        # Only decode the frames covering the selection, then pick from those.
+        frames = samples // self.samples_per_frame
+        unique_stations = np.unique(stations)
+        unique_groups = np.unique(groups)
+        unique_threads = np.unique(threads)
+        unique_frames = np.unique(frames)
+        cube = self.read_frames(
+            unique_stations, unique_groups, unique_threads, unique_frames
+        )
+
+        sample_positions = (
+            np.searchsorted(unique_frames, frames) * self.samples_per_frame
+            + samples % self.samples_per_frame
+        )
+        station_positions = np.searchsorted(unique_stations, stations)
+        group_positions = np.searchsorted(unique_groups, groups)
+        thread_positions = np.searchsorted(unique_threads, threads)
+
+        if self.flatten_groups:
+            data = cube[station_positions, group_positions, thread_positions, channels]
+            data = data[:, sample_positions]
+            scalar_axes = [rows_scalar, samples_scalar]
+        else:
+            data = cube[
+                np.ix_(
+                    station_positions,
+                    group_positions,
+                    thread_positions,
+                    channels,
+                    sample_positions,
+                )
+            ]
+            scalar_axes = [scalar for _, scalar in selections]
+
+        return data[tuple(0 if scalar else slice(None) for scalar in scalar_axes)]
+
+    def read_frames(
+        self,
+        stations: np.ndarray,
+        groups: np.ndarray,
+        threads: np.ndarray,
+        frames: np.ndarray,
+    ) -> np.ndarray:
+        """Decodes the given data frames of the given streams into a cube.
+
+        Arguments are positions along each axis of the frame index. The cube has
+        all channels and is `fill_value` wherever a stream has no valid frame.
+        """
+        positions = self.index.positions[np.ix_(stations, groups, threads, frames)]
+        shape = positions.shape[:3] + (
+            self.channels,
+            positions.shape[3] * self.samples_per_frame,
+        )
+        present = np.nonzero(positions >= 0)
+        n_frames = len(present[0])
+        with self.stats.stage("assembly", n_frames, n_frames * self.index.frame_size):
+            return self._assemble(positions[present], present, shape)
+
+    def _assemble(
+        self, positions: np.ndarray, present: tuple, shape: tuple
+    ) -> np.ndarray:
+        file_numbers, file_positions = self.index.locate(positions)
+
+        if self.workers > 1:
+            return assemble_parallel(
+                self.files,
+                self.payload_format,
+                file_numbers,
+                file_positions,
+                present,
+                shape,
+                self.workers,
+                self.fill_value,
+                self.dtype,
+                self.pool,
+            )
+
+        cube = np.full(shape, self.fill_value, dtype=self.dtype)
+
+        def assemble_file(file_number):
+            in_file = file_numbers == file_number
+            mapped = self.files[file_number]
+            if self.readahead is not None:
+                assemble_frames_readahead(
+                    mapped.filename,
+                    mapped.frame_size,
+                    self.payload_format,
+                    file_positions[in_file],
+                    tuple(d[in_file] for d in present),
+                    cube,
+                    self.readahead,
+                    self.stats,
+                )
+                return
+
+            assemble_frames(
+                mapped.payloads,
+                self.payload_format,
+                file_positions[in_file],
+                tuple(d[in_file] for d in present),
+                cube,
+                stats=self.stats,
+            )
+
+        if len(self.files) == 1:
+            assemble_file(0)
+        else:
+            # Frames from each file land in their own parts of the cube, and decoding
+            # mostly runs outside the GIL, so each file gets its own thread.
+            with ThreadPoolExecutor(max_workers=len(self.files)) as pool:
+                list(pool.map(assemble_file, range(len(self.files))))
+
+        return cube
@@ -0,0 +1,350 @@
+import socket
+import time
+from collections.abc import Iterator
+
+import numpy as np
+from loguru import logger
+
+from pycodif.assembly import assemble_frames
+from pycodif.bulk import RAW_HEADER_DTYPE, MappedCODIF, decode_headers
+from pycodif.constants import CODIF_HEADER_SIZE, CODIF_SYNC_SEQUENCE
+from pycodif.date_functions import calc_sample_times
+from pycodif.decoding import PayloadFormat
+from pycodif.index import frame_sequence
+from pycodif.parsing import CODIFBlock
+
+# Large enough for any UDP datagram.
+MAX_PACKET_SIZE = 65536
+
+# The receiver attribute holding the ids of each stream axis, and its header field.
+STREAM_FIELDS = (
+    ("stations", "station_id"),
+    ("groups", "group_id"),
+    ("threads", "thread_id"),
+)
+
+
+class CODIFReceiver:
+    """Receives CODIF frames sent as UDP packets and assembles them into blocks.
+
+    Packets are received in batches of up to `batch_packets` into a preallocated
+    buffer, then their headers are decoded together and their payloads decoded
+    straight into the block they belong to, placed by data frame number like
+    CODIF does. iter_blocks yields CODIFBlocks of `n_frames` data frames, as
+    CODIF.iter_blocks does for files.
+
+    Nothing is placed until `warmup_packets` packets have arrived, or the timeout
+    passes. The first data frame is the earliest of the warm-up packets that lie
+    within `max_blocks_ahead` blocks of most of the others, so packets arriving out
+    of order, or one with a corrupt data frame number, do not set it.
+
+    Unless `stations`, `groups` and `threads` are given, streams are added as their
+    first packet arrives, so a later block can have more streams than an earlier
+    one. Packets from streams not given, packets too late for a block that has
+    already been yielded, packets with bad headers, and packets more than
+    `max_blocks_ahead` blocks beyond the oldest block not yet yielded are dropped,
+    and counted in `dropped`.
+    """
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 0,
+        n_frames: int = 1024,
+        batch_packets: int = 256,
+        timeout: float = 1.0,
+        stations=None,
+        groups=None,
+        threads=None,
+        fill_value: float = 0.0,
+        receive_buffer_bytes: int | None = None,
+        max_blocks_ahead: int = 8,
+        warmup_packets: int = 64,
+    ):
+        self.n_frames = n_frames
+        self.max_blocks_ahead = max_blocks_ahead
+        self.warmup_packets = warmup_packets
+        self.batch_packets = batch_packets
+        self.fill_value = fill_value
+        self.stations = None if stations is None else np.sort(stations)
+        self.groups = None if groups is None else np.sort(groups)
+        self.threads = None if threads is None else np.sort(threads)
+        # Stream axes whose ids were given, and which so never grow.
+        self.fixed_streams = {
+            name for name, _ in STREAM_FIELDS if getattr(self, name) is not None
+        }
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if receive_buffer_bytes is not None:
+            self.socket.setsockopt(
+                socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer_bytes
+            )
+        self.socket.bind((host, port))
+        self.timeout = timeout
+        self.socket.settimeout(timeout)
+        self.address = self.socket.getsockname()
+
+        self.packet_size = None
+        self.packets = None
+        self.template = None
+        self.payload_format = None
+        self.first_sequence = None
+        self.next_block = 0
+        self.pending = {}
+        self.dropped = {"bad": 0, "late": 0, "unknown_stream": 0, "ahead": 0}
+
+    def _receive_first(self) -> int:
+        """Waits for the first whole CODIF frame, which sets the packet size.
+
+        Packets before it which are too short, lack the sync word or are not the
+        size their header gives are dropped as bad.
+        """
+        scratch = np.empty(MAX_PACKET_SIZE, dtype=np.uint8)
+        while True:
+            nbytes = self.socket.recv_into(scratch)
+            if nbytes >= CODIF_HEADER_SIZE:
+                header = decode_headers(scratch[:CODIF_HEADER_SIZE])[0]
+                packet_size = CODIF_HEADER_SIZE + 8 * int(header["data_array_length"])
+                if (
+                    header["synchronisation_sequence"] == CODIF_SYNC_SEQUENCE
+                    and nbytes == packet_size
+                ):
+                    break
+            self.dropped["bad"] += 1
+
+        self.packet_size = packet_size
+        self.packets = np.empty((self.batch_packets, self.packet_size), dtype=np.uint8)
+        self.packets[0] = scratch[: self.packet_size]
+        return 1
+
+    def _receive(self, n: int) -> bool:
+        """Receives a packet into row `n` of the buffer, returning whether it is a
+        whole frame."""
+        nbytes = self.socket.recv_into(self.packets[n])
+        if nbytes != self.packet_size:
+            self.dropped["bad"] += 1
+        return nbytes == self.packet_size
+
+    def receive_batch(self) -> np.ndarray:
+        """Receives whatever packets are waiting, up to `batch_packets`.
+
+        Waits up to the timeout for the first packet, raising TimeoutError if none
+        arrives. The packets are returned as a view over the receive buffer, which is
+        reused by the next call.
+        """
+        if self.packets is None:
+            n = self._receive_first()
+        else:
+            while not self._receive(0):
+                pass
+            n = 1
+
+        # Then take every packet already waiting, without blocking.
+        self.socket.setblocking(False)
+        try:
+            while n < self.batch_packets:
+                if self._receive(n):
+                    n += 1
+        except BlockingIOError:
+            pass
+        finally:
+            self.socket.settimeout(self.timeout)
+        return self.packets[:n]
+
+    def _start(self, headers: np.ndarray):
+        """Takes the first data frame from the largest run of `headers` whose data
+        frame numbers lie within `max_blocks_ahead` blocks of each other."""
+        sequence = frame_sequence(headers, headers[0])
+        window = self.max_blocks_ahead * self.n_frames
+        neighbours = (np.abs(sequence[:, np.newaxis] - sequence) <= window).sum(axis=1)
+        run = np.abs(sequence - sequence[np.argmax(neighbours)]) <= window
+        self.template = headers[np.flatnonzero(run)[np.argmin(sequence[run])]]
+        self.payload_format = PayloadFormat.from_header(self.template)
+        self.first_sequence = int(self.template["data_frame_number"])
+        for name, field in STREAM_FIELDS:
+            if name not in self.fixed_streams:
+                setattr(self, name, np.empty(0, dtype=headers[field].dtype))
+
+    def _add_streams(self, headers: np.ndarray):
+        """Adds the streams of `headers` not seen before, growing the blocks still
+        being filled to hold them."""
+        for name, field in STREAM_FIELDS:
+            if name in self.fixed_streams:
+                headers = headers[np.isin(headers[field], getattr(self, name))]
+        for axis, (name, field) in enumerate(STREAM_FIELDS):
+            if name in self.fixed_streams:
+                continue
+            ids = getattr(self, name)
+            new = np.setdiff1d(headers[field], ids)
+            if not len(new):
+                continue
+            positions = np.searchsorted(ids, new)
+            setattr(self, name, np.insert(ids, positions, new))
+            for block, (cube, valid) in self.pending.items():
+                self.pending[block] = (
+                    np.insert(cube, positions, self.fill_value, axis=axis),
+                    np.insert(valid, positions, False, axis=axis),
+                )
+
+    @staticmethod
+    def _find(values: np.ndarray, ids: np.ndarray):
+        """Positions of `values` in sorted `ids`, and which were found."""
+        positions = np.minimum(np.searchsorted(ids, values), len(ids) - 1)
+        return positions, ids[positions] == values
+
+    def _new_block(self) -> tuple:
+        shape = (
+            len(self.stations),
+            len(self.groups),
+            len(self.threads),
+            self.payload_format.channels,
+            self.n_frames * self.payload_format.samples_per_frame,
+        )
+        cube = np.full(shape, self.fill_value, dtype=self.payload_format.dtype)
+        return cube, np.zeros(shape[:3] + (self.n_frames,), dtype=bool)
+
+    def place(self, packets: np.ndarray):
+        """Decodes a batch of packets into the blocks they belong to."""
+        headers = decode_headers(
+            packets[:, :CODIF_HEADER_SIZE].view(RAW_HEADER_DTYPE)[:, 0]
+        )
+        good = (headers["synchronisation_sequence"] == CODIF_SYNC_SEQUENCE) & (
+            headers["invalid"] == 0
+        )
+        if self.template is None:
+            if not good.any():
+                self.dropped["bad"] += len(packets)
+                return
+            self._start(headers[good])
+        good &= headers["data_array_length"] == self.template["data_array_length"]
+        self.dropped["bad"] += int((~good).sum())
+        self._add_streams(headers[good])
+
+        stations, found_station = self._find(headers["station_id"], self.stations)
+        groups, found_group = self._find(headers["group_id"], self.groups)
+        threads, found_thread = self._find(headers["thread_id"], self.threads)
+        known = found_station & found_group & found_thread
+        self.dropped["unknown_stream"] += int((good & ~known).sum())
+
+        sequence = frame_sequence(headers, self.template) - self.first_sequence
+        blocks = sequence // self.n_frames
+        late = blocks < self.next_block
+        self.dropped["late"] += int((good & known & late).sum())
+        ahead = blocks > self.next_block + self.max_blocks_ahead
+        self.dropped["ahead"] += int((good & known & ahead).sum())
+
+        keep = good & known & ~late & ~ahead
+        for block in np.unique(blocks[keep]):
+            if block not in self.pending:
+                self.pending[block] = self._new_block()
+            cube, valid = self.pending[block]
+
+            in_block = np.flatnonzero(keep & (blocks == block))
+            destinations = (
+                stations[in_block],
+                groups[in_block],
+                threads[in_block],
+                sequence[in_block] % self.n_frames,
+            )
+            assemble_frames(
+                packets[:, CODIF_HEADER_SIZE:],
+                self.payload_format,
+                in_block,
+                destinations,
+                cube,
+            )
+            valid[destinations] = True
+
+    def _finish(self, block: int) -> CODIFBlock:
+        if block in self.pending:
+            cube, valid = self.pending.pop(block)
+        else:
+            cube, valid = self._new_block()
+
+        first = self.first_sequence + block * self.n_frames
+        timestamps = calc_sample_times(
+            np.arange(first, first + self.n_frames),
+            self.payload_format.samples_per_frame,
+            int(self.template["alignment_period"]),
+            int(self.template["sample_periods_per_alignment_period"]),
+        )
+        return CODIFBlock(
+            cube,
+            timestamps,
+            block * self.n_frames * self.payload_format.samples_per_frame,
+            valid,
+        )
+
+    def iter_blocks(self) -> Iterator[CODIFBlock]:
+        """Yields blocks of received data in time order as they complete.
+
+        A block is complete once a packet arrives for two blocks after it, leaving
+        time for packets arriving out of order. When no packets arrive for the
+        timeout, the blocks still being filled are yielded and iteration stops.
+        """
+        warmup = []
+        while True:
+            try:
+                packets = self.receive_batch()
+            except TimeoutError:
+                break
+            if self.template is None:
+                # The receive buffer is reused, so warm-up packets are copied out.
+                warmup.append(packets.copy())
+                if sum(map(len, warmup)) < self.warmup_packets:
+                    continue
+                packets = np.concatenate(warmup)
+                warmup = []
+            self.place(packets)
+
+            if self.pending:
+                newest = max(self.pending)
+                while self.next_block < newest - 1:
+                    yield self._finish(self.next_block)
+                    self.next_block += 1
+
+        if warmup:
+            self.place(np.concatenate(warmup))
+        if self.pending:
+            newest = max(self.pending)
+            while self.next_block <= newest:
+                yield self._finish(self.next_block)
+                self.next_block += 1
+
+        if any(self.dropped.values()):
+            logger.warning(f"Dropped packets: {self.dropped}")
+
+    def close(self):
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replay(
+    filename: str,
+    host: str,
+    port: int,
+    packets_per_second: float | None = None,
+) -> int:
+    """Sends the frames of a CODIF file as UDP packets, one frame per packet.
+
+    Sends as fast as possible unless `packets_per_second` is given. Returns the
+    number of packets sent.
+    """
+    with MappedCODIF(filename) as mapped:
+        frames = mapped.buffer[: mapped.n_frames * mapped.frame_size].reshape(
+            mapped.n_frames, mapped.frame_size
+        )
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            start = time.perf_counter()
+            for i, frame in enumerate(frames):
+                if packets_per_second:
+                    delay = start + i / packets_per_second - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                sender.sendto(frame, (host, port))
+        return mapped.n_frames
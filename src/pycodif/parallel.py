@@ -0,0 +1,142 @@
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from multiprocessing import shared_memory
+
+import numpy as np
+from loguru import logger
+
+from pycodif.assembly import assemble_frames
+from pycodif.bulk import MappedCODIF
+from pycodif.decoding import PayloadFormat
+
+# Ranges of the file handed out per worker, so a slow range does not hold up the rest.
+CHUNKS_PER_WORKER = 4
+
+
+class SharedCube:
+    """A cube in shared memory, which stays mapped while any array uses it.
+
+    np.asarray gives the cube as an array with this as its base, which views of it
+    keep alive in turn. The memory is closed once the last of them is garbage
+    collected.
+    """
+
+    def __init__(self, shape: tuple, dtype: np.dtype):
+        self.shared = shared_memory.SharedMemory(
+            create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1)
+        )
+        self.name = self.shared.name
+        # The address is taken through a temporary array, which must not outlive
+        # this line or it would stop the memory from being closed.
+        address = np.frombuffer(self.shared.buf, dtype=np.uint8).ctypes.data
+        self.__array_interface__ = {
+            "shape": tuple(shape),
+            "typestr": dtype.str,
+            "descr": dtype.descr,
+            "data": (address, False),
+            "version": 3,
+        }
+        weakref.finalize(self, self.shared.close)
+
+    def unlink(self):
+        self.shared.unlink()
+
+
+def _assemble_range(
+    filename: str,
+    shared_memory_name: str,
+    shape: tuple,
+    payload_format: PayloadFormat,
+    positions: np.ndarray,
+    destinations: tuple,
+    dtype: np.dtype,
+) -> int:
+    """Decodes one range of a file straight into the shared output cube."""
+    mapped = MappedCODIF(filename)
+    shared = shared_memory.SharedMemory(name=shared_memory_name)
+    try:
+        out = np.ndarray(shape, dtype=dtype, buffer=shared.buf)
+        assemble_frames(mapped.payloads, payload_format, positions, destinations, out)
+        del out
+    finally:
+        shared.close()
+    return len(positions)
+
+
+def assemble_parallel(
+    files: list,
+    payload_format: PayloadFormat,
+    file_numbers: np.ndarray,
+    positions: np.ndarray,
+    destinations: tuple,
+    shape: tuple,
+    workers: int,
+    fill_value: float = 0.0,
+    dtype: np.dtype | None = None,
+    pool: ProcessPoolExecutor | None = None,
+) -> np.ndarray:
+    """Like assemble_frames into a new cube filled with `fill_value`, with the
+    decoding split up between a pool of `workers` processes. The cube has
+    payload_format.dtype unless `dtype` is given, such as
+    payload_format.native_dtype.
+
+    Frame `i` is at `positions[i]` in `files[file_numbers[i]]`, a list of
+    MappedCODIF. The frames are split into contiguous ranges of each file. Each
+    worker maps the file itself and writes its frames directly into a cube in shared
+    memory, so no decoded data is sent between processes. The returned array is
+    backed by that shared memory.
+
+    Give a ProcessPoolExecutor of `workers` processes as `pool` to reuse it across
+    calls. Otherwise a pool is started and shut down for this call alone.
+    """
+    order = np.lexsort((positions, file_numbers))
+    file_numbers = np.asarray(file_numbers)[order]
+    positions = np.asarray(positions)[order]
+    destinations = tuple(np.asarray(d)[order] for d in destinations)
+
+    dtype = np.dtype(payload_format.dtype if dtype is None else dtype)
+    shared = SharedCube(shape, dtype)
+    try:
+        out = np.asarray(shared)
+        out.fill(fill_value)
+
+        n_chunks = min(workers * CHUNKS_PER_WORKER, max(len(positions), 1))
+        file_bounds = np.searchsorted(file_numbers, np.arange(len(files) + 1))
+        chunks = [
+            chunk
+            for file_number in range(len(files))
+            for chunk in np.array_split(
+                np.arange(file_bounds[file_number], file_bounds[file_number + 1]),
+                n_chunks,
+            )
+            if len(chunk)
+        ]
+
+        logger.info(f"Decoding {len(positions)} frames with {workers} workers...")
+        with (
+            ProcessPoolExecutor(max_workers=workers)
+            if pool is None
+            else nullcontext(pool)
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _assemble_range,
+                    files[file_numbers[chunk[0]]].filename,
+                    shared.name,
+                    shape,
+                    payload_format,
+                    positions[chunk],
+                    tuple(d[chunk] for d in destinations),
+                    dtype,
+                )
+                for chunk in chunks
+            ]
+            for future in futures:
+                future.result()
+    finally:
+        # The name is no longer needed once the workers are done. The memory itself
+        # is freed with the last array using it.
+        shared.unlink()
+
+    return out
@@ -1,111 +1,176 @@
+import glob
+import io
 import math
+import os
 import struct
-from collections import defaultdict
-from datetime import timedelta
+from collections.abc import Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import NamedTuple
 
 import numpy as np
 from loguru import logger
-from tqdm import tqdm
 
+from pycodif.bulk import MappedCODIF
+from pycodif.constants import CODIF_HEADER_SIZE
 from pycodif.date_functions import (
+    SampleClock,
     calc_epoch_base,
     calc_frame_time_offset,
+    calc_sample_times,
     calc_start_alignment_period_timestamp,
     calc_time_of_all_samples_in_frame,
 )
+from pycodif.decoding import PayloadFormat, decode_payloads
+from pycodif.index import FrameIndex
+from pycodif.instrumentation import NULL_STATS, Stats
+from pycodif.lazy import CODIFArray
+from pycodif.readahead import ReadAheadOptions
+
+# The whole 64 byte header, read in one go. See parse_header for the fields.
+HEADER_STRUCT = struct.Struct("<II8B3HBBHHIQIH18B")
 
 
 class CODIFHeader:
+    """The fields of a single CODIF header.
+
+    Only the raw fields are set when a header is read. Derived fields, such as the
+    timestamps, are worked out the first time they are used and then kept.
+    """
+
+    __slots__ = (
+        "data_frame_number",
+        "epoch_offset",
+        "reference_epoch",
+        "sample_size",
+        "sample_representation",
+        "cal_enabled",
+        "complex",
+        "invalid",
+        "atypical",
+        "protocol",
+        "version",
+        "reserved",
+        "alignment_period",
+        "thread_id",
+        "group_id",
+        "secondary_id",
+        "station_id_1",
+        "station_id_2",
+        "station_id",
+        "channels",
+        "sample_block_length",
+        "data_array_length",
+        "sample_periods_per_alignment_period",
+        "synchronisation_sequence",
+        "metadata_id",
+        "metadata_bytes",
+        "_start_alignment_period_timestamp",
+        "_frame_time_offset",
+        "_start_frame_timestamp",
+    )
+
     def __init__(self, f):
         self.parse_header(f)
-
-        self.effective_sample_size = self.sample_size * 2**self.complex  # bits
-        self.channel_block_size_bits = self.effective_sample_size  # bits
-        self.channel_block_size_bytes = self.channel_block_size_bits / 8
-        self.channel_blocks_per_sample_block = math.floor(
-            self.sample_block_length * 64 / self.channel_block_size_bits
-        )
-
-        self.epoch_date = calc_epoch_base(self.reference_epoch)
-        self.start_alignment_period_timestamp = calc_start_alignment_period_timestamp(
-            self.epoch_date, self.epoch_offset
-        )
-
-        self.frame_time_offset = calc_frame_time_offset(self)
-        self.start_frame_timestamp = self.start_alignment_period_timestamp + timedelta(
-            seconds=self.frame_time_offset
-        )
+        self._start_alignment_period_timestamp = None
+        self._frame_time_offset = None
+        self._start_frame_timestamp = None
+
+    @property
+    def effective_sample_size(self) -> int:
+        return self.sample_size * 2**self.complex  # bits
+
+    @property
+    def channel_block_size_bits(self) -> int:
+        return self.effective_sample_size  # bits
+
+    @property
+    def channel_block_size_bytes(self) -> float:
+        return self.channel_block_size_bits / 8
+
+    @property
+    def channel_blocks_per_sample_block(self) -> int:
+        return math.floor(self.sample_block_length * 64 / self.channel_block_size_bits)
+
+    @property
+    def epoch_date(self) -> datetime:
+        # calc_epoch_base is cached, so headers share one epoch per reference epoch.
+        return calc_epoch_base(self.reference_epoch)
+
+    @property
+    def start_alignment_period_timestamp(self) -> datetime:
+        if self._start_alignment_period_timestamp is None:
+            self._start_alignment_period_timestamp = (
+                calc_start_alignment_period_timestamp(
+                    self.epoch_date, self.epoch_offset
+                )
+            )
+        return self._start_alignment_period_timestamp
+
+    @property
+    def frame_time_offset(self) -> float:
+        if self._frame_time_offset is None:
+            self._frame_time_offset = calc_frame_time_offset(self)
+        return self._frame_time_offset
+
+    @property
+    def start_frame_timestamp(self) -> datetime:
+        if self._start_frame_timestamp is None:
+            self._start_frame_timestamp = (
+                self.start_alignment_period_timestamp
+                + timedelta(seconds=self.frame_time_offset)
+            )
+        return self._start_frame_timestamp
 
     def parse_header(self, f):
-        byte_data = f.read(8)
-        self.data_frame_number, self.epoch_offset = struct.unpack("<II", byte_data)
-
-        byte_data = f.read(8)
-        byte_0, byte_1, packed_bits_1, packed_bits_2, byte4, byte5, byte6, byte7 = (
-            struct.unpack("<8B", byte_data)
-        )
-        self.reference_epoch = int(byte_0)
-        self.sample_size = int(byte_1)
-
-        self.sample_representation = int(
-            packed_bits_1 >> 4 & 0xF
-        )  # this will be bits 4-7
-        self.cal_enabled = int((packed_bits_1 >> 3) & 0x1)
-        self.complex = int((packed_bits_1 >> 2) & 0x1)
-        self.invalid = int((packed_bits_1 >> 1) & 0x1)
-        self.atypical = int((packed_bits_1 >> 0) & 0x1)
-
-        self.protocol = int(packed_bits_2 >> 5 & 0xF)
-        self.version = int(packed_bits_2 & 0x1F)
-
-        # bytes 4-5 are reserved for future use so do nothing with them
-        self.reserved = int((byte5 << 8) | byte4)
-
-        # bytes 6-7 are the alignment period
-        self.alignment_period = int((byte7 << 8) | byte6)
-
-        # next word
-        # 0-1 Thread ID
-        # 2-3 Group ID
-        # 4-5 Secondary ID
-        # 6-7 Station ID
-
-        byte_code = f.read(8)
         (
+            # Word 0
+            self.data_frame_number,
+            self.epoch_offset,
+            # Word 1
+            self.reference_epoch,
+            self.sample_size,
+            packed_bits_1,
+            packed_bits_2,
+            byte4,
+            byte5,
+            byte6,
+            byte7,
+            # Word 2
             self.thread_id,
             self.group_id,
             self.secondary_id,
             self.station_id_1,
             self.station_id_2,
-        ) = struct.unpack("<3HBB", byte_code)
-        self.station_id = f"{chr(self.station_id_1)}{chr(self.station_id_2)}"
-
-        # next word
-        # 0-1 Channels
-        # 2-3 Sample Block Length in units of 8 bytes
-        # 4-7 Data array length in units of 8 bytes
-        # Word 4
-        # 0-7 sample periods per alignment period
-        byte_code = f.read(16)
-        (
+            # Word 3: sample block and data array lengths are in units of 8 bytes
             self.channels,
             self.sample_block_length,
             self.data_array_length,
+            # Word 4
             self.sample_periods_per_alignment_period,
-        ) = struct.unpack("<HHIQ", byte_code)
+            # Word 5
+            self.synchronisation_sequence,
+            self.metadata_id,
+            *metadata_bytes,
+        ) = HEADER_STRUCT.unpack(f.read(HEADER_STRUCT.size))
+        self.metadata_bytes = tuple(metadata_bytes)
+
+        self.sample_representation = packed_bits_1 >> 4 & 0xF  # this will be bits 4-7
+        self.cal_enabled = (packed_bits_1 >> 3) & 0x1
+        self.complex = (packed_bits_1 >> 2) & 0x1
+        self.invalid = (packed_bits_1 >> 1) & 0x1
+        self.atypical = (packed_bits_1 >> 0) & 0x1
+
+        self.protocol = packed_bits_2 >> 5 & 0xF
+        self.version = packed_bits_2 & 0x1F
 
-        # word 5
-        # 0-3 synchronisation sequence
-        # 4-5 metadata id
-        # 6-7 metadata bytes 0-1
+        # bytes 4-5 are reserved for future use so do nothing with them
+        self.reserved = (byte5 << 8) | byte4
 
-        byte_code = f.read(6)
-        self.synchronisation_sequence, self.metadata_id = struct.unpack(
-            "<IH", byte_code
-        )
+        # bytes 6-7 are the alignment period
+        self.alignment_period = (byte7 << 8) | byte6
 
-        byte_code = f.read(18)
-        self.metadata_bytes = struct.unpack("<18B", byte_code)
+        self.station_id = f"{chr(self.station_id_1)}{chr(self.station_id_2)}"
 
 
 class CODIFFrame:
@@ -115,142 +180,247 @@ class CODIFFrame:
         self.read_data(f)
 
     def read_data(self, f):
+        payload_format = PayloadFormat.from_header(self.header)
         data_array_bytes = f.read(8 * self.header.data_array_length)
-        self.number_of_samples = int(
-            self.header.data_array_length / self.header.sample_block_length
-        )
+        self.number_of_samples = payload_format.samples_per_frame
 
         # this will be little endian by default
-        data_array = np.frombuffer(data_array_bytes, dtype=np.short).astype(float)
-        data_array = data_array.reshape(self.number_of_samples, self.header.channels, 2)
-        data_array = data_array.transpose(1, 0, 2)
+        self.data_array = decode_payloads(data_array_bytes, payload_format)
 
-        self.data_array = (data_array[..., 0] + 1j * data_array[..., 1]).astype(
-            np.complex64
-        )
+
+def expand_filenames(filename) -> list:
+    """Turns a filename, list of filenames or glob pattern into a list of files."""
+    if isinstance(filename, (str, os.PathLike)):
+        if glob.has_magic(os.fspath(filename)):
+            filenames = sorted(glob.glob(os.fspath(filename)))
+            if not filenames:
+                raise FileNotFoundError(f"No files match {filename}.")
+            return filenames
+        return [filename]
+
+    filenames = list(filename)
+    if not filenames:
+        raise ValueError("At least one file is needed.")
+    return filenames
+
+
+class CODIFFrameMapping(Mapping):
+    """Read-only mapping of frame keys to CODIFFrame objects.
+
+    Keys are (data_frame_number, thread_id, group_id, secondary_id, station_id) tuples
+    from the frame index. Frames are only decoded when they are looked up, straight
+    from the memory-mapped files.
+    """
+
+    def __init__(self, files: list, index: FrameIndex):
+        self.files = files
+        self.index = index
+
+    def frame_at(self, position: int) -> "CODIFFrame":
+        """Decodes the frame at the given position in the index."""
+        file_number, _ = self.index.locate(position)
+        start = int(self.index.entries["offset"][position])
+        frame_bytes = self.files[file_number].buffer[
+            start : start + self.index.frame_size
+        ]
+        return CODIFFrame(io.BytesIO(frame_bytes))
+
+    def __getitem__(self, key) -> "CODIFFrame":
+        return self.frame_at(self.index.lookup(key))
+
+    def __iter__(self):
+        return iter(self.index.key_positions)
+
+    def __len__(self) -> int:
+        return len(self.index.key_positions)
+
+
+class CODIFBlock(NamedTuple):
+    """A time-contiguous piece of a CODIF file, as yielded by CODIF.iter_blocks."""
+
+    data: np.ndarray
+    timestamps: np.ndarray
+    start_sample: int
+    valid: np.ndarray
 
 
 class CODIF:
-    def __init__(self, filename: str, flatten_groups: bool = False):
-        self.frames = {}
+    def __init__(
+        self,
+        filename: str | list[str],
+        flatten_groups: bool = False,
+        lazy: bool = False,
+        cache_index: bool = True,
+        workers: int = 1,
+        fill_value: float = 0.0,
+        readahead: ReadAheadOptions | bool | None = None,
+        stats: Stats | None = None,
+        native: bool = False,
+    ):
+        """Decodes a CODIF file, or several files recorded at the same time.
+
+        `filename` can be a single file, a list of files or a glob pattern. Frames
+        from every file are lined up by data frame number into one data cube, so each
+        file can hold different threads, groups or stations.
+
+        Frames are located through a FrameIndex, which is saved next to the file (as
+        `<filename>.idx`) and reused when the file is opened again, unless
+        `cache_index` is False.
+
+        With `lazy`, only the headers are read up front. `data` is then a CODIFArray
+        which decodes frames as it is indexed, and `timestamps` is the SampleClock
+        `clock`, which only works out timestamps as they are indexed. Use
+        iter_blocks to work through the whole file a block at a time.
+
+        With more than one `workers`, frames are decoded in parallel by a pool of
+        processes, each writing into a shared memory cube. The pool is started once
+        and reused for every read, until close.
+
+        Each frame is placed by its data frame number, so dropped frames leave a gap
+        rather than shifting the rest of the stream. Samples of missing frames, and of
+        frames flagged invalid, are set to `fill_value` (such as 0 or NaN). `valid`
+        marks the (station, group, thread, data frame) slots which hold good data.
+
+        With `readahead` (True, or ReadAheadOptions to set the buffer size and
+        depth), frames are read from disk by a background thread while earlier ones
+        are decoded, which helps most on network filesystems.
+
+        With `native`, samples keep the width they are stored with rather than
+        being converted to complex64 or float32: 16-bit complex samples become
+        (re, im) pairs of int16, for instance, taking half the memory. See
+        PayloadFormat.native_dtype. Use upcast to convert blocks of them for
+        computing with, which the DSP stages do themselves.
+
+        Give a Stats as `stats` to record the time taken, and the frames and bytes
+        handled, by each stage of reading the file, including later reads of a lazy
+        `data` and iter_blocks. See Stats for how to get at them.
+        """
         self.flatten_groups = flatten_groups
+        self.workers = workers
+        self.fill_value = fill_value
+        self.readahead = ReadAheadOptions() if readahead is True else readahead or None
+        self.stats = NULL_STATS if stats is None else stats
+        self.native = native
+        self.pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
 
         logger.info("Starting file decode...")
-        with open(filename, "rb") as f:
-            while f.read(1):
-                f.seek(-1, 1)  # if not end of file - then reset to before the f.read()
-                frame = CODIFFrame(f)
-
-                self.frames[
-                    (
-                        frame.header.data_frame_number,
-                        frame.header.thread_id,
-                        frame.header.group_id,
-                        frame.header.secondary_id,
-                        frame.header.station_id,
-                    )
-                ] = frame
-        logger.info("Finished reading file, converting....")
-        self.datasets = defaultdict(lambda: defaultdict(list))
-
-        sorted_keys = sorted(self.frames.keys(), key=lambda x: x[0])
-
-        all_stations = set(a[4] for a in self.frames.keys())
-        all_frames = set([a[0] for a in self.frames.keys()])
-        all_threads = set([a[1] for a in self.frames.keys()])
-        all_groups = set([a[2] for a in self.frames.keys()])
-        # This will get used at some point but comment out for now
-        # all_secondaries = set([a[3] for a in self.frames.keys()])
-
-        array_shape_frames = len(all_frames)
-        array_shape_threads = len(all_threads)
-        array_shape_group = len(all_groups)
-
-        # array_shape_secondary = len(set([a[3] for a in self.frames.keys()]))
-        array_shape_station = len(all_stations)
-        array_shape_channels = self.frames[sorted_keys[0]].header.channels
-        array_shape_samples = (
-            self.frames[sorted_keys[0]].number_of_samples * array_shape_frames
+        self.filenames = expand_filenames(filename)
+
+        def open_file(name):
+            mapped = MappedCODIF(name)
+            return mapped, FrameIndex.open(mapped, cache=cache_index)
+
+        with self.stats.stage("index") as stage:
+            with ThreadPoolExecutor(max_workers=len(self.filenames)) as pool:
+                opened = list(pool.map(open_file, self.filenames))
+            self.files = [mapped for mapped, _ in opened]
+            if len(opened) == 1:
+                self.index = opened[0][1]
+            else:
+                self.index = FrameIndex.concatenate([index for _, index in opened])
+            stage.add(len(self.index), len(self.index) * CODIF_HEADER_SIZE)
+
+        self.frames = CODIFFrameMapping(self.files, self.index)
+        self.valid = self.index.valid
+        self.clock = SampleClock.from_header(
+            self.index.header, self.index.frame_numbers
         )
+        if lazy:
+            self.timestamps = self.clock
+            self.data = self._array(flatten_groups)
+            logger.info("Finished reading headers.")
+            return
 
-        if flatten_groups:
-            array_shape = (
-                array_shape_station
-                * array_shape_group
-                * array_shape_threads
-                * array_shape_channels,
-                array_shape_samples,
-            )
-        else:
-            array_shape = (
-                array_shape_station,
-                array_shape_group,
-                array_shape_threads,
-                array_shape_channels,
-                array_shape_samples,
-            )
-
+        logger.info("Finished reading file, converting....")
         logger.info("getting timestamps")
-        min_threads = min([a[1] for a in self.frames.keys()])
-        min_group = min([a[2] for a in self.frames.keys() if a[1] == min_threads])
-        min_secondary = min(
-            [
-                a[3]
-                for a in self.frames.keys()
-                if a[1] == min_threads and a[2] == min_group
-            ]
+        n_data_frames = len(self.index.frame_numbers)
+        with self.stats.stage("timestamps"):
+            self.timestamps = self.clock.seconds()
+
+        logger.info("Assembling data frames...")
+        stations, groups, threads = (
+            np.arange(n) for n in self.index.positions.shape[:3]
         )
-        min_station = min(
-            [
-                a[4]
-                for a in self.frames.keys()
-                if a[1] == min_threads and a[2] == min_group and a[3] == min_secondary
-            ]
+        self.data = self._array().read_frames(
+            stations, groups, threads, np.arange(n_data_frames)
         )
+        if flatten_groups:
+            self.data = self.data.reshape(-1, self.data.shape[-1])
+
+        logger.info("Finished writing array!")
 
-        # Make an assumption that all of the timestamps are the same for now. So we
-        # only have to get the timestamps from one thread group.
-        # Sort these as it is theoretically possible that these are out of order.
-        keys_for_timestamp = sorted(
-            [
-                a
-                for a in self.frames.keys()
-                if a[1] == min_threads
-                and a[2] == min_group
-                and a[3] == min_secondary
-                and a[4] == min_station
-            ],
-            key=lambda x: x[0],
+    def _array(self, flatten_groups: bool = False) -> CODIFArray:
+        return CODIFArray(
+            self.files,
+            self.index,
+            flatten_groups,
+            self.workers,
+            self.fill_value,
+            self.readahead,
+            self.stats,
+            self.native,
+            self.pool,
         )
 
-        timestamps = []
-        for key in tqdm(keys_for_timestamp):
-            timestamps.append(self.frames[key].sample_timestamps)
-        self.timestamps = np.concatenate(timestamps)
-
-        self.data = np.empty(array_shape, dtype=np.complex64)
-        logger.info("Concatenating data frames...")
-        group_count = 0
-        for i, station in enumerate(all_stations):
-            for j, group in enumerate(all_groups):
-                for k, thread in enumerate(all_threads):
-                    channel_data = np.concatenate(
-                        [
-                            self.frames[id].data_array
-                            for id in [
-                                a
-                                for a in sorted_keys
-                                if a[1] == thread and a[2] == group and a[4] == station
-                            ]
-                        ],
-                        axis=1,
-                    )
-                    if not self.flatten_groups:
-                        self.data[i, j, k] = channel_data
-
-                    else:
-                        count = channel_data.shape[0]
-                        self.data[group_count : group_count + count] = channel_data
-                        group_count += count
+    def close(self):
+        """Shuts down the pool of decoding processes, if any, and closes the files.
+
+        Data already read stays usable, but nothing more can be read.
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+        for mapped in self.files:
+            mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def calc_timestamps(self, frames) -> np.ndarray:
+        """Gives the timestamps of every sample in the given data frames.
+
+        `frames` are positions in `index.frame_numbers`.
+        """
+        header = self.index.header
+        return calc_sample_times(
+            self.index.frame_numbers[np.asarray(frames, dtype=np.int64)],
+            self.clock.samples_per_frame,
+            int(header["alignment_period"]),
+            int(header["sample_periods_per_alignment_period"]),
+        )
 
-        logger.info("Finished writing array!")
+    def iter_blocks(self, n_frames: int = 1024) -> Iterator[CODIFBlock]:
+        """Yields the data in time-contiguous blocks of `n_frames` data frames.
+
+        Each block has the same (station, group, thread, channel, sample) layout as
+        `data` (or (row, sample) with flatten_groups), holding only the samples of
+        its frames, alongside the matching slice of timestamps and of `valid`. Only
+        one block is decoded at a time, so memory use is set by `n_frames` rather than
+        by the size of the file. Frames missing from a stream are set to
+        `fill_value`.
+        """
+        if n_frames < 1:
+            raise ValueError("n_frames must be at least 1.")
+
+        array = self._array()
+        samples_per_frame = array.samples_per_frame
+        stations, groups, threads = (
+            np.arange(n) for n in self.index.positions.shape[:3]
+        )
+        n_data_frames = self.index.positions.shape[3]
+        for start in range(0, n_data_frames, n_frames):
+            frames = np.arange(start, min(start + n_frames, n_data_frames))
+            data = array.read_frames(stations, groups, threads, frames)
+            if self.flatten_groups:
+                data = data.reshape(-1, data.shape[-1])
+
+            with self.stats.stage("timestamps"):
+                timestamps = self.calc_timestamps(frames)
+            yield CODIFBlock(
+                data,
+                timestamps,
+                start * samples_per_frame,
+                self.valid[..., frames],
+            )
@@ -0,0 +1,163 @@
+import queue
+import threading
+from collections.abc import Iterator
+from typing import NamedTuple
+
+import numpy as np
+
+from pycodif.assembly import assemble_frames
+from pycodif.constants import CODIF_HEADER_SIZE
+from pycodif.decoding import PayloadFormat
+from pycodif.instrumentation import NULL_STATS, Stats
+
+
+class ReadAheadOptions(NamedTuple):
+    """How far ahead of decoding frames are read.
+
+    Each read fills a buffer of up to `buffer_frames` frames, and up to `depth` full
+    buffers wait to be decoded.
+    """
+
+    buffer_frames: int = 4096
+    depth: int = 4
+
+
+class ReadAhead:
+    """Reads runs of frames from a file in a background thread.
+
+    `runs` are (start, stop) frame ranges, read in order in pieces of up to
+    `buffer_frames` frames with large readinto calls, which release the GIL. Reading
+    only waits when `depth` buffers are already waiting to be decoded. Iterating
+    yields (start, frames) pairs, `frames` being a (frame, byte) array whose buffer
+    is reused once the next pair is asked for.
+
+    Each read is recorded as the "read" stage of `stats`, along with the depth of
+    the "readahead" queue of buffers waiting to be decoded.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        frame_size: int,
+        runs: list,
+        options: ReadAheadOptions = ReadAheadOptions(),
+        stats: Stats = NULL_STATS,
+    ):
+        self.filename = filename
+        self.frame_size = frame_size
+        self.runs = runs
+        self.options = options
+        self.stats = stats
+
+    def _pieces(self) -> Iterator[tuple]:
+        for start, stop in self.runs:
+            for piece_start in range(start, stop, self.options.buffer_frames):
+                yield piece_start, min(piece_start + self.options.buffer_frames, stop)
+
+    def _read(self, free: queue.Queue, filled: queue.Queue, stop: threading.Event):
+        try:
+            with open(self.filename, "rb", buffering=0) as f:
+                for start, end in self._pieces():
+                    buffer = free.get()
+                    if stop.is_set():
+                        return
+                    n_frames = end - start
+                    with self.stats.stage("read", n_frames, n_frames * self.frame_size):
+                        f.seek(start * self.frame_size)
+                        nbytes = f.readinto(memoryview(buffer[:n_frames]).cast("B"))
+                    if nbytes != n_frames * self.frame_size:
+                        raise OSError(
+                            f"{self.filename} ended before frame {end} could be read."
+                        )
+                    filled.put((start, buffer, n_frames))
+                    self.stats.queue_depth("readahead", filled.qsize())
+            filled.put(None)
+        except BaseException as e:
+            filled.put(e)
+
+    def __iter__(self) -> Iterator[tuple]:
+        # One buffer more than the depth, for the one being decoded.
+        buffer_frames = min(
+            self.options.buffer_frames,
+            max((stop - start for start, stop in self.runs), default=1),
+        )
+        free = queue.Queue()
+        for _ in range(self.options.depth + 1):
+            free.put(np.empty((buffer_frames, self.frame_size), dtype=np.uint8))
+        filled = queue.Queue(maxsize=self.options.depth)
+        stop = threading.Event()
+
+        reader = threading.Thread(target=self._read, args=(free, filled, stop))
+        reader.start()
+        try:
+            while (item := filled.get()) is not None:
+                if isinstance(item, BaseException):
+                    raise item
+                start, buffer, n_frames = item
+                yield start, buffer[:n_frames]
+                free.put(buffer)
+        finally:
+            # Let the reader finish if iteration stopped early.
+            stop.set()
+            free.put(None)
+            while reader.is_alive():
+                try:
+                    filled.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            reader.join()
+
+
+def frame_runs(positions: np.ndarray, buffer_frames: int) -> list:
+    """Groups sorted frame positions into (start, stop) runs to read, skipping any
+    stretch of `buffer_frames` or more frames which holds none of them."""
+    if not len(positions):
+        return []
+    breaks = np.flatnonzero(np.diff(positions) >= buffer_frames) + 1
+    starts = np.concatenate([[0], breaks])
+    stops = np.concatenate([breaks, [len(positions)]]) - 1
+    return [
+        (int(positions[start]), int(positions[stop]) + 1)
+        for start, stop in zip(starts, stops)
+    ]
+
+
+def assemble_frames_readahead(
+    filename: str,
+    frame_size: int,
+    payload_format: PayloadFormat,
+    positions: np.ndarray,
+    destinations: tuple,
+    out: np.ndarray,
+    options: ReadAheadOptions = ReadAheadOptions(),
+    stats: Stats = NULL_STATS,
+) -> np.ndarray:
+    """Like assemble_frames, but reading the frames from `filename` ahead of decoding
+    them in a background thread, so that reading and decoding overlap.
+
+    Reading is recorded as the "read" stage of `stats`, in the background thread,
+    and the frames read are gathered, decoded and scattered in the stages of
+    assemble_frames.
+    """
+    order = np.argsort(positions, kind="stable")
+    positions = np.asarray(positions)[order]
+    destinations = tuple(np.asarray(d)[order] for d in destinations)
+
+    reader = ReadAhead(
+        filename,
+        frame_size,
+        frame_runs(positions, options.buffer_frames),
+        options,
+        stats,
+    )
+    for start, frames in reader:
+        first, last = np.searchsorted(positions, [start, start + len(frames)])
+        assemble_frames(
+            frames[:, CODIF_HEADER_SIZE:],
+            payload_format,
+            positions[first:last] - start,
+            tuple(d[first:last] for d in destinations),
+            out,
+            stats=stats,
+        )
+    return out
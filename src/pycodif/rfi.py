@@ -0,0 +1,146 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from pycodif.decoding import upcast
+from pycodif.instrumentation import NULL_STATS, Stats
+
+
+def spectral_kurtosis(power: np.ndarray, block_samples: int) -> tuple:
+    """Gives the spectral kurtosis and mean of each block of `block_samples` samples
+    along the last axis of `power`, as two (..., block) arrays.
+
+    The kurtosis is the generalised estimator of Nita & Gary (2010), which is 1 for
+    the power of complex Gaussian noise. Samples after the last whole block are left
+    out. Blocks with no power, such as those filled in for missing frames, have a
+    kurtosis of NaN.
+    """
+    n_blocks = power.shape[-1] // block_samples
+    blocks = power[..., : n_blocks * block_samples].reshape(
+        power.shape[:-1] + (n_blocks, block_samples)
+    )
+    s1 = blocks.sum(axis=-1, dtype=np.float64)
+    s2 = np.square(blocks, dtype=np.float64).sum(axis=-1)
+
+    m = block_samples
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kurtosis = (m + 1) / (m - 1) * (m * s2 / s1**2 - 1)
+    return kurtosis, s1 / m
+
+
+def kurtosis_limits(block_samples: int, sigma: float = 3.0) -> tuple:
+    """The (lower, upper) range of spectral kurtosis within `sigma` standard
+    deviations of 1, the value expected for Gaussian noise, for blocks of
+    `block_samples` samples."""
+    m = block_samples
+    variance = 4 * m**2 / ((m - 1) * (m + 2) * (m + 3))
+    return 1 - sigma * np.sqrt(variance), 1 + sigma * np.sqrt(variance)
+
+
+class RFIFlags(NamedTuple):
+    """The flags of a stretch of data, one per block of samples.
+
+    `start_block` is the number of blocks before these since the flagger started.
+    """
+
+    flags: np.ndarray
+    kurtosis: np.ndarray
+    power: np.ndarray
+    start_block: int
+
+
+class RFIFlagger:
+    """Flags RFI in a stream of data, block by block, as from CODIF.iter_blocks.
+
+    Data is (..., channel, sample) complex voltages, such as the (station, group,
+    thread, channel, sample) data of each CODIFBlock. Each channel is split into
+    blocks of `block_samples` samples, whose spectral kurtosis is worked out from
+    their power as they stream past. A block is flagged if its kurtosis is outside
+    `limits` (by default kurtosis_limits for `sigma`), or if it has no power at all,
+    as for missing frames. Samples at the end of each piece of data which do not
+    make a whole block are kept and joined onto the next, so the flags do not depend
+    on how the data is split up. When each piece is a whole number of blocks long,
+    the flags line up with the piece they were given, ready for apply_flags.
+
+    The total and number of unflagged blocks of power are kept for each channel, so
+    `mean_power` gives the running mean power of the clean data. Each piece of data
+    is recorded as the "rfi" stage of `stats`.
+    """
+
+    def __init__(
+        self,
+        block_samples: int = 1024,
+        sigma: float = 3.0,
+        limits: tuple | None = None,
+        stats: Stats = NULL_STATS,
+    ):
+        if block_samples < 2:
+            raise ValueError("block_samples must be at least 2.")
+        self.block_samples = block_samples
+        self.limits = (
+            kurtosis_limits(block_samples, sigma) if limits is None else limits
+        )
+        self.stats = stats
+        self.remainder = None
+        self.blocks = 0
+        self.power_sum = None
+        self.clean_blocks = None
+
+    def process(self, data: np.ndarray) -> RFIFlags:
+        """Gives the flags of every block completed by `data`."""
+        with self.stats.stage("rfi", nbytes=np.asarray(data).nbytes):
+            return self._process(data)
+
+    def _process(self, data: np.ndarray) -> RFIFlags:
+        data = upcast(data)
+        power = data.real**2 + data.imag**2 if np.iscomplexobj(data) else data**2
+        if self.remainder is not None:
+            power = np.concatenate([self.remainder, power], axis=-1)
+
+        kurtosis, mean_power = spectral_kurtosis(power, self.block_samples)
+        n_blocks = kurtosis.shape[-1]
+        self.remainder = power[..., n_blocks * self.block_samples :].copy()
+
+        lower, upper = self.limits
+        flags = ~((kurtosis >= lower) & (kurtosis <= upper))
+
+        if self.power_sum is None:
+            self.power_sum = np.zeros(power.shape[:-1])
+            self.clean_blocks = np.zeros(power.shape[:-1], dtype=np.int64)
+        self.power_sum += np.where(flags, 0, mean_power).sum(axis=-1)
+        self.clean_blocks += (~flags).sum(axis=-1)
+
+        start_block = self.blocks
+        self.blocks += n_blocks
+        return RFIFlags(flags, kurtosis, mean_power, start_block)
+
+    @property
+    def mean_power(self) -> np.ndarray:
+        """Mean power of the unflagged blocks of each channel so far."""
+        return np.divide(
+            self.power_sum,
+            self.clean_blocks,
+            out=np.full_like(self.power_sum, np.nan),
+            where=self.clean_blocks > 0,
+        )
+
+
+def sample_mask(flags: np.ndarray, block_samples: int) -> np.ndarray:
+    """Expands (..., block) flags into a (..., sample) mask of flagged samples."""
+    return np.repeat(flags, block_samples, axis=-1)
+
+
+def apply_flags(
+    data: np.ndarray, flags: np.ndarray, block_samples: int, fill_value=0.0
+) -> np.ndarray:
+    """Gives a copy of (..., sample) `data` with the samples of flagged blocks set
+    to `fill_value`.
+
+    With a fill value of 0, flagged samples add nothing when beamforming or
+    dedispersing. `data` may run past the last whole block, as the data given to
+    RFIFlagger can, and samples past it are left alone.
+    """
+    data = upcast(data).copy()
+    mask = sample_mask(flags, block_samples)
+    data[..., : mask.shape[-1]][mask] = fill_value
+    return data
@@ -0,0 +1,153 @@
+import numpy as np
+from loguru import logger
+
+from pycodif.bulk import HEADER_DTYPE
+from pycodif.constants import (
+    CODIF_SYNC_SEQUENCE,
+    SAMPLE_REPRESENTATION_FLOAT,
+    SAMPLE_REPRESENTATION_SIGNED,
+)
+from pycodif.decoding import PayloadFormat
+from pycodif.writer import CODIFWriter
+
+# Data frames generated and written at a time, which bounds memory use however large
+# the file is.
+DEFAULT_BLOCK_FRAMES = 1024
+
+
+def synthetic_template(
+    channels: int = 8,
+    sample_size: int = 16,
+    is_complex: bool = True,
+    sample_representation: int = SAMPLE_REPRESENTATION_SIGNED,
+    sample_block_length: int = 4,
+    data_array_length: int = 256,
+    alignment_period: int = 27,
+    sample_periods_per_alignment_period: int = 51_200_000,
+    reference_epoch: int = 49,
+    epoch_offset: int = 9767380,
+) -> np.void:
+    """A header for synthetic frames, by default in the format of the test files.
+
+    `sample_block_length` and `data_array_length` are in 64-bit words, as in the
+    header.
+    """
+    header = np.zeros((), dtype=HEADER_DTYPE)
+    header["epoch_offset"] = epoch_offset
+    header["reference_epoch"] = reference_epoch
+    header["sample_size"] = sample_size
+    header["sample_representation"] = sample_representation
+    header["complex"] = is_complex
+    header["protocol"] = 7
+    header["version"] = 3
+    header["alignment_period"] = alignment_period
+    header["channels"] = channels
+    header["sample_block_length"] = sample_block_length
+    header["data_array_length"] = data_array_length
+    header["sample_periods_per_alignment_period"] = sample_periods_per_alignment_period
+    header["synchronisation_sequence"] = CODIF_SYNC_SEQUENCE
+    return header[()]
+
+
+def synthetic_headers(
+    template: np.void,
+    data_frames,
+    stations=("KP",),
+    groups=(0,),
+    threads=(0,),
+) -> np.ndarray:
+    """Headers for every stream at each of `data_frames`, counted from the start of
+    the alignment period of `template`.
+
+    Frames are in time order, and for each data frame in (station, group, thread)
+    order. Data frame numbers restart, and the epoch offset moves on, at each new
+    alignment period.
+    """
+    data_frames = np.asarray(data_frames, dtype=np.int64)
+    samples_per_frame = PayloadFormat.from_header(template).samples_per_frame
+    frames_per_period = (
+        int(template["sample_periods_per_alignment_period"]) // samples_per_frame
+    )
+
+    headers = np.empty(
+        (len(data_frames), len(stations), len(groups), len(threads)),
+        dtype=HEADER_DTYPE,
+    )
+    headers[...] = template
+    headers["data_frame_number"] = (data_frames % frames_per_period)[
+        :, np.newaxis, np.newaxis, np.newaxis
+    ]
+    headers["epoch_offset"] = (
+        int(template["epoch_offset"])
+        + data_frames // frames_per_period * int(template["alignment_period"])
+    )[:, np.newaxis, np.newaxis, np.newaxis]
+
+    for i, station in enumerate(stations):
+        headers["station_id_1"][:, i] = ord(station[0])
+        headers["station_id_2"][:, i] = ord(station[1])
+        headers["station_id"][:, i] = station
+    headers["group_id"] = np.asarray(groups)[:, np.newaxis]
+    headers["thread_id"] = np.asarray(threads)
+    return headers.reshape(-1)
+
+
+def synthetic_payloads(
+    payload_format: PayloadFormat, n_frames: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Random (frame, byte) data arrays.
+
+    Integer samples are uniformly random bits, and floating point samples are drawn
+    from a standard normal distribution.
+    """
+    n_bytes = payload_format.data_array_length * 8
+    if payload_format.sample_representation == SAMPLE_REPRESENTATION_FLOAT:
+        dtype = np.dtype(f"<f{payload_format.sample_size // 8}")
+        values = rng.standard_normal(n_frames * n_bytes // dtype.itemsize)
+        return values.astype(dtype).view(np.uint8).reshape(n_frames, n_bytes)
+    return np.frombuffer(rng.bytes(n_frames * n_bytes), dtype=np.uint8).reshape(
+        n_frames, n_bytes
+    )
+
+
+def write_synthetic(
+    filename: str,
+    n_data_frames: int,
+    template: np.void | None = None,
+    stations=("KP",),
+    groups=(0,),
+    threads=(0,),
+    dropped: float = 0.0,
+    invalid: float = 0.0,
+    seed=None,
+    block_frames: int = DEFAULT_BLOCK_FRAMES,
+) -> int:
+    """Writes a CODIF file of random data for testing and benchmarking.
+
+    Each of the `n_data_frames` data frames has one frame for every (station, group,
+    thread) stream, in the format of `template` (synthetic_template by default).
+    A fraction `dropped` of the frames is left out of the file at random, and a
+    fraction `invalid` of those written is flagged invalid. Frames are made and
+    written with CODIFWriter `block_frames` data frames at a time, so files of any
+    size can be written. Returns the number of frames written.
+    """
+    if template is None:
+        template = synthetic_template()
+    payload_format = PayloadFormat.from_header(template)
+    rng = np.random.default_rng(seed)
+
+    with CODIFWriter(filename) as writer:
+        for start in range(0, n_data_frames, block_frames):
+            data_frames = np.arange(start, min(start + block_frames, n_data_frames))
+            headers = synthetic_headers(
+                template, data_frames, stations, groups, threads
+            )
+            if dropped:
+                headers = headers[rng.random(len(headers)) >= dropped]
+            if invalid:
+                headers["invalid"] = rng.random(len(headers)) < invalid
+            writer.write_frames(
+                headers, synthetic_payloads(payload_format, len(headers), rng)
+            )
+
+    logger.info(f"Wrote {writer.frames_written} synthetic frames to {filename}.")
+    return writer.frames_written
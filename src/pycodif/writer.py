@@ -0,0 +1,176 @@
+import numpy as np
+from loguru import logger
+
+from pycodif.bulk import decode_headers, encode_headers
+from pycodif.constants import CODIF_HEADER_SIZE
+from pycodif.decoding import PayloadFormat, decode_payloads, encode_payloads
+from pycodif.parsing import CODIF
+from pycodif.readahead import ReadAhead, ReadAheadOptions
+
+# Frames converted at a time when repacking into a different sample format.
+DEFAULT_BATCH_FRAMES = 4096
+
+
+class CODIFWriter:
+    """Writes CODIF frames to a file.
+
+    Headers are packed all at once with encode_headers, and each batch of frames is
+    written with a single call. Use as a context manager, or call close when done.
+    """
+
+    def __init__(self, filename: str, append: bool = False):
+        self.filename = filename
+        self.file = open(filename, "ab" if append else "wb")
+        self.frames_written = 0
+
+    def write_frames(self, headers: np.ndarray, payloads: np.ndarray):
+        """Writes frames made of HEADER_DTYPE `headers` and (frame, bytes) uint8
+        `payloads`, each the data array length given in its header."""
+        headers = np.atleast_1d(headers)
+        payloads = np.asarray(payloads, dtype=np.uint8).reshape(len(headers), -1)
+        if (headers["data_array_length"] * 8 != payloads.shape[1]).any():
+            raise ValueError(
+                "Every payload must be as long as the data array length in its header."
+            )
+
+        frames = np.empty(
+            (len(headers), CODIF_HEADER_SIZE + payloads.shape[1]), dtype=np.uint8
+        )
+        frames[:, :CODIF_HEADER_SIZE] = (
+            encode_headers(headers).view(np.uint8).reshape(-1, CODIF_HEADER_SIZE)
+        )
+        frames[:, CODIF_HEADER_SIZE:] = payloads
+        self.write_raw(frames)
+
+    def write_raw(self, frames: np.ndarray):
+        """Writes (frame, bytes) uint8 frames which are already encoded, as read
+        straight from a CODIF file."""
+        self.file.write(memoryview(np.ascontiguousarray(frames)).cast("B"))
+        self.frames_written += len(frames)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def repacked_format(
+    payload_format: PayloadFormat,
+    sample_size: int | None = None,
+    sample_representation: int | None = None,
+) -> PayloadFormat:
+    """The format of `payload_format` with a new sample size or representation.
+
+    Sample blocks hold the same samples as before, shrunk or grown to the fewest
+    64-bit words which fit them, so every frame keeps the same samples.
+    """
+    sample_size = sample_size or payload_format.sample_size
+    if sample_representation is None:
+        sample_representation = payload_format.sample_representation
+
+    block_bits = (
+        payload_format.samples_per_block
+        * payload_format.channels
+        * sample_size
+        * 2**payload_format.is_complex
+    )
+    sample_block_length = -(-block_bits // 64)
+    n_blocks = payload_format.data_array_length // payload_format.sample_block_length
+    return payload_format._replace(
+        sample_size=sample_size,
+        sample_representation=sample_representation,
+        sample_block_length=sample_block_length,
+        data_array_length=n_blocks * sample_block_length,
+    )
+
+
+def _select(ids: np.ndarray, wanted) -> np.ndarray:
+    if wanted is None:
+        return np.arange(len(ids))
+    selected = np.flatnonzero(np.isin(ids, wanted))
+    missing = set(np.atleast_1d(wanted).tolist()) - set(ids[selected].tolist())
+    if missing:
+        raise ValueError(f"{sorted(missing)} not found in {ids.tolist()}.")
+    return selected
+
+
+def subset(
+    source,
+    destination: str,
+    stations=None,
+    groups=None,
+    threads=None,
+    start: int = 0,
+    stop: int | None = None,
+    sample_size: int | None = None,
+    sample_representation: int | None = None,
+    options: ReadAheadOptions = ReadAheadOptions(),
+) -> int:
+    """Copies chosen frames of CODIF files into a new file.
+
+    `source` is anything CODIF opens: a file, list of files or glob pattern.
+    `stations`, `groups` and `threads` are the ids of the streams to keep, or None to
+    keep them all, and `start` and `stop` are the range of data frames to keep,
+    counted from the first. Frames flagged invalid and repeated frames are left out.
+    Frames are written in the order they are found in the source files.
+
+    Frames are copied byte for byte, read ahead in large pieces without being
+    decoded. Given a new `sample_size` or `sample_representation`, frames are instead
+    decoded and encoded in the new format, with their headers updated to match.
+    Returns the number of frames written.
+    """
+    codif = CODIF(source, lazy=True)
+    index = codif.index
+    positions = index.positions[
+        np.ix_(
+            _select(index.stations, stations),
+            _select(index.groups, groups),
+            _select(index.threads, threads),
+            np.arange(index.positions.shape[3])[start:stop],
+        )
+    ]
+    file_numbers, file_positions = index.locate(positions[positions >= 0])
+
+    payload_format = PayloadFormat.from_header(index.header)
+    new_format = repacked_format(payload_format, sample_size, sample_representation)
+
+    with CODIFWriter(destination) as writer:
+        for file_number, mapped in enumerate(codif.files):
+            in_file = np.sort(file_positions[file_numbers == file_number])
+            if new_format == payload_format:
+                _copy_frames(mapped, in_file, writer, options)
+            else:
+                _repack_frames(mapped, in_file, new_format, writer)
+
+    logger.info(f"Wrote {writer.frames_written} frames to {destination}.")
+    return writer.frames_written
+
+
+def _copy_frames(mapped, positions: np.ndarray, writer, options: ReadAheadOptions):
+    """Copies frames at sorted `positions` of a file, a contiguous run at a time."""
+    breaks = np.flatnonzero(np.diff(positions) != 1) + 1
+    runs = [
+        (int(run[0]), int(run[-1]) + 1)
+        for run in np.split(positions, breaks)
+        if len(run)
+    ]
+    for _, frames in ReadAhead(mapped.filename, mapped.frame_size, runs, options):
+        writer.write_raw(frames)
+
+
+def _repack_frames(mapped, positions: np.ndarray, new_format: PayloadFormat, writer):
+    payload_format = PayloadFormat.from_header(mapped.first_header)
+    for start in range(0, len(positions), DEFAULT_BATCH_FRAMES):
+        batch = positions[start : start + DEFAULT_BATCH_FRAMES]
+        headers = decode_headers(mapped.raw_headers[batch])
+        headers["sample_size"] = new_format.sample_size
+        headers["sample_representation"] = new_format.sample_representation
+        headers["sample_block_length"] = new_format.sample_block_length
+        headers["data_array_length"] = new_format.data_array_length
+
+        data = decode_payloads(mapped.payloads[batch], payload_format)
+        writer.write_frames(headers, encode_payloads(data, new_format))
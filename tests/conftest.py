@@ -0,0 +1,46 @@
+import struct
+
+import pytest
+
+# One frame each of groups 17 and 14, at data frame 477644 of thread 215.
+TWO_PACKETS = "tests/test_files/test_codif_two_packets.codif"
+
+
+@pytest.fixture
+def two_packets() -> str:
+    """Path of the two packet test file."""
+    return TWO_PACKETS
+
+
+@pytest.fixture(scope="session")
+def codif_frame():
+    """Makes copies of the frames of the two packet file with their headers changed.
+
+    Call it with the group of the frame to copy, 17 or 14, and optionally a new
+    `data_frame_number` or `thread_id`, `invalid` to flag it invalid, or a byte to
+    `fill` its data array with.
+    """
+    with open(TWO_PACKETS, "rb") as f:
+        data = f.read()
+    frame_size = len(data) // 2
+    sources = {17: data[:frame_size], 14: data[frame_size:]}
+
+    def make(
+        group: int,
+        data_frame_number: int | None = None,
+        thread_id: int | None = None,
+        invalid: bool = False,
+        fill: int | None = None,
+    ) -> bytes:
+        frame = bytearray(sources[group])
+        if data_frame_number is not None:
+            struct.pack_into("<I", frame, 0, data_frame_number)
+        if thread_id is not None:
+            struct.pack_into("<H", frame, 16, thread_id)
+        if invalid:
+            frame[10] |= 0x2
+        if fill is not None:
+            frame[64:] = bytes([fill]) * (frame_size - 64)
+        return bytes(frame)
+
+    return make
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from pycodif.assembly import assemble_frames
+from pycodif.decoding import PayloadFormat, decode_payloads
+
+FORMAT = PayloadFormat(2, 16, 1, 1, 1, 4)
+
+
+class TestAssembleFrames:
+    @pytest.mark.parametrize("batch_size", [1, 3, 4096])
+    def test_frames_land_in_place(self, batch_size):
+        rng = np.random.default_rng(1)
+        payloads = rng.integers(0, 256, size=(6, 32), dtype=np.uint8)
+        positions = np.array([5, 0, 3, 1, 4, 2])
+        destinations = (
+            np.zeros(6, dtype=int),
+            np.array([0, 0, 1, 1, 1, 0]),
+            np.zeros(6, dtype=int),
+            np.array([0, 1, 0, 1, 2, 2]),
+        )
+
+        out = np.zeros((1, 2, 1, 2, 12), dtype=np.complex64)
+        assemble_frames(
+            payloads, FORMAT, positions, destinations, out, batch_size=batch_size
+        )
+
+        for position, j, f in zip(positions, destinations[1], destinations[3]):
+            np.testing.assert_array_equal(
+                out[0, j, 0, :, f * 4 : (f + 1) * 4],
+                decode_payloads(payloads[position], FORMAT),
+            )
+
+    def test_partial_frame_axis_raises(self):
+        out = np.zeros((1, 1, 1, 2, 6), dtype=np.complex64)
+        with pytest.raises(ValueError, match="whole number"):
+            assemble_frames(np.zeros((1, 32), np.uint8), FORMAT, [0], ([0],) * 4, out)
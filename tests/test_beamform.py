@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from pycodif.beamform import (
+    SPEED_OF_LIGHT,
+    Beamformer,
+    beamform,
+    pointing_vectors,
+    steering_weights,
+)
+
+POSITIONS_M = np.array([[0.0, 0.0], [0.5, 0.0], [0.0, 0.5], [0.5, 0.5]])
+FREQUENCIES_HZ = np.array([1.40e9, 1.42e9, 1.44e9])
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(3)
+    return (rng.normal(size=(4, 3, 200)) + 1j * rng.normal(size=(4, 3, 200))).astype(
+        np.complex64
+    )
+
+
+def plane_wave(direction, n_samples=100):
+    """(antenna, channel, sample) data for a tone in each channel from `direction`."""
+    delays = np.pad(POSITIONS_M, ((0, 0), (0, 1))) @ direction / SPEED_OF_LIGHT
+    phases = 2 * np.pi * FREQUENCIES_HZ * delays[:, np.newaxis]
+    signal = np.exp(1j * phases)[..., np.newaxis] * np.ones(n_samples)
+    return signal.astype(np.complex64)
+
+
+class TestSteeringWeights:
+    def test_shape_and_broadside(self):
+        weights = steering_weights(
+            POSITIONS_M, [0, 1], [np.pi / 2, 0.3], FREQUENCIES_HZ
+        )
+        assert weights.shape == (3, 2, 4)
+        assert weights.dtype == np.complex64
+        # Straight up, every antenna is in phase.
+        np.testing.assert_allclose(weights[:, 0], 0.25, atol=1e-6)
+
+    def test_beam_points_at_source(self):
+        thetas = np.linspace(0, 2 * np.pi, 24, endpoint=False)
+        weights = steering_weights(POSITIONS_M, thetas, 0.4, FREQUENCIES_HZ)
+        beams = beamform(plane_wave(pointing_vectors(thetas[7], 0.4)), weights)
+
+        power = (abs(beams) ** 2).sum(axis=(1, 2))
+        assert power.argmax() == 7
+        np.testing.assert_allclose(abs(beams[7]), 1, rtol=1e-5)
+
+
+class TestBeamform:
+    def test_shared_weights_match_matrix_product(self, data):
+        weights = np.arange(8).reshape(2, 4).astype(np.complex64)
+        beams = beamform(data, weights)
+        assert beams.shape == (2, 3, 200)
+        np.testing.assert_allclose(
+            beams, np.einsum("ba,acs->bcs", weights, data), rtol=1e-5
+        )
+
+    def test_per_channel_weights(self, data):
+        weights = steering_weights(POSITIONS_M, [0, 1], [0.2, 0.5], FREQUENCIES_HZ)
+        beams = beamform(data, weights)
+        np.testing.assert_allclose(
+            beams, np.einsum("cba,acs->bcs", weights, data), rtol=1e-4, atol=1e-5
+        )
+
+    def test_beamformer_reuses_buffer(self, data):
+        weights = steering_weights(POSITIONS_M, [0, 1], [0.2, 0.5], FREQUENCIES_HZ)
+        beamformer = Beamformer(weights)
+        cube = data.reshape(1, 2, 2, 3, 200)
+
+        first = beamformer.process(cube)
+        np.testing.assert_allclose(first, beamform(data, weights), rtol=1e-5)
+        assert beamformer.process(cube) is first
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from pycodif.bulk import MappedCODIF, decode_headers, encode_headers
+from pycodif.parsing import CODIFHeader
+
+
+class TestDecodeHeaders:
+    def test_matches_codif_header(self):
+        with open("tests/test_files/test_codif_two_packets.codif", "rb") as f:
+            header = CODIFHeader(f)
+            f.seek(0)
+            decoded = decode_headers(f.read(64))
+
+        assert decoded.shape == (1,)
+        for name in decoded.dtype.names:
+            if name == "metadata_bytes":
+                assert tuple(decoded[0][name]) == header.metadata_bytes
+            else:
+                assert decoded[0][name] == getattr(header, name)
+
+    def test_encode_round_trip(self):
+        with open("tests/test_files/test_codif_two_packets.codif", "rb") as f:
+            data = f.read()
+        raw = data[:64] + data[2112 : 2112 + 64]
+
+        assert encode_headers(decode_headers(raw)).tobytes() == raw
+
+
+class TestMappedCODIF:
+    def test_two_packets(self):
+        with MappedCODIF("tests/test_files/test_codif_two_packets.codif") as mapped:
+            assert len(mapped) == 2
+            assert mapped.frame_size == 64 + 8 * 256
+            assert mapped.payloads.shape == (2, 8 * 256)
+            assert mapped.headers["group_id"].tolist() == [17, 14]
+            assert (mapped.headers["station_id"] == "KP").all()
+
+    def test_payloads_are_views(self):
+        with MappedCODIF("tests/test_files/test_codif.codif") as mapped:
+            assert not mapped.payloads.flags.owndata
+            assert np.frombuffer(mapped.payloads[0][:4], dtype="<i2").tolist() == [
+                -23,
+                45,
+            ]
+
+    def test_closed_raises(self, two_packets):
+        with MappedCODIF(two_packets) as mapped:
+            mapped.headers
+        for name in ("headers", "raw_headers", "payloads", "buffer"):
+            with pytest.raises(ValueError, match="closed"):
+                getattr(mapped, name)
+        with pytest.raises(ValueError, match="closed"):
+            mapped.read_headers()
+
+    def test_variable_frame_size_raises(self, tmp_path):
+        with open("tests/test_files/test_codif_two_packets.codif", "rb") as f:
+            data = bytearray(f.read())
+        # Change the data array length of the second frame.
+        data[len(data) // 2 + 29] = 2
+
+        filename = tmp_path / "variable.codif"
+        filename.write_bytes(bytes(data))
+        with pytest.raises(ValueError, match="not fixed"):
+            MappedCODIF(filename).headers
+
+    def test_trailing_partial_frame_ignored(self, tmp_path):
+        with open("tests/test_files/test_codif_two_packets.codif", "rb") as f:
+            data = f.read()
+
+        filename = tmp_path / "truncated.codif"
+        filename.write_bytes(data[:-100])
+        with MappedCODIF(filename) as mapped:
+            assert len(mapped) == 1
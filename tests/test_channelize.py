@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from scipy.fft import fft, fftshift
+
+from pycodif.channelize import (
+    Channelizer,
+    channel_frequencies,
+    channelize,
+    segment,
+)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(1)
+    return (rng.normal(size=(3, 1000)) + 1j * rng.normal(size=(3, 1000))).astype(
+        np.complex64
+    )
+
+
+def reference(data, n_channels, overlap):
+    """The original one segment at a time channelizer."""
+    window = np.hanning(n_channels)
+    step = n_channels - overlap
+    n_segments = (data.shape[-1] - n_channels) // step + 1
+    output = np.empty((data.shape[0], n_segments, n_channels))
+    for thread in range(data.shape[0]):
+        for j in range(n_segments):
+            sliced = data[thread, j * step : j * step + n_channels]
+            output[thread, j] = np.abs(fftshift(fft(sliced * window)))
+    return output
+
+
+class TestSegment:
+    def test_view(self, data):
+        segments = segment(data, 128, 64)
+        assert segments.shape == (3, 14, 128)
+        assert np.shares_memory(segments, data)
+        np.testing.assert_array_equal(segments[1, 2], data[1, 128:256])
+
+
+class TestChannelize:
+    @pytest.mark.parametrize("overlap", [0, 32])
+    def test_matches_reference(self, data, overlap):
+        spectra = channelize(data, 128, overlap=overlap)
+        assert spectra.dtype == np.float32
+        np.testing.assert_allclose(
+            spectra, reference(data, 128, overlap), rtol=1e-4, atol=1e-3
+        )
+
+    def test_power_and_voltage(self, data):
+        voltage = channelize(data, 64, detect="voltage", dtype=np.float64)
+        assert voltage.dtype == np.complex128
+        np.testing.assert_allclose(
+            channelize(data, 64, detect="power", dtype=np.float64), abs(voltage) ** 2
+        )
+
+    def test_polyphase_filterbank_finds_tone(self):
+        n_channels = 32
+        frequencies = channel_frequencies(n_channels, 1.0)
+        tone = np.exp(2j * np.pi * frequencies[20] * np.arange(4096))
+
+        spectra = channelize(tone, n_channels, taps=4)
+        assert spectra.shape == (4096 // n_channels - 3, n_channels)
+        assert (spectra.argmax(axis=-1) == 20).all()
+        # Neighbouring channels are well suppressed.
+        assert spectra[:, 18].max() < 1e-3 * spectra[:, 20].min()
+
+    def test_unknown_detection(self, data):
+        with pytest.raises(ValueError, match="detect"):
+            channelize(data, 64, detect="phase")
+
+
+class TestChannelizer:
+    @pytest.mark.parametrize("taps", [1, 4])
+    def test_blocks_match_whole(self, data, taps):
+        channelizer = Channelizer(64, overlap=16, taps=taps)
+        spectra = np.concatenate(
+            [channelizer.process(data[:, i : i + 100]) for i in range(0, 1000, 100)],
+            axis=-2,
+        )
+        np.testing.assert_allclose(
+            spectra, channelize(data, 64, overlap=16, taps=taps), rtol=1e-5
+        )
@@ -0,0 +1,99 @@
+import os
+import shutil
+
+import pytest
+
+from pycodif.cli import main
+from pycodif.index import index_path
+from pycodif.synthetic import synthetic_template, write_synthetic
+
+
+@pytest.fixture
+def gappy_file(tmp_path, codif_frame):
+    """Group 17 has data frames 0 and 3, group 14 only 0."""
+    filename = tmp_path / "gappy.codif"
+    filename.write_bytes(codif_frame(17, 0) + codif_frame(14, 0) + codif_frame(17, 3))
+    return filename
+
+
+class TestInfo:
+    def test_streams(self, gappy_file, capsys):
+        main(["info", str(gappy_file)])
+        out = capsys.readouterr().out
+
+        assert "Frames: 3 of 2112 bytes" in out
+        assert "8 channels of 16-bit complex signed samples" in out
+        assert "Data frames: 0 to 3 (4)" in out
+        rows = [line.split() for line in out.splitlines()[-2:]]
+        assert rows == [
+            ["KP", "14", "215", "1", "3", "1", "0"],
+            ["KP", "17", "215", "2", "2", "1", "0"],
+        ]
+
+    def test_leaves_no_sidecar(self, gappy_file):
+        main(["info", str(gappy_file)])
+        assert not os.path.exists(index_path(gappy_file))
+
+
+class TestHeaders:
+    def test_range(self, capsys, two_packets):
+        main(["headers", two_packets, "--start", "1", "--fields", "group_id"])
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].split() == ["frame", "group_id", "sync"]
+        assert lines[1:] == [f"{'1':>18} {'14':>18} {'ok':>18}"]
+
+    def test_several_files(self, gappy_file, capsys, two_packets):
+        main(["headers", two_packets, str(gappy_file), "--fields", "group_id"])
+        sections = capsys.readouterr().out.split("\n\n")
+
+        assert len(sections) == 2
+        assert sections[0].splitlines()[0] == f"==> {two_packets} <=="
+        assert sections[1].splitlines()[0] == f"==> {gappy_file} <=="
+        assert len(sections[1].splitlines()) == 2 + 3
+
+    def test_unknown_field(self, capsys, two_packets):
+        with pytest.raises(SystemExit):
+            main(["headers", two_packets, "--fields", "foo"])
+        assert "invalid choice: 'foo'" in capsys.readouterr().err
+
+
+class TestIndex:
+    def test_writes_sidecar(self, tmp_path, capsys, two_packets):
+        filename = tmp_path / "capture.codif"
+        shutil.copy(two_packets, filename)
+        main(["index", str(filename)])
+
+        assert os.path.exists(index_path(filename))
+        assert capsys.readouterr().out.strip().endswith("2 frames")
+
+
+class TestErrors:
+    def test_no_matching_files(self, tmp_path, capsys):
+        with pytest.raises(SystemExit) as exit_info:
+            main(["info", str(tmp_path / "*.codif")])
+        assert exit_info.value.code == 2
+        assert capsys.readouterr().err.startswith("pycodif: error: No files match")
+
+    def test_missing_file(self, tmp_path, capsys):
+        with pytest.raises(SystemExit) as exit_info:
+            main(["headers", str(tmp_path / "missing.codif")])
+        assert exit_info.value.code == 2
+        assert "pycodif: error:" in capsys.readouterr().err
+
+    def test_truncated_file(self, tmp_path, capsys):
+        filename = tmp_path / "truncated.codif"
+        filename.write_bytes(b"\0" * 10)
+        with pytest.raises(SystemExit) as exit_info:
+            main(["index", str(filename)])
+        assert exit_info.value.code == 2
+        assert "too small to hold a CODIF header" in capsys.readouterr().err
+
+    def test_different_formats(self, tmp_path, capsys):
+        write_synthetic(tmp_path / "a.codif", 2)
+        write_synthetic(
+            tmp_path / "b.codif", 2, template=synthetic_template(channels=4)
+        )
+        with pytest.raises(SystemExit) as exit_info:
+            main(["info", str(tmp_path / "*.codif")])
+        assert exit_info.value.code == 2
+        assert "Cannot combine files with different" in capsys.readouterr().err
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from pycodif.beamform import beamform
+from pycodif.channelize import Channelizer
+from pycodif.correlate import (
+    Correlator,
+    baseline_pairs,
+    calibration_weights,
+    cross_power,
+)
+
+
+def noisy_source(n_antennas=4, n_samples=4096, seed=0):
+    """A common source seen by every antenna with its own phase, plus noise, in a
+    (station, group, thread, channel, sample) cube of one station and group."""
+    rng = np.random.default_rng(seed)
+    source = rng.standard_normal(n_samples) + 1j * rng.standard_normal(n_samples)
+    phases = rng.uniform(-np.pi, np.pi, n_antennas)
+    noise = 0.1 * (
+        rng.standard_normal((n_antennas, n_samples))
+        + 1j * rng.standard_normal((n_antennas, n_samples))
+    )
+    voltages = np.exp(1j * phases)[:, np.newaxis] * source + noise
+    return voltages.astype(np.complex64).reshape(1, 1, n_antennas, 1, n_samples), phases
+
+
+class TestCrossPower:
+    def test_matrix(self):
+        rng = np.random.default_rng(0)
+        spectra = rng.standard_normal((3, 2, 5)) + 1j * rng.standard_normal((3, 2, 5))
+        power = cross_power(spectra)
+
+        assert power.shape == (2, 3, 3)
+        expected = np.einsum("ift,jft->fij", spectra, spectra.conj())
+        np.testing.assert_allclose(power, expected)
+
+    def test_selected_baselines(self):
+        rng = np.random.default_rng(0)
+        spectra = rng.standard_normal((3, 2, 5)) + 1j * rng.standard_normal((3, 2, 5))
+        baselines = baseline_pairs(3, autos=False)
+
+        assert baselines.tolist() == [[0, 1], [0, 2], [1, 2]]
+        power = cross_power(spectra, baselines)
+        full = cross_power(spectra)
+        np.testing.assert_allclose(power, full[:, baselines[:, 0], baselines[:, 1]])
+
+
+class TestCorrelator:
+    def test_blocks_match_one_block(self):
+        cube, _ = noisy_source()
+        spectra = Channelizer(16, detect="voltage").process(cube)
+
+        whole = Correlator(integration=32).process(spectra)
+        correlator = Correlator(integration=32)
+        pieces = [
+            correlator.process(spectra[..., start : start + 20, :])
+            for start in range(0, spectra.shape[-2], 20)
+        ]
+
+        # (integration, coarse channel, fine channel, antenna, antenna)
+        assert whole.shape == (8, 1, 16, 4, 4)
+        np.testing.assert_allclose(np.concatenate(pieces), whole, rtol=1e-5)
+
+    def test_partial_integration_kept(self):
+        spectra = np.ones((1, 1, 2, 5, 4), dtype=np.complex64)
+        correlator = Correlator(integration=8, antenna_axes=3)
+        assert correlator.process(spectra).shape == (0, 4, 2, 2)
+        integrations = correlator.process(spectra)
+        assert integrations.shape == (1, 4, 2, 2)
+        np.testing.assert_allclose(integrations, 1)
+
+    def test_baselines(self):
+        cube, _ = noisy_source()
+        baselines = baseline_pairs(4)
+        full = Correlator(64).process(cube[..., 0, :, np.newaxis])
+        selected = Correlator(64, baselines=baselines).process(
+            cube[..., 0, :, np.newaxis]
+        )
+        assert selected.shape == full.shape[:-2] + (10,)
+        np.testing.assert_allclose(
+            selected, full[..., baselines[:, 0], baselines[:, 1]], rtol=1e-5
+        )
+
+    def test_integration_must_be_positive(self):
+        with pytest.raises(ValueError):
+            Correlator(0)
+
+
+class TestCalibrationWeights:
+    def test_phases_up_source(self):
+        cube, phases = noisy_source()
+        visibilities = Correlator(4096).process(cube[..., 0, :, np.newaxis])[0]
+        weights = calibration_weights(visibilities)
+
+        assert weights.shape == (1, 1, 4)
+        np.testing.assert_allclose(
+            np.angle(weights[0, 0] * np.exp(1j * (phases - phases[0]))), 0, atol=0.05
+        )
+
+        # The calibrated beam keeps nearly all of the source power.
+        data = cube.reshape(4, 1, -1)
+        beam = beamform(data, weights)
+        assert np.mean(np.abs(beam) ** 2) > 0.9 * np.mean(np.abs(data[0]) ** 2)
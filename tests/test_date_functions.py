@@ -1,11 +1,17 @@
+from datetime import datetime
+
 import numpy as np
 import pytest
 
 from pycodif.date_functions import (
+    SampleClock,
     calc_complete_sample_blocks_to_end_of_frame,
+    calc_sample_indices,
+    calc_sample_times,
     calc_time_of_all_samples_in_frame,
 )
-from pycodif.parsing import CODIFHeader
+from pycodif.parsing import CODIF, CODIFHeader
+from pycodif.synthetic import synthetic_template, write_synthetic
 
 
 class TestCalcCompleteSampleBlocks:
@@ -35,3 +41,65 @@ class TestCalcCompleteSampleBlocks:
         assert isinstance(time_of_samples, np.ndarray)
         assert len(time_of_samples) == 64
         assert np.isclose(time_of_samples[0], 0)
+
+
+@pytest.fixture
+def header():
+    with open("tests/test_files/test_codif.codif", "rb") as f:
+        return CODIFHeader(f)
+
+
+class TestVectorisedTimestamps:
+    def test_matches_per_frame(self, header):
+        frame_numbers = np.array([3, 4, 10])
+        expected = []
+        for frame_number in frame_numbers:
+            header.data_frame_number = int(frame_number)
+            expected.append(calc_time_of_all_samples_in_frame(header))
+
+        times = calc_sample_times(
+            frame_numbers,
+            64,
+            header.alignment_period,
+            header.sample_periods_per_alignment_period,
+        )
+        np.testing.assert_allclose(times, np.concatenate(expected))
+
+    def test_sample_indices(self):
+        indices = calc_sample_indices([0, 2], 64)
+        assert indices.dtype == np.int64
+        assert indices.tolist() == list(range(64)) + list(range(128, 192))
+
+
+class TestSampleClock:
+    def test_seconds(self, header):
+        clock = SampleClock.from_header(header, [5, 6])
+        assert len(clock) == 128
+        assert clock.epoch == datetime(2024, 10, 22, 1, 9, 40)
+        np.testing.assert_allclose(np.asarray(clock)[64:], clock[64:])
+        assert np.isclose(clock[-1], (6 * 64 + 63) * 27 / 51200000)
+
+    def test_datetimes_exact_over_long_observations(self, header):
+        # A day of 27 s alignment periods, expressed as one run of frame numbers.
+        frame_number = 3200 * 800000 + 1
+        clock = SampleClock.from_header(header, [frame_number])
+        times = clock.datetimes([0, 1])
+
+        assert times.dtype == np.dtype("M8[ns]")
+        start = np.datetime64(clock.epoch, "ns") + np.timedelta64(3200 * 27, "s")
+        # One frame is 64 samples of 27/51200000 s, 33750 ns.
+        assert (times - start).astype(np.int64).tolist() == [33750, 34277]
+
+    def test_several_samples_per_block(self, tmp_path):
+        # 4-bit real samples of 8 channels pack 8 samples into each 4-word block.
+        filename = tmp_path / "packed.codif"
+        template = synthetic_template(
+            channels=8, sample_size=4, is_complex=False, sample_block_length=4
+        )
+        write_synthetic(filename, 2, template, seed=0)
+        codif = CODIF(filename, cache_index=False)
+
+        assert codif.clock.samples_per_frame == 512
+        assert len(codif.timestamps) == codif.data.shape[-1]
+        header = codif.frames[next(iter(codif.frames))].header
+        assert len(calc_time_of_all_samples_in_frame(header)) == 512
@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+
+from pycodif.decoding import PayloadFormat, decode_payloads, upcast
+from pycodif.parsing import CODIFFrame, CODIFHeader
+
+
+def make_format(channels, sample_size, is_complex, representation, n_samples=16):
+    bits_per_sample = channels * sample_size * 2**is_complex
+    sample_block_length = max(bits_per_sample // 64, 1)
+    samples_per_block = sample_block_length * 64 // bits_per_sample
+    return PayloadFormat(
+        channels,
+        sample_size,
+        is_complex,
+        representation,
+        sample_block_length,
+        sample_block_length * n_samples // samples_per_block,
+    )
+
+
+class TestDecodePayloads:
+    def test_matches_test_file(self):
+        with open("tests/test_files/test_codif.codif", "rb") as f:
+            header = CODIFHeader(f)
+            payload = f.read(8 * header.data_array_length)
+
+        data = decode_payloads(payload, PayloadFormat.from_header(header))
+        assert data.dtype == np.complex64
+        assert data.shape == (8, 64)
+        assert data[0, 0] == -23 + 45j
+        assert data[-1, -1] == -43 + 58j
+
+    @pytest.mark.parametrize("sample_size", [8, 16, 32])
+    @pytest.mark.parametrize("is_complex", [0, 1])
+    def test_signed(self, sample_size, is_complex):
+        fmt = make_format(4, sample_size, is_complex, 1)
+        rng = np.random.default_rng(0)
+        values = rng.integers(
+            -(2 ** (sample_size - 1)),
+            2 ** (sample_size - 1),
+            size=(16, 4, 2**is_complex),
+        ).astype(f"<i{sample_size // 8}")
+
+        data = decode_payloads(values.tobytes(), fmt)
+
+        expected = values.astype(np.float64).transpose(1, 0, 2)
+        if is_complex:
+            assert data.dtype == np.complex64
+            expected = expected[..., 0] + 1j * expected[..., 1]
+        else:
+            assert data.dtype == np.float32
+            expected = expected[..., 0]
+        np.testing.assert_allclose(data, expected, rtol=1e-6)
+
+    def test_offset_binary(self):
+        fmt = make_format(2, 8, 1, 0)
+        values = np.arange(64, dtype=np.uint8) * 4
+        data = decode_payloads(values.tobytes(), fmt)
+
+        expected = values.astype(float).reshape(16, 2, 2).transpose(1, 0, 2) - 128
+        np.testing.assert_array_equal(data, expected[..., 0] + 1j * expected[..., 1])
+
+    @pytest.mark.parametrize("representation, offset", [(0, 8), (1, 0)])
+    def test_four_bit(self, representation, offset):
+        fmt = make_format(4, 4, 1, representation)
+        nibbles = np.arange(16 * 4 * 2) % 16
+        packed = (nibbles[0::2] | nibbles[1::2] << 4).astype(np.uint8)
+
+        data = decode_payloads(packed.tobytes(), fmt)
+
+        if representation == 1:
+            nibbles = np.where(nibbles >= 8, nibbles - 16, nibbles)
+        expected = (nibbles - offset).reshape(16, 4, 2).transpose(1, 0, 2)
+        np.testing.assert_array_equal(data, expected[..., 0] + 1j * expected[..., 1])
+
+    def test_float(self):
+        fmt = make_format(2, 32, 0, 2)
+        values = np.linspace(-1, 1, 32, dtype="<f4")
+        data = decode_payloads(values.tobytes(), fmt)
+        np.testing.assert_array_equal(data, values.reshape(16, 2).T)
+
+    def test_padded_sample_blocks(self):
+        # Three 16-bit complex channels fill 96 of the 128 bits in each sample block.
+        fmt = PayloadFormat(3, 16, 1, 1, 2, 8)
+        blocks = np.zeros((4, 8), dtype="<i2")
+        blocks[:, :6] = np.arange(24).reshape(4, 6)
+
+        data = decode_payloads(blocks.tobytes(), fmt)
+
+        assert fmt.samples_per_frame == 4
+        np.testing.assert_array_equal(data[1], [2 + 3j, 8 + 9j, 14 + 15j, 20 + 21j])
+
+    def test_many_frames_into_out(self):
+        with open("tests/test_files/test_codif_two_packets.codif", "rb") as f:
+            frames = [CODIFFrame(f), CODIFFrame(f)]
+        raw = np.fromfile("tests/test_files/test_codif_two_packets.codif", np.uint8)
+        payloads = raw.reshape(2, -1)[:, 64:]
+
+        out = np.zeros((2, 8, 128), dtype=np.complex64)
+        decode_payloads(
+            payloads, PayloadFormat.from_header(frames[0].header), out[..., 64:]
+        )
+
+        np.testing.assert_array_equal(out[..., :64], 0)
+        for i, frame in enumerate(frames):
+            np.testing.assert_array_equal(out[i, :, 64:], frame.data_array)
+
+    def test_wrong_out_shape(self):
+        fmt = make_format(4, 16, 1, 1)
+        with pytest.raises(ValueError, match="out must have shape"):
+            decode_payloads(bytes(256), fmt, out=np.empty((4, 8), np.complex64))
+
+
+class TestNativeSamples:
+    @pytest.mark.parametrize(
+        "sample_size, is_complex, representation, dtype",
+        [
+            (4, 1, 0, [("re", "i1"), ("im", "i1")]),
+            (8, 0, 1, "i1"),
+            (16, 1, 1, [("re", "i2"), ("im", "i2")]),
+            (16, 0, 0, "i2"),
+            (32, 1, 2, np.complex64),
+        ],
+    )
+    def test_matches_decoded(self, sample_size, is_complex, representation, dtype):
+        fmt = make_format(4, sample_size, is_complex, representation)
+        rng = np.random.default_rng(0)
+        if representation == 2:
+            payload = rng.standard_normal(fmt.data_array_length * 2).astype("<f4")
+        else:
+            payload = rng.integers(0, 256, fmt.data_array_length * 8, dtype=np.uint8)
+
+        native = decode_payloads(payload.tobytes(), fmt, native=True)
+        assert native.dtype == fmt.native_dtype == np.dtype(dtype)
+        np.testing.assert_array_equal(
+            upcast(native), decode_payloads(payload.tobytes(), fmt)
+        )
+
+    def test_halves_memory(self):
+        fmt = make_format(4, 16, 1, 1)
+        payload = bytes(fmt.data_array_length * 8)
+        native = decode_payloads(payload, fmt, native=True)
+        assert native.nbytes * 2 == decode_payloads(payload, fmt).nbytes
+
+    def test_upcast_leaves_floats(self):
+        data = np.ones(4, dtype=np.complex64)
+        assert upcast(data) is data
+        assert upcast(np.ones(4, dtype=np.int16)).dtype == np.float32
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from pycodif.dedisperse import Dedisperser, dedisperse, delay_table
+
+FREQUENCIES_MHZ = np.linspace(800, 830, 64)
+SAMPLE_TIME = 1e-4
+
+
+@pytest.fixture
+def pulse():
+    """Noise with a pulse at sample 300, dispersed with a DM of 20."""
+    rng = np.random.default_rng(2)
+    data = rng.normal(size=(3000, len(FREQUENCIES_MHZ))).astype(np.float32)
+    delays = delay_table(20, FREQUENCIES_MHZ, SAMPLE_TIME)
+    data[300 + delays, np.arange(len(FREQUENCIES_MHZ))] += 10
+    return data
+
+
+def reference(data, dm):
+    """The original one channel at a time dedispersion."""
+    delays = delay_table(dm, FREQUENCIES_MHZ, SAMPLE_TIME)
+    output = np.zeros((data.shape[0] - delays.max(), data.shape[1]))
+    for i, delay in enumerate(delays):
+        output[:, i] = data[delay : delay + output.shape[0], i]
+    return output
+
+
+class TestDedisperse:
+    def test_delays(self):
+        delays = delay_table([0, 20], FREQUENCIES_MHZ, SAMPLE_TIME)
+        assert delays.shape == (2, 64)
+        assert not delays[0].any()
+        assert delays[1, -1] == 0
+        assert delays[1, 0] == round(4.15e3 * 20 * (800**-2 - 830**-2) / 1e-4)
+
+    def test_matches_reference(self, pulse):
+        np.testing.assert_array_equal(
+            dedisperse(pulse, 20, FREQUENCIES_MHZ, SAMPLE_TIME), reference(pulse, 20)
+        )
+
+
+class TestDedisperser:
+    def test_single_dm_is_channel_sum(self, pulse):
+        series = Dedisperser(20, FREQUENCIES_MHZ, SAMPLE_TIME).process(pulse)
+        np.testing.assert_allclose(
+            series[0], reference(pulse, 20).sum(axis=1), atol=1e-4
+        )
+
+    @pytest.mark.parametrize("n_subbands", [None, 8])
+    def test_finds_pulse(self, pulse, n_subbands):
+        dms = np.arange(0, 40, 0.5)
+        series = Dedisperser(
+            dms, FREQUENCIES_MHZ, SAMPLE_TIME, n_subbands=n_subbands
+        ).process(pulse)
+
+        dm, sample = np.unravel_index(series.argmax(), series.shape)
+        assert dms[dm] == pytest.approx(20, abs=1)
+        assert sample == 300
+
+    @pytest.mark.parametrize("n_subbands", [None, 8])
+    # Chunks of 50 samples are shorter than the largest delay.
+    @pytest.mark.parametrize("chunk_size", [50, 250])
+    def test_chunks_match_whole(self, pulse, n_subbands, chunk_size):
+        dms = np.arange(0, 40, 2.0)
+        whole = Dedisperser(dms, FREQUENCIES_MHZ, SAMPLE_TIME, n_subbands).process(
+            pulse
+        )
+
+        dedisperser = Dedisperser(dms, FREQUENCIES_MHZ, SAMPLE_TIME, n_subbands)
+        chunks = [
+            dedisperser.process(pulse[i : i + chunk_size])
+            for i in range(0, 3000, chunk_size)
+        ]
+        np.testing.assert_allclose(np.concatenate(chunks, axis=1), whole, atol=1e-4)
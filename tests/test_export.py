@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+import pytest
+
+from pycodif.cli import main
+from pycodif.export import export, store_format_for
+from pycodif.parsing import CODIF
+from pycodif.synthetic import write_synthetic
+
+
+class TestStoreFormat:
+    def test_from_suffix(self):
+        assert store_format_for("out.h5") == "hdf5"
+        assert store_format_for("out.zarr/") == "zarr"
+
+    def test_unknown_suffix(self):
+        with pytest.raises(ValueError, match="suffix"):
+            store_format_for("out.npy")
+
+
+class TestExport:
+    def test_hdf5(self, tmp_path, two_packets):
+        h5py = pytest.importorskip("h5py")
+        codif = CODIF(two_packets, lazy=True)
+        path = tmp_path / "out.h5"
+        export(codif, path, chunk_frames=1, compression="gzip")
+
+        with h5py.File(path, "r") as f:
+            np.testing.assert_array_equal(f["data"][...], np.asarray(codif.data))
+            np.testing.assert_array_equal(
+                f["timestamps"][...], np.asarray(codif.timestamps)
+            )
+            assert f["data"].chunks == (1, 1, 1, 8, 64)
+            assert f.attrs["groups"].tolist() == [14, 17]
+            assert f.attrs["sample_size"] == 16
+
+    def test_hdf5_native(self, tmp_path, two_packets):
+        h5py = pytest.importorskip("h5py")
+        codif = CODIF(two_packets, lazy=True, native=True)
+        path = tmp_path / "out.h5"
+        export(codif, path)
+
+        with h5py.File(path, "r") as f:
+            assert f["data"].dtype == codif.data.dtype
+            np.testing.assert_array_equal(f["data"][...], codif.data[...])
+
+    def test_zarr(self, tmp_path, two_packets):
+        zarr = pytest.importorskip("zarr")
+        codif = CODIF(two_packets, lazy=True)
+        path = tmp_path / "out.zarr"
+        export(codif, path)
+
+        store = zarr.open_group(path, mode="r")
+        np.testing.assert_array_equal(store["data"][...], np.asarray(codif.data))
+        assert store.attrs["threads"] == [215]
+
+    def test_zarr_streams_written_concurrently(self, tmp_path):
+        zarr = pytest.importorskip("zarr")
+        filename = tmp_path / "streams.codif"
+        write_synthetic(filename, 7, groups=(0, 1, 2), threads=(0, 1), seed=0)
+        codif = CODIF(filename, lazy=True)
+        path = tmp_path / "out.zarr"
+        # Blocks of 3 data frames end part way through chunks of 2.
+        export(codif, path, chunk_frames=2, block_frames=3, write_workers=3)
+
+        store = zarr.open_group(path, mode="r")
+        np.testing.assert_array_equal(store["data"][...], np.asarray(codif.data))
+
+    def test_cli(self, tmp_path, two_packets):
+        h5py = pytest.importorskip("h5py")
+        path = tmp_path / "out.h5"
+        main(["convert", two_packets, "-o", str(path), "--block-frames", "1"])
+
+        with h5py.File(path, "r") as f:
+            assert f["data"].shape == (1, 2, 1, 8, 64)
+
+    def test_cli_stats(self, tmp_path, two_packets):
+        pytest.importorskip("h5py")
+        stats_path = tmp_path / "stats.json"
+        main(
+            [
+                "convert",
+                two_packets,
+                "-o",
+                str(tmp_path / "out.h5"),
+                "--stats",
+                str(stats_path),
+            ]
+        )
+
+        stats = json.loads(stats_path.read_text())
+        assert stats["stages"]["assembly"]["frames"] == 2
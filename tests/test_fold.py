@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from pycodif.fold import Ephemeris, Folder, fold
+
+SAMPLE_TIME = 1e-3
+
+
+@pytest.fixture
+def pulse_train():
+    """Two channels, with a pulse in the second every 89.33 ms, starting at 20 ms."""
+    times = np.arange(20000) * SAMPLE_TIME
+    data = np.zeros((len(times), 2))
+    phase = ((times - 0.02) / 0.08933) % 1
+    data[phase < SAMPLE_TIME / 0.08933, 1] = 1
+    return data, times
+
+
+class TestEphemeris:
+    def test_phase(self):
+        ephemeris = Ephemeris(period=0.1, period_derivative=1e-6, epoch=5.0)
+        assert ephemeris.phase(5.0) == 0
+        assert ephemeris.phase(6.0) == pytest.approx(10 - 0.5 * 1e-4)
+
+
+class TestFolder:
+    def test_finds_pulse(self, pulse_train):
+        data, times = pulse_train
+        profile = fold(data, times, 50, Ephemeris(0.08933))
+
+        assert profile.shape == (50, 2)
+        assert not profile[:, 0].any()
+        assert profile[:, 1].argmax() == int(0.02 / 0.08933 * 50)
+
+    def test_incremental_matches_whole(self, pulse_train):
+        data, times = pulse_train
+        folder = Folder(32, Ephemeris(0.08933))
+        for start in range(0, len(data), 1500):
+            folder.add(data[start : start + 1500], times[start : start + 1500])
+
+        np.testing.assert_allclose(
+            folder.profile, fold(data, times, 32, Ephemeris(0.08933))
+        )
+        assert folder.counts.sum() == len(data)
+
+    def test_weights(self, pulse_train):
+        data, times = pulse_train
+        folder = Folder(16, Ephemeris(0.08933))
+        weights = np.ones(len(data))
+        weights[::2] = 0
+        folder.add(data, times, weights)
+        assert folder.counts.sum() == len(data) // 2
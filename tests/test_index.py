@@ -0,0 +1,132 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from pycodif.bulk import MappedCODIF
+from pycodif.index import FrameIndex, frame_sequence, index_path
+
+
+@pytest.fixture
+def codif_file(tmp_path):
+    filename = tmp_path / "capture.codif"
+    shutil.copy("tests/test_files/test_codif.codif", filename)
+    return filename
+
+
+def append_frames(filename, source="tests/test_files/test_codif_two_packets.codif"):
+    with open(source, "rb") as f:
+        data = f.read()
+    with open(filename, "ab") as f:
+        f.write(data)
+
+
+class TestFrameIndex:
+    def test_entries(self):
+        index = FrameIndex.from_mapped(
+            MappedCODIF("tests/test_files/test_codif_two_packets.codif")
+        )
+        assert len(index) == 2
+        assert index.entries["offset"].tolist() == [0, 2112]
+        assert index.entries["group_id"].tolist() == [17, 14]
+        assert not index.entries["invalid"].any()
+        assert not index.entries["sync_error"].any()
+        assert np.allclose(index.entries["frame_time_offset"], 16.120485)
+        assert index.lookup((477644, 215, 14, 926, "KP")) == 1
+        assert index.positions.shape == (1, 2, 1, 1)
+
+    def test_sidecar_written_and_reused(self, codif_file, monkeypatch):
+        index = FrameIndex.open(MappedCODIF(codif_file))
+        assert os.path.exists(index_path(codif_file))
+
+        def fail(*args, **kwargs):
+            raise AssertionError("headers were rescanned")
+
+        monkeypatch.setattr(FrameIndex, "entries_from_mapped", staticmethod(fail))
+        reopened = FrameIndex.open(MappedCODIF(codif_file))
+        np.testing.assert_array_equal(reopened.entries, index.entries)
+
+    def test_appended_frames_indexed_incrementally(self, codif_file, monkeypatch):
+        FrameIndex.open(MappedCODIF(codif_file))
+        append_frames(codif_file)
+
+        starts = []
+        entries_from_mapped = FrameIndex.entries_from_mapped
+
+        def record_start(mapped, start=0):
+            starts.append(start)
+            return entries_from_mapped(mapped, start)
+
+        monkeypatch.setattr(
+            FrameIndex, "entries_from_mapped", staticmethod(record_start)
+        )
+        index = FrameIndex.open(MappedCODIF(codif_file))
+
+        assert starts == [1]
+        assert len(index) == 3
+        assert index.entries["offset"].tolist() == [0, 2112, 4224]
+        assert len(FrameIndex.load(index_path(codif_file))) == 3
+
+    def test_modified_in_place_rebuilt(self, codif_file, monkeypatch):
+        FrameIndex.open(MappedCODIF(codif_file))
+        stat = os.stat(codif_file)
+        os.utime(codif_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        starts = []
+        entries_from_mapped = FrameIndex.entries_from_mapped
+
+        def record_start(mapped, start=0):
+            starts.append(start)
+            return entries_from_mapped(mapped, start)
+
+        monkeypatch.setattr(
+            FrameIndex, "entries_from_mapped", staticmethod(record_start)
+        )
+        index = FrameIndex.open(MappedCODIF(codif_file))
+
+        assert starts == [0]
+        assert len(index) == 1
+        assert FrameIndex.load(index_path(codif_file)).mtime_ns == (
+            stat.st_mtime_ns + 10**9
+        )
+
+    def test_rewritten_file_reindexed(self, codif_file):
+        FrameIndex.open(MappedCODIF(codif_file))
+        shutil.copy("tests/test_files/test_codif_two_packets.codif", codif_file)
+
+        index = FrameIndex.open(MappedCODIF(codif_file))
+        assert index.entries["group_id"].tolist() == [17, 14]
+
+    def test_no_cache(self, codif_file):
+        FrameIndex.open(MappedCODIF(codif_file), cache=False)
+        assert not os.path.exists(index_path(codif_file))
+
+    def test_corrupt_frame_number_left_out(self, tmp_path, codif_frame):
+        filename = tmp_path / "corrupt.codif"
+        filename.write_bytes(
+            codif_frame(17, 0)
+            + codif_frame(14, 0)
+            + codif_frame(17, 400_000_000)
+            + codif_frame(14, 1)
+        )
+        index = FrameIndex.from_mapped(MappedCODIF(filename))
+
+        assert index.out_of_sequence == 1
+        assert index.frame_numbers.tolist() == [0, 1]
+        assert index.valid.sum() == 3
+
+
+class TestFrameSequence:
+    def test_counts_on_across_alignment_periods(self):
+        index = FrameIndex.from_mapped(MappedCODIF("tests/test_files/test_codif.codif"))
+        entries = np.repeat(index.entries, 3)
+        entries["data_frame_number"] = [477644, 0, 5]
+        entries["epoch_offset"] += [0, 27, 54]
+
+        # 51200000 sample periods per 27 s alignment period, 64 per frame.
+        assert frame_sequence(entries, index.header).tolist() == [
+            477644,
+            800000,
+            1600005,
+        ]
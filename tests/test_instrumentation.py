@@ -0,0 +1,104 @@
+import json
+
+import numpy as np
+
+from pycodif.channelize import Channelizer
+from pycodif.instrumentation import NULL_STATS, Stats
+from pycodif.parsing import CODIF
+from pycodif.readahead import ReadAheadOptions
+from pycodif.synthetic import write_synthetic
+
+
+class TestStats:
+    def test_stage_totals(self):
+        stats = Stats()
+        for _ in range(3):
+            with stats.stage("decode", frames=2, nbytes=100) as call:
+                call.add(frames=1)
+
+        stage = stats.as_dict()["stages"]["decode"]
+        assert stage["calls"] == 3
+        assert stage["frames"] == 9
+        assert stage["bytes"] == 300
+        assert stage["wall_seconds"] >= 0
+
+    def test_queue_depth(self):
+        stats = Stats()
+        for depth in (1, 3, 2):
+            stats.queue_depth("readahead", depth)
+        assert stats.as_dict()["queues"]["readahead"] == {"depth": 2, "max_depth": 3}
+
+    def test_exports(self, tmp_path):
+        stats = Stats()
+        with stats.stage("read", frames=4, nbytes=1024):
+            pass
+        stats.queue_depth("readahead", 1)
+
+        assert json.loads(stats.to_json())["stages"]["read"]["frames"] == 4
+        text = stats.to_prometheus()
+        assert "# TYPE pycodif_stage_frames_total counter" in text
+        assert 'pycodif_stage_bytes_total{stage="read"} 1024' in text
+        assert 'pycodif_queue_max_depth{queue="readahead"} 1' in text
+
+        stats.write(tmp_path / "stats.prom")
+        assert (tmp_path / "stats.prom").read_text() == text
+
+    def test_null_stats_record_nothing(self):
+        with NULL_STATS.stage("decode", frames=1) as call:
+            call.add(frames=1)
+        NULL_STATS.queue_depth("readahead", 1)
+        assert NULL_STATS.as_dict()["stages"] == {}
+        assert NULL_STATS.as_dict()["queues"] == {}
+
+
+class TestInstrumentedReading:
+    def test_codif_stages(self, two_packets):
+        stats = Stats()
+        codif = CODIF(two_packets, cache_index=False, stats=stats)
+        stages = stats.as_dict()["stages"]
+
+        assert codif.stats is stats
+        assert stages["index"]["frames"] == 2
+        assert stages["index"]["bytes"] == 2 * 64
+        assert stages["assembly"]["frames"] == 2
+        assert stages["assembly"]["bytes"] == 2 * 2112
+        assert stages["timestamps"]["calls"] == 1
+
+        # The memory-mapped path splits assembly into its parts.
+        for name in ("gather", "decode", "scatter"):
+            assert stages[name]["frames"] == 2
+        assert stages["gather"]["bytes"] == 2 * 2048
+        assert stages["scatter"]["bytes"] == codif.data.nbytes
+
+    def test_disabled_by_default(self, two_packets):
+        assert CODIF(two_packets, lazy=True).stats is NULL_STATS
+
+    def test_readahead_stages(self, tmp_path):
+        filename = tmp_path / "synthetic.codif"
+        write_synthetic(filename, 64, seed=0)
+        stats = Stats()
+        codif = CODIF(
+            str(filename),
+            lazy=True,
+            readahead=ReadAheadOptions(buffer_frames=16, depth=2),
+            stats=stats,
+        )
+        codif.data[...]
+        stats = stats.as_dict()
+
+        assert stats["stages"]["read"]["calls"] == 4
+        assert stats["stages"]["read"]["frames"] == 64
+        assert stats["stages"]["decode"]["frames"] == 64
+        assert stats["stages"]["scatter"]["frames"] == 64
+        assert 1 <= stats["queues"]["readahead"]["max_depth"] <= 2
+
+    def test_dsp_stage(self):
+        stats = Stats()
+        channelizer = Channelizer(16, stats=stats)
+        block = np.zeros((2, 256), dtype=np.complex64)
+        channelizer.process(block)
+        channelizer.process(block)
+
+        stage = stats.as_dict()["stages"]["channelize"]
+        assert stage["calls"] == 2
+        assert stage["bytes"] == 2 * block.nbytes
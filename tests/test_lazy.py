@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from pycodif.channelize import channelize
+from pycodif.decoding import upcast
+from pycodif.parsing import CODIF
+
+
+@pytest.fixture
+def four_frame_file(tmp_path, codif_frame):
+    """Two groups with two consecutive data frames each."""
+    filename = tmp_path / "four_frames.codif"
+    filename.write_bytes(
+        b"".join(
+            codif_frame(group, data_frame_number)
+            for data_frame_number in (477644, 477645)
+            for group in (17, 14)
+        )
+    )
+    return filename
+
+
+class TestCODIFArray:
+    def test_shape(self, four_frame_file):
+        codif = CODIF(four_frame_file, lazy=True)
+        assert codif.data.shape == (1, 2, 1, 8, 128)
+        assert codif.data.ndim == 5
+        assert len(codif.data) == 1
+
+    def test_full_read_matches_frames(self, four_frame_file):
+        codif = CODIF(four_frame_file, lazy=True)
+        data = np.asarray(codif.data)
+
+        assert data.dtype == np.complex64
+        for (frame_number, _, group, _, _), frame in codif.frames.items():
+            j = {14: 0, 17: 1}[group]
+            start = (frame_number - 477644) * 64
+            np.testing.assert_array_equal(
+                data[0, j, 0, :, start : start + 64], frame.data_array
+            )
+
+    def test_slices_match_full_read(self, four_frame_file):
+        codif = CODIF(four_frame_file, lazy=True)
+        data = np.asarray(codif.data)
+
+        np.testing.assert_array_equal(codif.data[0, 1], data[0, 1])
+        np.testing.assert_array_equal(codif.data[..., 60:70], data[..., 60:70])
+        np.testing.assert_array_equal(codif.data[0, :, 0, 3, -5], data[0, :, 0, 3, -5])
+        np.testing.assert_array_equal(
+            codif.data[:, [1, 0], :, ::3, 100:], data[:, [1, 0], :, ::3, 100:]
+        )
+
+    def test_flatten_groups(self, four_frame_file):
+        codif = CODIF(four_frame_file, flatten_groups=True, lazy=True)
+        cube = CODIF(four_frame_file, lazy=True).data[...]
+
+        assert codif.data.shape == (16, 128)
+        flat = cube.reshape(16, 128)
+        np.testing.assert_array_equal(codif.data[9], flat[9])
+        np.testing.assert_array_equal(codif.data[[2, 12], 64:], flat[[2, 12], 64:])
+
+    def test_out_of_bounds(self, four_frame_file):
+        codif = CODIF(four_frame_file, lazy=True)
+        with pytest.raises(IndexError):
+            codif.data[0, 2]
+        with pytest.raises(IndexError):
+            codif.data[0, 0, 0, 0, 0, 0]
+
+    def test_eager_data_matches_lazy(self, four_frame_file):
+        eager = CODIF(four_frame_file)
+        lazy = CODIF(four_frame_file, lazy=True)
+        np.testing.assert_array_equal(eager.data, lazy.data[...])
+        assert len(eager.timestamps) == eager.data.shape[-1]
+
+
+class TestNativeSamples:
+    def test_matches_decoded(self, four_frame_file):
+        native = CODIF(four_frame_file, lazy=True, native=True)
+        decoded = CODIF(four_frame_file)
+        assert native.data.dtype == np.dtype([("re", "<i2"), ("im", "<i2")])
+
+        np.testing.assert_array_equal(upcast(native.data[...]), decoded.data)
+        np.testing.assert_array_equal(
+            upcast(native.data[0, 1, 0, :, 10:20]), decoded.data[0, 1, 0, :, 10:20]
+        )
+
+    def test_blocks_channelize_the_same(self, four_frame_file):
+        native = CODIF(four_frame_file, native=True)
+        decoded = CODIF(four_frame_file)
+        np.testing.assert_allclose(
+            channelize(native.data, 16), channelize(decoded.data, 16)
+        )
+
+    def test_nan_fill_raises(self, four_frame_file):
+        with pytest.raises(ValueError, match="fill_value must be an integer"):
+            CODIF(four_frame_file, lazy=True, native=True, fill_value=np.nan)
@@ -0,0 +1,59 @@
+import struct
+
+import numpy as np
+import pytest
+
+from pycodif.parsing import CODIF
+
+
+@pytest.fixture
+def split_files(tmp_path, codif_frame):
+    """The two groups of the two packet file, each written to its own file."""
+    filenames = []
+    for i, group in enumerate((17, 14)):
+        filename = tmp_path / f"part_{i}.codif"
+        filename.write_bytes(codif_frame(group))
+        filenames.append(filename)
+    return filenames
+
+
+class TestMultipleFiles:
+    def test_list_matches_single_file(self, split_files, two_packets):
+        single = CODIF(two_packets, cache_index=False)
+        combined = CODIF(split_files, cache_index=False)
+
+        assert combined.data.shape == single.data.shape
+        np.testing.assert_array_equal(combined.data, single.data)
+        np.testing.assert_array_equal(combined.timestamps, single.timestamps)
+
+    def test_glob(self, split_files, tmp_path):
+        codif = CODIF(str(tmp_path / "part_*.codif"), cache_index=False)
+        assert [str(f) for f in codif.filenames] == [str(f) for f in split_files]
+        assert codif.data.shape == (1, 2, 1, 8, 64)
+
+    def test_glob_without_matches_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            CODIF(str(tmp_path / "missing_*.codif"))
+
+    def test_frames_from_each_file(self, split_files, two_packets):
+        codif = CODIF(split_files, cache_index=False)
+        single = CODIF(two_packets, cache_index=False)
+
+        assert set(codif.frames) == set(single.frames)
+        for key in single.frames:
+            np.testing.assert_array_equal(
+                codif.frames[key].data_array, single.frames[key].data_array
+            )
+
+    def test_lazy_parallel(self, split_files, two_packets):
+        single = CODIF(two_packets, cache_index=False)
+        codif = CODIF(split_files, lazy=True, cache_index=False, workers=2)
+        np.testing.assert_array_equal(codif.data[0, 1], single.data[0, 1])
+
+    def test_different_formats_raise(self, split_files):
+        data = bytearray(split_files[1].read_bytes())
+        struct.pack_into("<H", data, 14, 2)  # alignment_period
+        split_files[1].write_bytes(bytes(data))
+
+        with pytest.raises(ValueError, match="alignment_period"):
+            CODIF(split_files, cache_index=False)
@@ -0,0 +1,135 @@
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from pycodif.constants import CODIF_HEADER_SIZE
+from pycodif.network import CODIFReceiver, replay
+from pycodif.parsing import CODIF
+
+
+def send_paced(address, packets, packets_per_second: float = 200.0):
+    """Sends `packets` from a thread at a steady rate, returning the thread."""
+
+    def send():
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            for packet in packets:
+                sender.sendto(packet, address)
+                time.sleep(1 / packets_per_second)
+
+    thread = threading.Thread(target=send)
+    thread.start()
+    return thread
+
+
+@pytest.fixture
+def capture(tmp_path, codif_frame):
+    """Two groups over data frames 0 to 4, with group 17 missing frame 2."""
+    filename = tmp_path / "capture.codif"
+    filename.write_bytes(
+        b"".join(
+            codif_frame(group, data_frame_number)
+            for data_frame_number in range(5)
+            for group in (17, 14)
+            if (data_frame_number, group) != (2, 17)
+        )
+    )
+    return filename
+
+
+class TestCODIFReceiver:
+    def test_blocks_match_file(self, capture):
+        with CODIFReceiver("127.0.0.1", n_frames=2, timeout=0.2) as receiver:
+            assert replay(capture, *receiver.address) == 9
+            blocks = list(receiver.iter_blocks())
+
+        expected = list(CODIF(capture, lazy=True).iter_blocks(n_frames=2))
+        assert len(blocks) == 3
+        assert receiver.dropped == {
+            "bad": 0,
+            "late": 0,
+            "unknown_stream": 0,
+            "ahead": 0,
+        }
+        for block, reference in zip(blocks, expected):
+            n_samples = reference.data.shape[-1]
+            np.testing.assert_array_equal(block.data[..., :n_samples], reference.data)
+            np.testing.assert_allclose(
+                block.timestamps[:n_samples], reference.timestamps
+            )
+            assert block.start_sample == reference.start_sample
+            np.testing.assert_array_equal(
+                block.valid[..., : reference.valid.shape[-1]], reference.valid
+            )
+
+        # The last block is padded out with empty frames.
+        assert not blocks[-1].valid[..., 1].any()
+
+    def test_unknown_streams_dropped(self, capture):
+        with CODIFReceiver(
+            "127.0.0.1", n_frames=8, timeout=0.2, groups=[14]
+        ) as receiver:
+            replay(capture, *receiver.address)
+            (block,) = receiver.iter_blocks()
+
+        assert block.data.shape == (1, 1, 1, 8, 8 * 64)
+        assert receiver.dropped["unknown_stream"] == 4
+
+    def test_stray_packets_skipped(self, capture, codif_frame):
+        with CODIFReceiver("127.0.0.1", n_frames=2, timeout=0.2) as receiver:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+                sender.sendto(b"not a CODIF frame", receiver.address)
+                sender.sendto(codif_frame(17, 0)[:CODIF_HEADER_SIZE], receiver.address)
+                sender.sendto(codif_frame(17, 0), receiver.address)
+                # Far ahead of the rest of the stream.
+                sender.sendto(codif_frame(14, 400), receiver.address)
+            replay(capture, *receiver.address)
+            blocks = list(receiver.iter_blocks())
+
+        assert len(blocks) == 3
+        assert receiver.dropped["bad"] == 2
+        assert receiver.dropped["ahead"] == 1
+
+    def test_paced_interleaved_sender(self, capture, codif_frame):
+        # Group 14 starts alone and out of order, and group 17 joins after warm-up.
+        order = [(1, 14), (0, 14), (0, 17), (1, 17), (2, 14)]
+        order += [(frame, group) for frame in (3, 4) for group in (17, 14)]
+        packets = [codif_frame(group, frame) for frame, group in order]
+        with CODIFReceiver(
+            "127.0.0.1", n_frames=2, timeout=0.5, warmup_packets=2
+        ) as receiver:
+            sender = send_paced(receiver.address, packets)
+            blocks = list(receiver.iter_blocks())
+            sender.join()
+
+        expected = list(CODIF(capture, lazy=True).iter_blocks(n_frames=2))
+        assert receiver.dropped == {
+            "bad": 0,
+            "late": 0,
+            "unknown_stream": 0,
+            "ahead": 0,
+        }
+        np.testing.assert_array_equal(receiver.groups, [14, 17])
+        assert [block.start_sample for block in blocks] == [
+            block.start_sample for block in expected
+        ]
+        for block, reference in zip(blocks, expected):
+            n_samples = reference.data.shape[-1]
+            np.testing.assert_array_equal(block.data[..., :n_samples], reference.data)
+
+    def test_corrupt_first_frame_number(self, capture, codif_frame):
+        packets = [codif_frame(17, 400_000)]
+        packets += [
+            codif_frame(group, frame) for frame in range(5) for group in (17, 14)
+        ]
+        with CODIFReceiver("127.0.0.1", n_frames=2, timeout=0.5) as receiver:
+            sender = send_paced(receiver.address, packets)
+            blocks = list(receiver.iter_blocks())
+            sender.join()
+
+        assert receiver.first_sequence == 0
+        assert len(blocks) == 3
+        assert receiver.dropped["ahead"] == 1
+        assert receiver.dropped["late"] == 0
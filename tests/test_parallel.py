@@ -0,0 +1,60 @@
+import gc
+import weakref
+
+import numpy as np
+import pytest
+
+from pycodif.parallel import SharedCube
+from pycodif.parsing import CODIF
+
+
+class TestParallelDecode:
+    def test_matches_serial(self):
+        serial = CODIF("tests/test_files/test_codif_two_packets.codif")
+        parallel = CODIF("tests/test_files/test_codif_two_packets.codif", workers=2)
+        np.testing.assert_array_equal(parallel.data, serial.data)
+
+    def test_lazy_reads(self):
+        codif = CODIF(
+            "tests/test_files/test_codif_two_packets.codif", lazy=True, workers=2
+        )
+        serial = CODIF("tests/test_files/test_codif_two_packets.codif")
+        np.testing.assert_array_equal(
+            codif.data[0, 1, 0, :, 10:20], serial.data[0, 1, 0, :, 10:20]
+        )
+
+    def test_data_outlives_codif(self):
+        data = CODIF("tests/test_files/test_codif.codif", workers=2).data
+        assert data[0, 0, 0, 0, 0] == -23 + 45j
+
+    def test_views_keep_shared_memory(self):
+        view = CODIF("tests/test_files/test_codif.codif", workers=2).data[0, 0, 0]
+        gc.collect()
+        assert view[0, 0] == -23 + 45j
+
+        base = view.base
+        while isinstance(base, np.ndarray):
+            base = base.base
+        assert isinstance(base, SharedCube)
+
+        cube = weakref.ref(base)
+        del view, base
+        gc.collect()
+        assert cube() is None
+
+    def test_pool_reused_until_close(self):
+        with CODIF(
+            "tests/test_files/test_codif_two_packets.codif", lazy=True, workers=2
+        ) as codif:
+            assert codif.data.pool is codif.pool
+            blocks = list(codif.iter_blocks(n_frames=1))
+            np.testing.assert_array_equal(blocks[0].data, codif.data[...])
+        with pytest.raises(RuntimeError):
+            codif.pool.submit(int)
+
+    def test_native(self):
+        serial = CODIF("tests/test_files/test_codif_two_packets.codif", native=True)
+        parallel = CODIF(
+            "tests/test_files/test_codif_two_packets.codif", workers=2, native=True
+        )
+        np.testing.assert_array_equal(parallel.data, serial.data)
@@ -3,6 +3,7 @@ from datetime import datetime
 import numpy as np
 import pytest
 
+from pycodif.lazy import CODIFArray
 from pycodif.parsing import CODIF, CODIFFrame, CODIFHeader
 
 
@@ -59,6 +60,16 @@ class TestCODIFHeader:
                 2024, 10, 22, 1, 9, 56, 120485
             )
 
+    def test_slotted(self):
+        with open("tests/test_files/test_codif.codif", "rb") as f:
+            first = CODIFHeader(f)
+            f.seek(0)
+            second = CODIFHeader(f)
+        assert not hasattr(first, "__dict__")
+        # Headers with the same reference epoch share one epoch date.
+        assert first.epoch_date is second.epoch_date
+        assert first.start_frame_timestamp is first.start_frame_timestamp
+
 
 class TestCODIFFrame:
     @pytest.fixture()
@@ -102,3 +113,96 @@ class TestCODIF:
             "tests/test_files/test_codif_two_packets.codif", flatten_groups=True
         )
         assert len(codif.data.shape) == 2
+
+    def test_lazy_data(self):
+        codif = CODIF("tests/test_files/test_codif_two_packets.codif", lazy=True)
+        assert isinstance(codif.data, CODIFArray)
+        assert codif.data.shape == (1, 2, 1, 8, 64)
+        assert len(codif.frames) == 2
+
+    def test_lazy_timestamps(self):
+        eager = CODIF("tests/test_files/test_codif_two_packets.codif")
+        lazy = CODIF("tests/test_files/test_codif_two_packets.codif", lazy=True)
+        assert len(lazy.timestamps) == len(eager.timestamps)
+        np.testing.assert_array_equal(lazy.timestamps[10:20], eager.timestamps[10:20])
+
+    def test_iter_blocks(self):
+        codif = CODIF("tests/test_files/test_codif_two_packets.codif", lazy=True)
+        blocks = list(codif.iter_blocks(n_frames=1))
+        assert len(blocks) == 1
+
+        block = blocks[0]
+        assert block.data.shape == (1, 2, 1, 8, 64)
+        assert block.start_sample == 0
+        assert len(block.timestamps) == 64
+        assert np.isclose(block.timestamps[0], 16.120485)
+
+        # Groups are in ascending order.
+        frame = codif.frames[(477644, 215, 14, 926, "KP")]
+        np.testing.assert_array_equal(block.data[0, 0, 0], frame.data_array)
+
+    def test_iter_blocks_flatten_groups(self):
+        codif = CODIF(
+            "tests/test_files/test_codif_two_packets.codif",
+            flatten_groups=True,
+            lazy=True,
+        )
+        (block,) = codif.iter_blocks()
+        assert block.data.shape == (16, 64)
+
+
+@pytest.fixture
+def lossy_file(tmp_path, codif_frame):
+    """Group 17 has frame 2 dropped. Group 14 has frame 1 flagged invalid and two
+    copies of frame 2, the second filled with ones."""
+    filename = tmp_path / "lossy.codif"
+    filename.write_bytes(
+        codif_frame(17, 0)
+        + codif_frame(14, 0)
+        + codif_frame(17, 1)
+        + codif_frame(14, 1, invalid=True)
+        + codif_frame(14, 2)
+        + codif_frame(14, 2, fill=1)
+        + codif_frame(17, 3)
+        + codif_frame(14, 3)
+    )
+    return filename
+
+
+class TestMissingFrames:
+    def test_validity(self, lossy_file):
+        codif = CODIF(lossy_file, cache_index=False)
+
+        assert codif.index.frame_numbers.tolist() == [0, 1, 2, 3]
+        assert codif.index.duplicates == 1
+        # Groups are ordered 14, 17.
+        assert codif.valid[0, :, 0].tolist() == [
+            [True, False, True, True],
+            [True, True, False, True],
+        ]
+        assert codif.index.invalid[0, :, 0, 1].tolist() == [True, False]
+
+    def test_frames_placed_by_number(self, lossy_file):
+        codif = CODIF(lossy_file, cache_index=False)
+        reference = CODIF("tests/test_files/test_codif_two_packets.codif").data
+
+        assert codif.data.shape == (1, 2, 1, 8, 4 * 64)
+        for j in range(2):
+            for f in np.flatnonzero(codif.valid[0, j, 0]):
+                np.testing.assert_array_equal(
+                    codif.data[0, j, 0, :, f * 64 : (f + 1) * 64], reference[0, j, 0]
+                )
+        assert not codif.data[0, 0, 0, :, 64:128].any()
+        assert not codif.data[0, 1, 0, :, 128:192].any()
+
+    def test_nan_fill(self, lossy_file):
+        codif = CODIF(lossy_file, lazy=True, cache_index=False, fill_value=np.nan)
+        assert np.isnan(codif.data[0, 0, 0, :, 64:128]).all()
+        assert not np.isnan(codif.data[0, 0, 0, :, :64]).any()
+
+    def test_blocks_carry_validity(self, lossy_file):
+        codif = CODIF(lossy_file, lazy=True, cache_index=False)
+        blocks = list(codif.iter_blocks(n_frames=3))
+        np.testing.assert_array_equal(
+            np.concatenate([block.valid for block in blocks], axis=-1), codif.valid
+        )
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from pycodif.bulk import MappedCODIF
+from pycodif.parsing import CODIF
+from pycodif.readahead import ReadAhead, ReadAheadOptions, frame_runs
+
+
+@pytest.fixture
+def long_file(tmp_path, codif_frame):
+    """The two packet file repeated, so there are six streams of frames."""
+    filename = tmp_path / "long.codif"
+    # Each copy has its own thread id.
+    filename.write_bytes(
+        b"".join(
+            codif_frame(group, thread_id=thread)
+            for thread in range(3)
+            for group in (17, 14)
+        )
+    )
+    return filename
+
+
+class TestFrameRuns:
+    def test_skips_long_gaps(self):
+        positions = np.array([0, 1, 3, 20, 21, 50])
+        assert frame_runs(positions, 8) == [(0, 4), (20, 22), (50, 51)]
+
+    def test_empty(self):
+        assert frame_runs(np.array([], dtype=np.int64), 8) == []
+
+
+class TestReadAhead:
+    def test_pieces_match_file(self, long_file):
+        mapped = MappedCODIF(long_file)
+        reader = ReadAhead(
+            long_file, mapped.frame_size, [(0, 5)], ReadAheadOptions(2, 1)
+        )
+        pieces = [(start, frames.copy()) for start, frames in reader]
+
+        assert [start for start, _ in pieces] == [0, 2, 4]
+        np.testing.assert_array_equal(
+            np.concatenate([frames for _, frames in pieces]),
+            mapped.buffer[: 5 * mapped.frame_size].reshape(5, -1),
+        )
+
+    def test_stopping_early(self, long_file):
+        mapped = MappedCODIF(long_file)
+        reader = ReadAhead(
+            long_file, mapped.frame_size, [(0, 6)], ReadAheadOptions(1, 1)
+        )
+        for start, _ in reader:
+            break
+        assert start == 0
+
+    def test_short_file_raises(self, long_file):
+        mapped = MappedCODIF(long_file)
+        reader = ReadAhead(long_file, mapped.frame_size, [(0, 10)])
+        with pytest.raises(OSError, match="ended"):
+            list(reader)
+
+
+class TestCODIFReadAhead:
+    def test_matches_memory_map(self, long_file):
+        expected = CODIF(long_file, cache_index=False).data
+        data = CODIF(
+            long_file, cache_index=False, readahead=ReadAheadOptions(2, 1)
+        ).data
+        np.testing.assert_array_equal(data, expected)
+        assert data.shape == (1, 2, 3, 8, 64)
+
+    def test_lazy(self, long_file):
+        codif = CODIF(long_file, lazy=True, cache_index=False, readahead=True)
+        expected = CODIF(long_file, cache_index=False).data
+        np.testing.assert_array_equal(codif.data[0, 1, 2], expected[0, 1, 2])
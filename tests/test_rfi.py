@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from pycodif.fold import Ephemeris, Folder
+from pycodif.parsing import CODIF
+from pycodif.rfi import (
+    RFIFlagger,
+    apply_flags,
+    kurtosis_limits,
+    sample_mask,
+    spectral_kurtosis,
+)
+from pycodif.synthetic import write_synthetic
+
+BLOCK = 256
+
+
+@pytest.fixture
+def noise_with_rfi():
+    """(thread, channel, sample) complex noise, with a steady tone in block 2 of
+    channel 1 and a burst in block 5 of channel 3."""
+    rng = np.random.default_rng(0)
+    shape = (2, 4, 8 * BLOCK)
+    data = (rng.standard_normal(shape) + 1j * rng.standard_normal(shape)).astype(
+        np.complex64
+    )
+    samples = np.arange(BLOCK)
+    data[:, 1, 2 * BLOCK : 3 * BLOCK] = 5 * np.exp(2j * np.pi * 0.1 * samples)
+    data[:, 3, 5 * BLOCK : 5 * BLOCK + 8] *= 30
+    return data
+
+
+class TestSpectralKurtosis:
+    def test_gaussian_noise_near_one(self):
+        rng = np.random.default_rng(1)
+        data = rng.standard_normal((16, 64 * BLOCK)) + 1j * rng.standard_normal(
+            (16, 64 * BLOCK)
+        )
+        kurtosis, power = spectral_kurtosis(np.abs(data) ** 2, BLOCK)
+        lower, upper = kurtosis_limits(BLOCK, sigma=5)
+
+        assert kurtosis.shape == power.shape == (16, 64)
+        assert abs(kurtosis.mean() - 1) < 0.02
+        assert ((kurtosis > lower) & (kurtosis < upper)).all()
+        np.testing.assert_allclose(power.mean(), 2, rtol=0.01)
+
+    def test_empty_block_is_nan(self):
+        kurtosis, _ = spectral_kurtosis(np.zeros((1, BLOCK)), BLOCK)
+        assert np.isnan(kurtosis).all()
+
+
+class TestRFIFlagger:
+    def test_flags_tone_and_burst(self, noise_with_rfi):
+        result = RFIFlagger(BLOCK, sigma=5).process(noise_with_rfi)
+
+        expected = np.zeros((2, 4, 8), dtype=bool)
+        expected[:, 1, 2] = True
+        expected[:, 3, 5] = True
+        np.testing.assert_array_equal(result.flags, expected)
+        assert result.start_block == 0
+
+    def test_pieces_match_whole(self, noise_with_rfi):
+        whole = RFIFlagger(BLOCK, sigma=5).process(noise_with_rfi)
+
+        flagger = RFIFlagger(BLOCK, sigma=5)
+        pieces = [
+            flagger.process(noise_with_rfi[..., start : start + 300])
+            for start in range(0, noise_with_rfi.shape[-1], 300)
+        ]
+        np.testing.assert_array_equal(
+            np.concatenate([piece.flags for piece in pieces], axis=-1), whole.flags
+        )
+        assert [piece.start_block for piece in pieces][:3] == [0, 1, 2]
+
+    def test_missing_frames_flagged(self, tmp_path):
+        filename = tmp_path / "lossy.codif"
+        write_synthetic(filename, 64, dropped=0.2, seed=0)
+        codif = CODIF(str(filename), lazy=True)
+        flagger = RFIFlagger(64, limits=(0, np.inf))
+
+        for block in codif.iter_blocks(16):
+            flags = flagger.process(block.data).flags
+            # One frame of 64 samples per flag block.
+            np.testing.assert_array_equal(flags.any(axis=-2), ~block.valid)
+
+    def test_running_power(self, noise_with_rfi):
+        flagger = RFIFlagger(BLOCK, sigma=5)
+        flagger.process(noise_with_rfi)
+        # The tone is much stronger than the noise, but left out of the mean.
+        np.testing.assert_allclose(flagger.mean_power, 2, rtol=0.1)
+
+
+class TestUsingFlags:
+    def test_apply_flags(self, noise_with_rfi):
+        flags = RFIFlagger(BLOCK, sigma=5).process(noise_with_rfi).flags
+        cleaned = apply_flags(noise_with_rfi, flags, BLOCK)
+
+        mask = sample_mask(flags, BLOCK)
+        assert mask.shape == noise_with_rfi.shape
+        assert (cleaned[mask] == 0).all()
+        np.testing.assert_array_equal(cleaned[~mask], noise_with_rfi[~mask])
+
+    def test_fold_leaves_out_flagged_values(self):
+        data = np.ones((8, 2))
+        data[:4, 1] = 100
+        weights = np.ones_like(data)
+        weights[:4, 1] = 0
+
+        folder = Folder(2, Ephemeris(period=2.0))
+        folder.add(data, np.arange(8.0), weights)
+        np.testing.assert_allclose(folder.profile, 1)
+        np.testing.assert_allclose(folder.counts, [3, 3])
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from pycodif.bulk import MappedCODIF
+from pycodif.export import export
+from pycodif.parsing import CODIF
+from pycodif.synthetic import synthetic_template, write_synthetic
+
+# (sample size, complex, representation, sample block length) of formats to write.
+# 4-bit real samples of 8 channels hold 8 time samples in each sample block.
+SAMPLE_FORMATS = [
+    (4, False, 0, 4),
+    (8, True, 1, 4),
+    (32, True, 2, 8),
+]
+
+
+def write_format(filename, sample_size, is_complex, representation, block_length):
+    template = synthetic_template(
+        sample_size=sample_size,
+        is_complex=is_complex,
+        sample_representation=representation,
+        sample_block_length=block_length,
+    )
+    write_synthetic(filename, 4, template=template)
+
+
+class TestWriteSynthetic:
+    def test_streams_and_frames(self, tmp_path):
+        filename = tmp_path / "synthetic.codif"
+        n_written = write_synthetic(
+            filename, 10, stations=("KP", "AB"), groups=(1, 2), threads=(3, 4, 5)
+        )
+        assert n_written == 10 * 2 * 2 * 3
+
+        codif = CODIF(str(filename))
+        assert codif.data.shape == (2, 2, 3, 8, 10 * 64)
+        assert codif.index.stations.tolist() == ["AB", "KP"]
+        assert codif.index.valid.all()
+
+    def test_blocks_match_one_write(self, tmp_path):
+        write_synthetic(tmp_path / "whole.codif", 20, seed=1)
+        write_synthetic(tmp_path / "blocks.codif", 20, seed=1, block_frames=20)
+        assert (tmp_path / "whole.codif").read_bytes() == (
+            tmp_path / "blocks.codif"
+        ).read_bytes()
+
+    def test_dropped_and_invalid(self, tmp_path):
+        filename = tmp_path / "lossy.codif"
+        n_written = write_synthetic(
+            filename, 1000, dropped=0.1, invalid=0.1, seed=0, block_frames=100
+        )
+        assert 800 < n_written < 950
+
+        with MappedCODIF(filename) as mapped:
+            invalid = int(mapped.headers["invalid"].sum())
+        codif = CODIF(str(filename), lazy=True)
+        assert codif.index.valid.sum() == n_written - invalid
+        assert codif.index.invalid.sum() == invalid
+
+    def test_crosses_alignment_periods(self, tmp_path):
+        # Four frames per alignment period.
+        template = synthetic_template(sample_periods_per_alignment_period=4 * 64)
+        filename = tmp_path / "periods.codif"
+        write_synthetic(filename, 10, template=template)
+
+        with MappedCODIF(filename) as mapped:
+            assert mapped.headers["data_frame_number"].tolist() == [
+                0,
+                1,
+                2,
+                3,
+                0,
+                1,
+                2,
+                3,
+                0,
+                1,
+            ]
+        codif = CODIF(str(filename), lazy=True)
+        assert np.array_equal(codif.index.frame_numbers, np.arange(10))
+
+    def test_sample_formats(self, tmp_path):
+        for sample_size, is_complex, representation, block_length in SAMPLE_FORMATS:
+            filename = tmp_path / f"format_{sample_size}.codif"
+            write_format(
+                filename, sample_size, is_complex, representation, block_length
+            )
+            codif = CODIF(str(filename))
+            assert codif.data.dtype == (np.complex64 if is_complex else np.float32)
+            assert np.isfinite(codif.data).all()
+            assert len(codif.timestamps) == codif.data.shape[-1]
+
+            blocks = list(codif.iter_blocks(1))
+            assert all(
+                len(block.timestamps) == block.data.shape[-1] for block in blocks
+            )
+
+    def test_sample_formats_export(self, tmp_path):
+        zarr = pytest.importorskip("zarr")
+        for sample_size, is_complex, representation, block_length in SAMPLE_FORMATS:
+            filename = tmp_path / f"format_{sample_size}.codif"
+            write_format(
+                filename, sample_size, is_complex, representation, block_length
+            )
+            codif = CODIF(str(filename), lazy=True)
+            path = tmp_path / f"format_{sample_size}.zarr"
+            export(codif, path, chunk_frames=1, block_frames=1)
+
+            store = zarr.open_group(path, mode="r")
+            np.testing.assert_array_equal(store["data"][...], codif.data[...])
+            np.testing.assert_array_equal(
+                store["timestamps"][...], np.asarray(codif.timestamps)
+            )
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from pycodif.bulk import MappedCODIF
+from pycodif.cli import main
+from pycodif.decoding import PayloadFormat, decode_payloads, encode_payloads
+from pycodif.parsing import CODIF
+from pycodif.synthetic import write_synthetic
+from pycodif.writer import CODIFWriter, repacked_format, subset
+
+
+@pytest.fixture
+def synthetic_file(tmp_path):
+    filename = tmp_path / "synthetic.codif"
+    write_synthetic(filename, 20, groups=(1, 2), threads=(3, 4, 5), seed=0)
+    return filename
+
+
+class TestEncodePayloads:
+    @pytest.mark.parametrize(
+        "sample_size, is_complex, representation, block_length",
+        [(4, 0, 0, 4), (4, 1, 1, 4), (8, 1, 0, 4), (16, 1, 1, 4), (32, 1, 2, 8)],
+    )
+    def test_round_trip(self, sample_size, is_complex, representation, block_length):
+        payload_format = PayloadFormat(
+            8, sample_size, is_complex, representation, block_length, 256
+        )
+        rng = np.random.default_rng(0)
+        if representation == 2:
+            payloads = rng.standard_normal((3, 512)).astype(np.float32).view(np.uint8)
+        else:
+            payloads = rng.integers(0, 256, (3, 2048), dtype=np.uint8)
+
+        decoded = decode_payloads(payloads, payload_format)
+        encoded = encode_payloads(decoded, payload_format)
+        used = payload_format.block_bytes_used
+        blocks = (3, -1, block_length * 8)
+        assert np.array_equal(
+            encoded.reshape(blocks)[..., :used], payloads.reshape(blocks)[..., :used]
+        )
+
+    def test_clips(self):
+        payload_format = PayloadFormat(8, 8, 0, 1, 4, 256)
+        data = np.full((8, payload_format.samples_per_frame), 1000.0)
+        assert (encode_payloads(data, payload_format).view(np.int8) == 127).all()
+
+
+class TestCODIFWriter:
+    def test_writes_frames_unchanged(self, tmp_path, two_packets):
+        filename = tmp_path / "copy.codif"
+        with MappedCODIF(two_packets) as mapped, CODIFWriter(filename) as writer:
+            writer.write_frames(mapped.headers, mapped.payloads)
+        assert filename.read_bytes() == open(two_packets, "rb").read()
+
+    def test_payload_length_checked(self, tmp_path, two_packets):
+        with MappedCODIF(two_packets) as mapped, CODIFWriter(tmp_path / "x") as writer:
+            with pytest.raises(ValueError, match="data array length"):
+                writer.write_frames(mapped.headers, mapped.payloads[:, :-8])
+
+
+class TestSubset:
+    def test_streams_and_time_range(self, synthetic_file, tmp_path):
+        filename = tmp_path / "subset.codif"
+        n_frames = subset(
+            synthetic_file, filename, groups=[2], threads=[3, 5], start=5, stop=15
+        )
+        assert n_frames == 2 * 10
+
+        original = CODIF(str(synthetic_file))
+        copied = CODIF(str(filename))
+        assert copied.index.groups.tolist() == [2]
+        assert copied.index.threads.tolist() == [3, 5]
+        samples = slice(5 * 64, 15 * 64)
+        assert np.array_equal(copied.data, original.data[:, 1:, [0, 2], :, samples])
+        assert np.array_equal(copied.timestamps, original.timestamps[samples])
+
+    def test_copies_raw_bytes(self, synthetic_file, tmp_path):
+        filename = tmp_path / "all.codif"
+        subset(synthetic_file, filename)
+        assert filename.read_bytes() == synthetic_file.read_bytes()
+
+    def test_unknown_stream_raises(self, synthetic_file, tmp_path):
+        with pytest.raises(ValueError, match="not found"):
+            subset(synthetic_file, tmp_path / "x.codif", threads=[9])
+
+    def test_repack(self, synthetic_file, tmp_path):
+        filename = tmp_path / "repacked.codif"
+        subset(synthetic_file, filename, sample_size=32)
+
+        original = CODIF(str(synthetic_file))
+        repacked = CODIF(str(filename))
+        assert repacked.index.header["sample_size"] == 32
+        assert repacked.index.frame_size == 64 + 2 * (original.index.frame_size - 64)
+        assert np.array_equal(repacked.data, original.data)
+
+    def test_repacked_format(self):
+        payload_format = PayloadFormat(8, 16, 1, 1, 4, 256)
+        packed = repacked_format(payload_format, sample_size=8)
+        assert packed.sample_block_length == 2
+        assert packed.data_array_length == 128
+        assert packed.samples_per_frame == payload_format.samples_per_frame
+
+    def test_cli(self, synthetic_file, tmp_path, capsys):
+        filename = tmp_path / "subset.codif"
+        main(["subset", str(synthetic_file), "-o", str(filename), "--threads", "4"])
+        assert "Wrote 40 frames" in capsys.readouterr().out
+        assert CODIF(str(filename), lazy=True).index.threads.tolist() == [4]